@@ -17,21 +17,82 @@ config = {
 SCRAPER_CONFIG = {
     'start_page': 7920,
     'end_page': 10000,
+    # Определять последнюю живую страницу автоматически вместо end_page
+    'discover_end_page': False,
+    'frontier_window': 50,  # Пропуск удаленных ID, который не считается концом каталога
+    'frontier_samples': 5,  # Сколько ID проверять в каждом окне
+    'frontier_margin': 0,  # Сколько ID сканировать сверх найденной границы
     'base_url': 'https://www.penguinmagic.com/p/',
     'data_dir': 'data',
     'log_dir': 'logs',
     'excel_file': 'data/products.xlsx',
     'excel_output': 'data/products.xlsx',
+    # Сжатый архив исходного HTML всех загруженных страниц (None - отключен)
+    'archive_dir': 'data/html_archive',
+    'archive_segment_size': 256 * 1024 * 1024,  # Размер сегмента архива, байт
+    # Заведомо отсутствующие ID (500, 404, страницы без head) не запрашиваются повторно
+    'dead_ids_file': 'data/dead_ids.bin',
+    'dead_ids_ttl_days': 30,  # Через сколько дней перепроверять ID (None - никогда)
+    # Чекпоинт обхода: после падения скрапер продолжает с последней сохраненной страницы
+    # (после успешного завершения чекпоинт удаляется, и следующий запуск обходит диапазон заново)
+    'checkpoint_file': 'data/checkpoint.json',
+    'resume': True,  # False - начать обход заново, игнорируя чекпоинт
     'log_file': 'logs/scraper.log',
     'max_retries': 3,
-    'retry_delay': 5,
+    'retry_delay': 5,  # Базовая задержка экспоненциального отката, сек
+    'retry_max_delay': 60,  # Максимальная задержка перед повтором; при большем Retry-After страница не повторяется
+    'retry_budget_ratio': 0.1,  # Повторы не превышают 10% от числа запросов...
+    'retry_budget_min': 10,  # ...плюс фиксированный запас
     'timeout': 30,
     'batch_size': 100,
     'delay_between_requests': 1.0,
-    'min_delay': 1.0,
-    'max_delay': 3.0,
-    'batch_delay': 30,
+    # Пул соединений с базой данных (общий для воркеров и скриптов процесса)
+    'db_pool': {
+        'min_connections': 1,
+        'max_connections': 4,
+        'health_check_interval': 30.0,  # Простой, после которого соединение проверяется SELECT 1, сек
+        'timeout': 30.0  # Максимальное ожидание свободного соединения, сек
+    },
+    # Фоновая запись в базу данных: пакеты по batch_size или раз в db_flush_interval секунд
+    'db_flush_interval': 5.0,
+    'db_queue_size': 1000,  # Емкость очереди записи (при заполнении загрузка ждет)
+    # Адаптивный ограничитель частоты запросов (общий для всех режимов загрузки)
+    'rate_limit': {
+        'initial_rate': 0.5,  # Запросов в секунду на старте
+        'min_rate': 0.1,
+        'max_rate': 5.0,
+        'increase_step': 0.05,  # Аддитивный рост после быстрого успешного ответа
+        'decrease_factor': 0.5,  # Мультипликативное снижение при 429/5xx/таймаутах
+        'latency_factor': 2.0,  # Рост задержки относительно базовой, считающийся перегрузкой
+        'baseline_decay': 0.01,  # Скорость подтягивания базовой задержки к текущей
+        'burst': 1,
+        'cooldown': 5.0
+    },
     'save_interval': 10,
+    # Парсер страниц: 'html.parser', 'lxml' (BeautifulSoup с деревом lxml),
+    # 'lxml-xpath' (прямое извлечение через XPath) или 'lxml-single-pass'
+    # (извлечение за один обход дерева, самый быстрый)
+    'parser_backend': 'lxml-single-pass',
+    # Для парсеров BeautifulSoup: строить дерево только для нужных областей страницы
+    'restricted_parse': True,
+    # Сначала пробовать извлечь продукт из JSON-LD и мета-тегов без построения дерева
+    # (только если результат заведомо совпадает с полным разбором, см. scraping/fast_path.py).
+    # Выключено: страницы продуктов содержат таблицу цен, теги и отзывы,
+    # и быстрый путь на них не применяется, оставаясь лишним просмотром HTML
+    'fast_path': False,
+    # Максимум отзывов на продукт (None - все, 0 - только общая оценка из review_summary)
+    'max_reviews': None,
+    'save_to_db': True,  # False - сохранять только в Excel (например, для нагрузочных тестов)
+    # Режим загрузки: 'sequential' (по одной странице), 'async' (asyncio),
+    # 'threads' (пул потоков) или 'pipeline' (загрузка в пуле потоков,
+    # разбор в пуле процессов на всех ядрах)
+    'fetch_mode': 'sequential',
+    'workers': 4,  # Количество потоков в режимах 'threads' и 'pipeline'
+    'parse_workers': None,  # Процессов разбора в режиме 'pipeline' (None - число ядер)
+    'pipeline_queue_size': 32,  # Загруженных страниц в очереди до разбора (ограничивает память)
+    'concurrency': 8,  # Глобальный лимит одновременных запросов
+    'per_host_concurrency': 4,  # Лимит одновременных запросов к одному хосту
+    'async_queue_size': 100,  # Загруженные страницы, ожидающие разбора (режим 'async')
     'headers': {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
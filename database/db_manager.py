@@ -1,5 +1,6 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import DataError, IntegrityError
+from psycopg2.extras import RealDictCursor, execute_values
+from contextlib import contextmanager
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 from dotenv import load_dotenv
@@ -9,6 +10,7 @@ from datetime import datetime
 import re
 from urllib.parse import urlparse
 import json
+from .pool import get_pool
 
 # Настройка логирования
 logging.basicConfig(
@@ -17,13 +19,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Колонки, заполняемые при сохранении продукта (порядок как в product_row)
+PRODUCT_COLUMNS = (
+    'name', 'author', 'price', 'discounted_price', 'url', 'image_url',
+    'description', 'tags', 'reviews', 'created_at', 'updated_at'
+)
+# Колонки, которые обновляются у уже сохраненного продукта
+UPDATABLE_COLUMNS = tuple(
+    column for column in PRODUCT_COLUMNS if column not in ('url', 'created_at', 'updated_at')
+)
+
+# Вставка или обновление по url (нужен уникальный индекс, см. migrate_unique_url.sql).
+# Строка переписывается и получает новый updated_at, только если данные изменились
+UPSERT_PRODUCT_SQL = (
+    f"INSERT INTO products ({', '.join(PRODUCT_COLUMNS)}) VALUES {{values}} "
+    f"ON CONFLICT (url) DO UPDATE SET "
+    f"{', '.join(f'{column} = EXCLUDED.{column}' for column in UPDATABLE_COLUMNS)}, "
+    f"updated_at = EXCLUDED.updated_at "
+    f"WHERE ({', '.join(f'products.{column}' for column in UPDATABLE_COLUMNS)}) "
+    f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in UPDATABLE_COLUMNS)})"
+)
+UPSERT_PRODUCT_ROW_SQL = UPSERT_PRODUCT_SQL.format(values=f"({', '.join(['%s'] * len(PRODUCT_COLUMNS))})")
+UPSERT_PRODUCT_BATCH_SQL = UPSERT_PRODUCT_SQL.format(values="%s")
+
+# Есть ли уникальный индекс по одной колонке url (тот же запрос, что в migrate_unique_url.sql)
+UNIQUE_URL_INDEX_SQL = """
+    SELECT 1
+    FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+    WHERE i.indrelid = 'products'::regclass
+      AND i.indisunique
+      AND i.indnatts = 1
+      AND i.indpred IS NULL
+      AND a.attname = 'url'
+"""
+
 class DatabaseManager:
-    def __init__(self, env_path: Optional[Path] = None):
+    def __init__(self, env_path: Optional[Path] = None,
+                 min_connections: int = 1,
+                 max_connections: int = 10,
+                 health_check_interval: float = 30.0,
+                 timeout: float = 30.0):
         """
         Инициализация менеджера базы данных.
+
+        Соединения берутся из общего для процесса пула (database/pool.py):
+        менеджеры с одинаковыми параметрами подключения используют одни и те
+        же соединения, а первое соединение открывается только при первом
+        запросе. Сохранение продуктов (save_product, save_products)
+        потокобезопасно: каждый вызов берет свое соединение из пула.
         
         Args:
             env_path (Path, optional): Путь к файлу с переменными окружения
+            min_connections (int): Сколько соединений пула держать открытыми
+            max_connections (int): Максимум одновременных соединений пула
+            health_check_interval (float): Простой, после которого соединение проверяется, сек
+            timeout (float): Максимальное ожидание свободного соединения, сек
         """
         if env_path is None:
             env_path = Path(__file__).parent.parent / '.env'
@@ -38,27 +89,75 @@ class DatabaseManager:
             'port': os.getenv('DB_PORT')
         }
         
-        self.conn = None
-        self.cur = None
-        self.connect()
+        # Параметры пула применяются при первом создании пула для этих параметров
+        self.pool = get_pool(
+            self.params,
+            min_connections=min_connections,
+            max_connections=max_connections,
+            health_check_interval=health_check_interval,
+            timeout=timeout
+        )
+        # Соединение сессии для conn/cur (запросы вне save_product/save_products)
+        self._conn = None
+        self._cur = None
+
+    @property
+    def conn(self):
+        """Соединение сессии (берется из пула при первом обращении)"""
+        if self._conn is None or self._conn.closed:
+            self.connect()
+        return self._conn
+
+    @property
+    def cur(self):
+        """Курсор соединения сессии"""
+        if self._cur is None or self._cur.closed:
+            self.connect()
+        return self._cur
 
     def connect(self) -> None:
-        """Установка соединения с базой данных."""
+        """Получение соединения сессии из пула (повторный вызов использует уже полученное)."""
+        if self._conn is not None and not self._conn.closed and self._cur is not None and not self._cur.closed:
+            return
+        self.disconnect()
         try:
-            self.conn = psycopg2.connect(**self.params)
-            self.cur = self.conn.cursor(cursor_factory=RealDictCursor)
+            self._conn = self.pool.getconn()
+            self._cur = self._conn.cursor(cursor_factory=RealDictCursor)
             logger.info("Успешное подключение к базе данных")
         except Exception as e:
+            if self._conn is not None:
+                self.pool.putconn(self._conn)
+                self._conn = None
             logger.error(f"Ошибка подключения к базе данных: {e}")
             raise
 
     def disconnect(self) -> None:
-        """Закрытие соединения с базой данных."""
-        if self.cur:
-            self.cur.close()
-        if self.conn:
-            self.conn.close()
-            logger.info("Соединение с базой данных закрыто")
+        """Возврат соединения сессии в пул."""
+        if self._cur is not None and not self._cur.closed:
+            self._cur.close()
+        self._cur = None
+        if self._conn is not None:
+            self.pool.putconn(self._conn)
+            self._conn = None
+            logger.info("Соединение с базой данных возвращено в пул")
+
+    @contextmanager
+    def connection(self):
+        """
+        Соединение из пула на время одной операции.
+
+        При исключении транзакция откатывается; соединение, потерянное
+        сервером, закрывается вместо возврата в пул.
+        """
+        conn = self.pool.getconn()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
 
     def __enter__(self):
         """Контекстный менеджер для автоматического подключения."""
@@ -308,40 +407,136 @@ class DatabaseManager:
             logger.error(f"Ошибка при выполнении запроса: {e}")
             return None
 
+    def check_schema(self) -> None:
+        """
+        Проверка, что таблица products готова к сохранению через ON CONFLICT (url).
+
+        Raises:
+            RuntimeError: Нет уникального индекса по url
+        """
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(UNIQUE_URL_INDEX_SQL)
+            found = cur.fetchone() is not None
+            conn.rollback()
+        if not found:
+            raise RuntimeError(
+                "В таблице products нет уникального индекса по url, сохранение продуктов невозможно. "
+                "Для существующей базы выполните миграцию: python remove_duplicates.py "
+                "(database/migrate_unique_url.sql), для новой - python database/init_db.py"
+            )
+
+    @staticmethod
+    def product_row(product: Dict[str, Any]) -> tuple:
+        """
+        Значения колонок PRODUCT_COLUMNS для продукта.
+
+        Args:
+            product (dict): Информация о продукте
+
+        Returns:
+            tuple: Значения в порядке колонок
+        """
+        # Поддерживаем как 'tags', так и 'categories' для обратной совместимости
+        tags = product.get('tags') or product.get('categories', [])
+        reviews = product.get('reviews', [])
+        now = datetime.now()
+        return (
+            product['name'],
+            product.get('author'),
+            product['price'],
+            product.get('discounted_price'),
+            product['url'],
+            product.get('image_url'),
+            product.get('description'),
+            tags,  # Используем tags вместо categories
+            json.dumps(reviews) if reviews else None,  # Сохраняем reviews как JSON
+            now,
+            now
+        )
+
     def save_product(self, product):
         """Сохраняет продукт в базу данных"""
         try:
-            if not self.conn or self.conn.closed:
-                self.connect()
-
-            # Поддерживаем как 'tags', так и 'categories' для обратной совместимости
-            tags = product.get('tags') or product.get('categories', [])
-            discounted_price = product.get('discounted_price')
-            reviews = product.get('reviews', [])
-            
-            self.cur.execute("""
-                INSERT INTO products (
-                    name, author, price, discounted_price, url, image_url, 
-                    description, tags, reviews, created_at, updated_at
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                )
-            """, (
-                product['name'],
-                product.get('author'),
-                product['price'],
-                discounted_price,
-                product['url'],
-                product.get('image_url'),
-                product.get('description'),
-                tags,  # Используем tags вместо categories
-                json.dumps(reviews) if reviews else None,  # Сохраняем reviews как JSON
-                datetime.now(),
-                datetime.now()
-            ))
-            self.conn.commit()
+            with self.connection() as conn, conn.cursor() as cur:
+                cur.execute(UPSERT_PRODUCT_ROW_SQL, self.product_row(product))
+                conn.commit()
         except Exception as e:
             logger.error(f"Ошибка при сохранении продукта: {e}")
-            if self.conn:
-                self.conn.rollback()
-            raise 
\ No newline at end of file
+            raise
+
+    def save_products(self, products: List[Dict[str, Any]]) -> int:
+        """
+        Сохраняет пакет продуктов одной транзакцией.
+
+        Весь пакет записывается одним многострочным INSERT ... ON CONFLICT
+        (execute_values) и одним commit: новые URL вставляются, у
+        существующих обновляются только изменившиеся записи. Повторы URL
+        внутри пакета схлопываются до последней версии. Если запись пакета
+        не удалась из-за данных (DataError, IntegrityError), транзакция
+        откатывается и продукты записываются по одному в той же транзакции,
+        каждый под своей точкой сохранения: ошибочные строки пропускаются и
+        логируются, остальные сохраняются. Прочие ошибки (нет соединения,
+        нет уникального индекса) и пакет, в котором не записалась ни одна
+        строка, откатываются целиком с исключением, чтобы вызывающий код
+        повторил пакет.
+
+        Args:
+            products (list): Список продуктов
+
+        Returns:
+            int: Количество сохраненных (вставленных или актуальных) продуктов
+
+        Raises:
+            psycopg2.Error: Пакет не записан (транзакция откачена)
+        """
+        if not products:
+            return 0
+
+        # Один URL в пакете - одна строка (последняя версия продукта):
+        # ON CONFLICT не может обновить одну запись дважды за запрос
+        latest = {}
+        for index, product in enumerate(products):
+            url = product.get('url')
+            latest[url if url is not None else index] = product
+
+        rows = []
+        for product in latest.values():
+            try:
+                rows.append((product, self.product_row(product)))
+            except KeyError as e:
+                logger.error(f"Продукт {product.get('url')} пропущен: нет поля {e}")
+        if not rows:
+            return 0
+
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                execute_values(cur, UPSERT_PRODUCT_BATCH_SQL, [row for _, row in rows], page_size=len(rows))
+                conn.commit()
+                return len(rows)
+            except (DataError, IntegrityError) as e:
+                # Ошибка в данных одной из строк: ищем ее, сохраняя остальные
+                conn.rollback()
+                logger.warning(f"Ошибка пакетной вставки ({e}), сохраняем продукты по одному")
+
+            saved = 0
+            row_error = None
+            try:
+                for product, row in rows:
+                    cur.execute("SAVEPOINT save_product")
+                    try:
+                        cur.execute(UPSERT_PRODUCT_ROW_SQL, row)
+                    except (DataError, IntegrityError) as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT save_product")
+                        logger.error(f"Ошибка при сохранении продукта {product.get('url')}: {e}")
+                        row_error = e
+                        continue
+                    cur.execute("RELEASE SAVEPOINT save_product")
+                    saved += 1
+                if not saved:
+                    # Не записано ни одной строки: ошибка не в отдельных продуктах, пакет нужно повторить
+                    raise row_error
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Ошибка при сохранении пакета продуктов: {e}")
+                raise
+            return saved 
\ No newline at end of file
@@ -9,7 +9,13 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def init_database():
-    """Инициализация базы данных"""
+    """
+    Инициализация базы данных (таблица products пересоздается).
+
+    Существующую базу без уникального индекса по url вместо пересоздания
+    нужно перевести миграцией database/migrate_unique_url.sql
+    (python remove_duplicates.py): она удаляет дубликаты и создает индекс.
+    """
     try:
         # Загружаем переменные окружения
         load_dotenv()
@@ -35,7 +41,8 @@ def init_database():
         
         # Читаем и выполняем SQL-скрипт
         logger.info('Applying database schema...')
-        with open(Path(__file__).parent / 'schema.sql', 'r') as f:
+        # Текущая схема: поля отзывов и тегов, уникальный url для INSERT ... ON CONFLICT
+        with open(Path(__file__).parent / 'schema_updated.sql', 'r', encoding='utf-8') as f:
             sql = f.read()
             cur.execute(sql)
         logger.info('Database schema applied successfully')
@@ -0,0 +1,46 @@
+-- Миграция: уникальность продуктов по URL
+-- Удаляет дубликаты на месте (без пересоздания таблицы) и создает
+-- уникальный индекс, который нужен для INSERT ... ON CONFLICT (url).
+-- Выполняется один раз для баз, созданных до появления индекса:
+--   python remove_duplicates.py
+-- Новые базы (python database/init_db.py, schema_updated.sql) создаются с индексом.
+-- Без индекса скрапер с сохранением в базу не запускается (DatabaseManager.check_schema)
+BEGIN;
+
+-- Запрещаем вставки на время удаления дубликатов и построения индекса
+LOCK TABLE products IN SHARE ROW EXCLUSIVE MODE;
+
+-- Для каждого URL оставляем самую свежую запись
+DELETE FROM products p
+USING (
+    SELECT id,
+           ROW_NUMBER() OVER (
+               PARTITION BY url
+               ORDER BY created_at DESC NULLS LAST, id DESC
+           ) AS rn
+    FROM products
+    WHERE url IS NOT NULL
+) d
+WHERE p.id = d.id AND d.rn > 1;
+
+-- Уникальный индекс, если его еще нет (в schema_updated.sql url уже UNIQUE)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = 'products'::regclass
+          AND i.indisunique
+          AND i.indnatts = 1
+          AND i.indpred IS NULL
+          AND a.attname = 'url'
+    ) THEN
+        CREATE UNIQUE INDEX idx_products_url_unique ON products(url);
+    END IF;
+END $$;
+
+-- Обычный индекс по url дублирует уникальный
+DROP INDEX IF EXISTS idx_products_url;
+
+COMMIT;
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import psycopg2
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+logger = logging.getLogger(__name__)
+
+class ConnectionPool:
+    def __init__(self,
+                 params: Dict[str, Optional[str]],
+                 min_connections: int = 1,
+                 max_connections: int = 10,
+                 health_check_interval: float = 30.0,
+                 timeout: float = 30.0):
+        """
+        Потокобезопасный пул соединений с PostgreSQL.
+
+        Соединения создаются при первом запросе, а не при создании пула.
+        Если все max_connections заняты, getconn ждет освобождения
+        соединения (до timeout секунд), а не завершается ошибкой, как
+        ThreadedConnectionPool. Соединение, простоявшее в пуле дольше
+        health_check_interval, перед выдачей проверяется запросом SELECT 1;
+        закрытые и неисправные соединения заменяются новыми.
+
+        Args:
+            params (dict): Параметры psycopg2.connect
+            min_connections (int): Сколько соединений держать открытыми
+            max_connections (int): Максимум одновременно выданных соединений
+            health_check_interval (float): Простой, после которого соединение проверяется, сек
+            timeout (float): Максимальное ожидание свободного соединения, сек
+        """
+        self.params = params
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle_since: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """Пул psycopg2 (создается при первом обращении)"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(self.min_connections, self.max_connections, **self.params)
+                logger.info(f"Создан пул соединений с базой данных "
+                            f"(от {self.min_connections} до {self.max_connections})")
+            return self._pool
+
+    def _is_healthy(self, conn) -> bool:
+        """Проверка соединения перед выдачей"""
+        if conn.closed:
+            return False
+        with self._lock:
+            idle_since = self._idle_since.pop(id(conn), None)
+        if idle_since is None or time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Соединение с базой данных неисправно и будет заменено: {e}")
+            return False
+
+    def getconn(self):
+        """
+        Получение соединения из пула.
+
+        Raises:
+            PoolError: Свободное соединение не появилось за timeout секунд
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"Нет свободных соединений с базой данных ({self.max_connections} заняты)")
+        try:
+            pool = self._get_pool()
+            # Неисправные соединения закрываются, пока не найдется рабочее или новое
+            for _ in range(self.max_connections + 1):
+                conn = pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                pool.putconn(conn, close=True)
+            raise PoolError("Не удалось получить исправное соединение с базой данных")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """
+        Возврат соединения в пул (незавершенная транзакция откатывается).
+
+        Args:
+            conn: Соединение, полученное через getconn
+            close (bool): Закрыть соединение вместо возврата
+        """
+        try:
+            close = close or bool(conn.closed)
+            if not close:
+                with self._lock:
+                    self._idle_since[id(conn)] = time.monotonic()
+            self._get_pool().putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        """Закрытие всех соединений пула"""
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+            self._idle_since.clear()
+
+# Пулы процесса: менеджеры с одинаковыми параметрами подключения
+# (воркеры скрапера, скрипты) используют общий пул
+_pools: Dict[Tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(params: Dict[str, Optional[str]], **options) -> ConnectionPool:
+    """
+    Общий пул соединений для параметров подключения.
+
+    Args:
+        params (dict): Параметры psycopg2.connect
+        **options: Параметры ConnectionPool (используются при создании пула)
+
+    Returns:
+        ConnectionPool: Пул соединений
+    """
+    key = tuple(sorted(params.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(params, **options)
+        return _pools[key]
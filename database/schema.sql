@@ -7,7 +7,7 @@ CREATE TABLE IF NOT EXISTS products (
     name VARCHAR(255) NOT NULL,
     author VARCHAR(255),
     price DECIMAL(10, 2),
-    url VARCHAR(255),
+    url VARCHAR(255) UNIQUE,  -- Уникальный индекс для INSERT ... ON CONFLICT (url)
     image_url TEXT,
     description TEXT,
     categories TEXT[],
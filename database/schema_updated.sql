@@ -9,7 +9,7 @@ CREATE TABLE IF NOT EXISTS products (
     author VARCHAR(255),
     price DECIMAL(10, 2),
     discounted_price DECIMAL(10, 2),  -- Цена со скидкой
-    url VARCHAR(255) UNIQUE,
+    url VARCHAR(255) UNIQUE,  -- Уникальный индекс для INSERT ... ON CONFLICT (url)
     image_url TEXT,
     description TEXT,
     tags TEXT[],  -- Изменено с categories на tags
@@ -20,7 +20,6 @@ CREATE TABLE IF NOT EXISTS products (
 
 -- Создаем индексы для ускорения поиска
 CREATE INDEX IF NOT EXISTS idx_products_name ON products(name);
-CREATE INDEX IF NOT EXISTS idx_products_url ON products(url);
 CREATE INDEX IF NOT EXISTS idx_products_tags ON products USING GIN(tags);  -- GIN индекс для массива
 CREATE INDEX IF NOT EXISTS idx_products_reviews ON products USING GIN(reviews);  -- GIN индекс для JSONB
 
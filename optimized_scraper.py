@@ -1,19 +1,26 @@
 import requests
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 import time
 import pandas as pd
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config import SCRAPER_CONFIG
 from database.db_manager import DatabaseManager
-import random
+from scraping import (
+    AdaptiveRateLimiter, AsyncFetcher, CrawlCheckpoint, DatabaseWriter, DeadIdFilter, FetchedPage,
+    FetchParsePipeline, FrontierProber, HtmlArchive, ParsedPage, RetryPolicy
+)
+from scraping.extraction import (
+    DEFAULT_PARSER_BACKEND, build_soup, extract_product_info, extract_reviews, has_head
+)
+from scraping.pipeline import parse_html
+from scraping.retry_policy import DEAD_PAGE_ERRORS, DELETED
 import sys
-from urllib.parse import urljoin
-import re
+import threading
 import os
 import json
+from collections import Counter
 
 # Настройка логирования
 logging.basicConfig(
@@ -27,437 +34,133 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class PenguinMagicScraper:
-    def __init__(self):
-        """Инициализация скрапера"""
-        self.config = SCRAPER_CONFIG
-        self.session = requests.Session()
-        self.session.headers.update(self.config['headers'])
+    def __init__(self, config: Optional[Dict] = None, db_manager: Optional[DatabaseManager] = None):
+        """
+        Инициализация скрапера.
+        
+        Args:
+            config (dict, optional): Конфигурация (по умолчанию SCRAPER_CONFIG)
+            db_manager (DatabaseManager, optional): Менеджер базы данных
+                (по умолчанию создается, если включено сохранение в базу)
+        """
+        self.config = config if config is not None else SCRAPER_CONFIG
+        self._local = threading.local()
+        self.rate_limiter = AdaptiveRateLimiter(**self.config['rate_limit'])
+        self.retry_policy = RetryPolicy(
+            max_retries=self.config['max_retries'],
+            base_delay=self.config['retry_delay'],
+            max_delay=self.config['retry_max_delay'],
+            budget_ratio=self.config['retry_budget_ratio'],
+            budget_min=self.config['retry_budget_min']
+        )
+        self.archive = None
+        if self.config.get('archive_dir'):
+            self.archive = HtmlArchive(self.config['archive_dir'], self.config['archive_segment_size'])
+        self.dead_ids = None
+        if self.config.get('dead_ids_file'):
+            ttl_days = self.config.get('dead_ids_ttl_days')
+            self.dead_ids = DeadIdFilter(self.config['dead_ids_file'], ttl_days * 86400 if ttl_days else None)
+        self.checkpoint = CrawlCheckpoint(self.config.get('checkpoint_file'), resume=self.config.get('resume', True))
         self.products = []
-        self.current_batch = 0
+        # Страницы продуктов (по индексу в self.products) для завершения в чекпоинте
+        self.product_pages = []
+        # Водяной знак: продукты self.products[:persisted_count] уже записаны в базу данных
+        self.persisted_count = 0
+        # Продукты self.products[:committed_count] завершены в чекпоинте
+        self.committed_count = 0
+        # Продукты, записанные в базу ('written') и не записанные из-за ошибок ('skipped')
+        self.db_stats = Counter()
+        self._persist_lock = threading.Lock()
         self.current_url = None
-        self.db_manager = DatabaseManager()
+        self.parser_backend = self.config.get('parser_backend', DEFAULT_PARSER_BACKEND)
+        self.restricted_parse = self.config.get('restricted_parse', False)
+        self.max_reviews = self.config.get('max_reviews')
+        self.use_fast_path = self.config.get('fast_path', False)
+        # Страницы, разобранные через JSON-LD без построения дерева ('hits') из всех ('pages')
+        self.fast_path_stats = Counter()
+        self._stats_lock = threading.Lock()
+        self.db_manager = db_manager
+        if self.db_manager is None and self.config.get('save_to_db', True):
+            self.db_manager = DatabaseManager(**self.config.get('db_pool', {}))
+        # Запись в базу данных в фоновом потоке: загрузка и разбор не ждут фиксации транзакций
+        self.db_writer = None
+        if self.db_manager is not None:
+            self.db_writer = DatabaseWriter(
+                self.save_to_database,
+                on_saved=self.record_saved,
+                batch_size=self.config['batch_size'],
+                flush_interval=self.config.get('db_flush_interval', 5.0),
+                queue_size=self.config.get('db_queue_size', 1000),
+                retry_delay=self.config['retry_delay']
+            )
         self.logger = logging.getLogger(__name__)
 
-    def random_delay(self):
-        """Случайная задержка между запросами"""
-        delay = random.uniform(self.config['min_delay'], self.config['max_delay'])
-        time.sleep(delay)
-
-    def batch_delay(self):
-        """Пауза между батчами запросов"""
-        if self.current_batch >= self.config['batch_size']:
-            self.logger.info(f"Достигнут лимит батча ({self.config['batch_size']} запросов). Пауза {self.config['batch_delay']} секунд.")
-            time.sleep(self.config['batch_delay'])
-            self.current_batch = 0
+    @property
+    def session(self) -> requests.Session:
+        """HTTP-сессия текущего потока (requests.Session не потокобезопасна)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.config['headers'])
+            self._local.session = session
+        return session
 
-    def make_request(self, url: str, retry_count: int = 0) -> Optional[requests.Response]:
+    def make_request(self, url: str) -> Optional[requests.Response]:
         """Выполнение запроса с обработкой ошибок и повторными попытками"""
-        try:
-            self.current_url = url
-            response = self.session.get(url, timeout=self.config['timeout'])
+        response, _ = self.fetch_url(url)
+        return response
+
+    def fetch_url(self, url: str) -> Tuple[Optional[requests.Response], Optional[str]]:
+        """
+        Выполнение запроса с повторными попытками по политике retry_policy.
+        
+        Returns:
+            tuple: (ответ или None, класс ошибки или None)
+        """
+        self.retry_policy.record_request()
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            started = time.monotonic()
+            response = None
+            try:
+                self.current_url = url
+                response = self.session.get(url, timeout=self.config['timeout'])
+                self.rate_limiter.record(response.status_code, time.monotonic() - started)
+                error_kind = self.retry_policy.classify_status(response.status_code)
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                self.rate_limiter.record(None, timed_out=isinstance(e, requests.Timeout))
+                error_kind = self.retry_policy.classify_exception(e)
+                error = str(e)
+            
+            if error_kind is None:
+                return response, None
             
             # Специальная обработка 500 ошибки
-            if response.status_code == 500:
+            if error_kind == DELETED:
                 logger.warning(f"Страница {url} вернула 500 ошибку (возможно удалена)")
-                return None
-                
-            response.raise_for_status()
-            return response
-            
-        except requests.RequestException as e:
-            if retry_count < self.config['max_retries']:
-                logger.warning(f"Ошибка запроса: {e}. Повторная попытка {retry_count + 1}/{self.config['max_retries']}")
-                time.sleep(random.uniform(2, 5))  # Увеличенная задержка при ошибке
-                return self.make_request(url, retry_count + 1)
-            else:
-                logger.error(f"Превышено максимальное количество попыток для URL: {url}")
-                return None
+                return None, error_kind
+            
+            retry_after = None
+            if response is not None:
+                retry_after = self.retry_policy.parse_retry_after(response.headers.get('Retry-After'))
+            if not self.retry_policy.should_retry(error_kind, attempt, retry_after):
+                logger.error(f"Запрос {url} завершился ошибкой ({error_kind}): {error}. Попыток: {attempt + 1}")
+                return None, error_kind
+            
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            attempt += 1
+            logger.warning(f"Ошибка запроса ({error_kind}): {error}. Повторная попытка {attempt}/{self.retry_policy.max_retries} через {delay:.1f} сек")
+            time.sleep(delay)
 
-    def extract_product_info(self, soup, url):
+    def extract_product_info(self, soup, url, html: Optional[str] = None):
         """Извлекает информацию о продукте из HTML"""
-        try:
-            # Название продукта
-            product_name = None
-            
-            # 1. Ищем в основном контейнере продукта
-            product_container = soup.find('div', class_='product-main')
-            if product_container:
-                # Ищем заголовок в контейнере
-                title_element = product_container.find('h1')
-                if title_element:
-                    product_name = title_element.text.strip()
-            
-            # 2. Ищем в мета-тегах
-            if not product_name:
-                meta_title = soup.find('meta', {'property': 'og:title'})
-                if meta_title:
-                    product_name = meta_title.get('content', '').strip()
-                    # Удаляем лишние части из заголовка
-                    product_name = product_name.replace(' - Penguin Magic Shop', '').strip()
-            
-            # 3. Ищем в заголовке страницы
-            if not product_name:
-                title_element = soup.find('title')
-                if title_element:
-                    product_name = title_element.text.strip()
-                    # Удаляем лишние части из заголовка
-                    product_name = product_name.replace(' - Penguin Magic Shop', '').strip()
-            
-            if not product_name:
-                product_name = "Название не найдено"
-            
-            # Извлекаем автора из названия
-            author = None
-            author_match = re.search(r'by\s+([^(]+?)(?:\s*\(|$)', product_name)
-            if author_match:
-                author = author_match.group(1).strip()
-            
-            # Цена без скидки (List price) и цена со скидкой (Price)
-            price = None  # Цена без скидки (List price)
-            discounted_price = None  # Цена со скидкой (Price)
-            
-            # 1. Ищем в таблице product_price_details (приоритетный источник)
-            price_table = soup.find('table', class_='product_price_details')
-            if price_table:
-                # Ищем все строки таблицы
-                rows = price_table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 2:
-                        label = cells[0].get_text(strip=True).lower()
-                        value_cell = cells[1]
-                        
-                        # List price (цена без скидки) - обычно в <strike> теге
-                        if 'list price' in label:
-                            strike_tag = value_cell.find('strike')
-                            if strike_tag:
-                                try:
-                                    price_text = strike_tag.get_text(strip=True)
-                                    price = float(re.sub(r'[^\d.]', '', price_text))
-                                except (ValueError, TypeError):
-                                    pass
-                            # Если нет strike, берем из самой ячейки
-                            elif not price:
-                                try:
-                                    price_text = value_cell.get_text(strip=True)
-                                    price = float(re.sub(r'[^\d.]', '', price_text))
-                                except (ValueError, TypeError):
-                                    pass
-                        
-                        # Price (цена со скидкой) - в ячейке с классом ourprice
-                        elif 'price:' in label and value_cell.get('class') and 'ourprice' in value_cell.get('class'):
-                            try:
-                                price_text = value_cell.get_text(strip=True)
-                                discounted_price = float(re.sub(r'[^\d.]', '', price_text))
-                            except (ValueError, TypeError):
-                                pass
-            
-            # 2. Если не нашли в таблице, ищем в JSON-данных
-            if not price or not discounted_price:
-                script_tags = soup.find_all('script', {'type': 'application/ld+json'})
-                for script in script_tags:
-                    try:
-                        json_data = json.loads(script.string)
-                        if isinstance(json_data, dict):
-                            if 'offers' in json_data:
-                                offers = json_data['offers']
-                                if isinstance(offers, dict):
-                                    # Цена со скидкой обычно в 'price'
-                                    if 'price' in offers and not discounted_price:
-                                        try:
-                                            discounted_price = float(offers['price'])
-                                        except (ValueError, TypeError):
-                                            pass
-                                    # Цена без скидки может быть в 'priceSpecification'
-                                    if 'priceSpecification' in offers:
-                                        price_spec = offers['priceSpecification']
-                                        if isinstance(price_spec, dict) and 'price' in price_spec and not price:
-                                            try:
-                                                price = float(price_spec['price'])
-                                            except (ValueError, TypeError):
-                                                pass
-                                break
-                    except (json.JSONDecodeError, ValueError, TypeError, AttributeError):
-                        continue
-            
-            # 3. Если не нашли цену без скидки, используем цену со скидкой как основную
-            if not price and discounted_price:
-                price = discounted_price
-                discounted_price = None  # Если нет скидки, не сохраняем discounted_price
-            
-            # 4. Fallback: ищем цену в мета-тегах
-            if not price:
-                meta_price = soup.find('meta', {'property': 'product:price:amount'})
-                if meta_price:
-                    try:
-                        price = float(meta_price.get('content'))
-                    except (ValueError, TypeError):
-                        pass
-            
-            # 5. Fallback: ищем в элементах с ценой
-            if not price:
-                price_selectors = [
-                    ('span', {'class': 'price'}),
-                    ('div', {'class': 'product-price'}),
-                    ('span', {'class': 'regular-price'}),
-                    ('div', {'class': 'price-box'}),
-                    ('span', {'itemprop': 'price'})
-                ]
-                
-                for tag, attrs in price_selectors:
-                    price_element = soup.find(tag, attrs)
-                    if price_element:
-                        try:
-                            price_text = price_element.text.strip()
-                            # Удаляем все нечисловые символы, кроме точки
-                            price_text = ''.join(filter(lambda x: x.isdigit() or x == '.', price_text))
-                            if price_text:
-                                price = float(price_text)
-                                break
-                        except (ValueError, TypeError):
-                            continue
-            
-            # 6. Fallback: ищем цену в тексте страницы с помощью регулярных выражений
-            if not price:
-                price_patterns = [
-                    r'\$(\d+\.?\d*)',
-                    r'Price:\s*\$(\d+\.?\d*)',
-                    r'price:\s*\$(\d+\.?\d*)'
-                ]
-                
-                for pattern in price_patterns:
-                    price_matches = re.findall(pattern, str(soup))
-                    if price_matches:
-                        try:
-                            # Берем максимальную цену из найденных (обычно это реальная цена)
-                            price = max(float(p) for p in price_matches)
-                            break
-                        except (ValueError, TypeError):
-                            continue
-            
-            # Если цена все еще не найдена, логируем это
-            if not price:
-                logger.warning(f"Не удалось найти цену для продукта {url}")
-                price = 0.0
-            
-            # URL изображения
-            image_url = None
-            meta_image = soup.find('meta', {'property': 'og:image'})
-            if meta_image:
-                image_url = meta_image.get('content')
-            
-            # Описание - ищем полное описание в div#product_description
-            description = None
-            description_div = soup.find('div', id='product_description')
-            if description_div:
-                # Ищем первый параграф в product_subsection
-                product_subsection = description_div.find('div', class_='product_subsection')
-                if product_subsection:
-                    description_p = product_subsection.find('p')
-                    if description_p:
-                        # Получаем весь текст, заменяем <br> на пробелы
-                        description = description_p.get_text(separator=' ', strip=True)
-                        # Очищаем от лишних пробелов
-                        description = ' '.join(description.split())
-            
-            # Если не нашли полное описание, используем meta как fallback
-            if not description:
-                description_meta = soup.find('meta', {'property': 'og:description'})
-                if description_meta:
-                    description = description_meta.get('content').strip()
-            
-            # Теги - ищем ссылки на /tricks/tagged/ рядом с продуктом
-            # Теги продукта находятся в div с float:left после product_addtocart
-            # Каждый тег в отдельном div с стилем: border:1px solid #999; background:#aaa
-            # НЕ в навигационном меню (browse_menu)
-            tags = []
-            
-            # Ищем область с тегами продукта - div с float:left после product_addtocart
-            # Теги находятся в div с float:left, который содержит div'ы с серыми блоками
-            product_addtocart = soup.find('div', class_='product_addtocart')
-            if product_addtocart:
-                # Ищем следующий div с float:left после product_addtocart
-                # Это контейнер с тегами продукта
-                tags_container = None
-                # Ищем все div с float:left после product_addtocart
-                for sibling in product_addtocart.find_all_next('div'):
-                    style = sibling.get('style', '')
-                    if 'float:left' in style:
-                        # Проверяем, что это не навигация
-                        if sibling.find_parent('div', id='browse_menu'):
-                            continue
-                        # Проверяем, что внутри есть div'ы с серыми блоками (теги)
-                        gray_blocks = sibling.find_all('div', style=lambda s: s and 'background:#aaa' in s and 'border:1px solid #999' in s)
-                        if gray_blocks:
-                            tags_container = sibling
-                            break
-                
-                if tags_container:
-                    # Извлекаем все ссылки на /tricks/tagged/ из этого контейнера
-                    tag_links = tags_container.find_all('a', href=lambda x: x and '/tricks/tagged/' in x)
-                    for link in tag_links:
-                        tag_text = link.get_text(strip=True)
-                        if tag_text:
-                            tags.append(tag_text)
-            
-            # Удаляем дубликаты, сохраняя порядок
-            tags = list(dict.fromkeys(tags))
-            
-            # Отзывы и оценки
-            reviews = self.extract_reviews(soup)
-            
-            product_info = {
-                'name': product_name,
-                'author': author,
-                'price': price,  # Цена без скидки (List price)
-                'discounted_price': discounted_price,  # Цена со скидкой (если есть)
-                'url': url,
-                'image_url': image_url,
-                'description': description,
-                'tags': tags,
-                'reviews': reviews,  # Отзывы и оценки
-                'created_at': datetime.now(),
-                'updated_at': datetime.now()
-            }
-            
-            logger.info(f"Извлечена информация о продукте: {product_name} (${price})")
-            return product_info
-            
-        except Exception as e:
-            logger.error(f"Ошибка при извлечении информации о продукте {url}: {str(e)}")
-            return None
+        return extract_product_info(soup, url, html, self.max_reviews)
 
     def extract_reviews(self, soup) -> List[Dict]:
         """Извлекает отзывы и оценки из HTML"""
-        reviews = []
-        
-        try:
-            # Ищем контейнер с отзывами
-            reviews_container = soup.find('div', id='sorted-reviews')
-            if not reviews_container:
-                logger.debug("Контейнер sorted-reviews не найден")
-                return reviews
-            
-            logger.debug(f"Найден контейнер sorted-reviews, ищем отзывы...")
-            
-            # Ищем все отзывы - каждый отзыв это div.product_review, который НЕ является review_header
-            # Структура: <div class="product_review"> содержит <div class="product_review review_header"> и <div class="review_body">
-            review_divs = reviews_container.find_all('div', class_='product_review')
-            logger.debug(f"Найдено {len(review_divs)} div с классом product_review")
-            
-            # Фильтруем только родительские отзывы (не review_header)
-            parent_reviews = []
-            for div in review_divs:
-                # Если это review_header, пропускаем (это дочерний элемент)
-                if 'review_header' in div.get('class', []):
-                    continue
-                # Проверяем, что внутри есть review_header или review_body
-                if div.find('div', class_='review_header') or div.find('div', class_='review_body'):
-                    parent_reviews.append(div)
-            
-            logger.debug(f"Найдено {len(parent_reviews)} родительских отзывов")
-            
-            for review_div in parent_reviews:
-                review_data = {}
-                
-                # Извлекаем оценку (rating) из изображения звезд в review_header
-                rating = None
-                review_header = review_div.find('div', class_='review_header')
-                if review_header:
-                    star_img = review_header.find('img', src=lambda x: x and 'stars.gif' in x)
-                    if star_img:
-                        src = star_img.get('src', '')
-                        # Извлекаем число из названия файла (например, "5stars.gif" -> 5)
-                        rating_match = re.search(r'(\d+)stars\.gif', src)
-                        if rating_match:
-                            rating = int(rating_match.group(1))
-                    
-                    # Извлекаем заголовок отзыва
-                    subject = None
-                    subject_span = review_header.find('span', class_='review_subject')
-                    if subject_span:
-                        subject = subject_span.get_text(strip=True)
-                    
-                    # Извлекаем дату
-                    date = None
-                    review_from = review_header.find('div', class_='review_from')
-                    if review_from:
-                        # Ищем текст после "on"
-                        text = review_from.get_text()
-                        date_match = re.search(r'on\s+([A-Za-z]+\s+\d+[a-z]{0,2},\s+\d{4})', text)
-                        if date_match:
-                            date = date_match.group(1)
-                        
-                        # Проверяем, является ли покупатель верифицированным
-                        verified_spans = review_from.find_all('span', class_='review_verified')
-                        verified_buyer = any('Verified buyer' in span.get_text() for span in verified_spans)
-                    else:
-                        verified_buyer = False
-                else:
-                    subject = None
-                    date = None
-                    verified_buyer = False
-                
-                # Извлекаем текст отзыва
-                review_text = None
-                review_body = review_div.find('div', class_='review_body')
-                if review_body:
-                    # Получаем весь текст, заменяем <br> на пробелы
-                    review_text = review_body.get_text(separator=' ', strip=True)
-                    # Очищаем от лишних пробелов
-                    review_text = ' '.join(review_text.split())
-                
-                # Извлекаем количество полезных голосов
-                helpful_count = None
-                helpful_total = None
-                # Ищем текст вида "X of Y magicians found this helpful"
-                helpful_text = review_div.get_text()
-                helpful_match = re.search(r'(\d+)\s+of\s+(\d+)\s+magicians\s+found\s+this\s+helpful', helpful_text)
-                if helpful_match:
-                    helpful_count = int(helpful_match.group(1))
-                    helpful_total = int(helpful_match.group(2))
-                
-                # Собираем данные отзыва
-                if rating or review_text:  # Добавляем отзыв, если есть хотя бы оценка или текст
-                    review_data = {
-                        'rating': rating,
-                        'subject': subject,
-                        'text': review_text,
-                        'date': date,
-                        'verified_buyer': verified_buyer,
-                        'helpful_count': helpful_count,
-                        'helpful_total': helpful_total
-                    }
-                    reviews.append(review_data)
-            
-            logger.debug(f"Извлечено {len(reviews)} отзывов")
-            
-            # Также извлекаем общую оценку из review_summary
-            overall_rating = None
-            review_count = None
-            review_summary = soup.find('div', id='review_summary')
-            if review_summary:
-                summary_link = review_summary.find('a', href='#reviews')
-                if summary_link:
-                    summary_text = summary_link.get_text(strip=True)
-                    # Ищем паттерн "4.8 stars / 6 reviews"
-                    rating_match = re.search(r'([\d.]+)\s+stars?\s*/\s*(\d+)\s+reviews?', summary_text)
-                    if rating_match:
-                        overall_rating = float(rating_match.group(1))
-                        review_count = int(rating_match.group(2))
-            
-            # Добавляем общую информацию в начало списка отзывов (если есть)
-            if overall_rating is not None:
-                reviews.insert(0, {
-                    'type': 'summary',
-                    'overall_rating': overall_rating,
-                    'total_reviews': review_count
-                })
-            
-        except Exception as e:
-            logger.error(f"Ошибка при извлечении отзывов: {str(e)}")
-        
-        return reviews
+        return extract_reviews(soup, self.max_reviews)
 
     def get_product_details(self, product_url: str) -> Optional[Dict]:
         """Получение детальной информации о продукте"""
@@ -466,7 +169,7 @@ class PenguinMagicScraper:
             if not response:
                 return None
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = build_soup(response.text, self.parser_backend, self.restricted_parse)
             
             # Используем основной метод извлечения информации
             product_container = soup.find('div', class_='product-main')
@@ -474,7 +177,7 @@ class PenguinMagicScraper:
                 logger.warning(f"Не найден контейнер продукта на странице {product_url}")
                 return None
                 
-            return self.extract_product_info(soup, product_url)
+            return self.extract_product_info(soup, product_url, response.text)
 
         except Exception as e:
             logger.error(f"Ошибка при получении деталей продукта {product_url}: {e}")
@@ -484,28 +187,107 @@ class PenguinMagicScraper:
         """Скрапинг одной страницы"""
         url = self.get_product_url(page_number)
         logger.info(f"Обработка страницы {page_number}")
+        self.checkpoint.start(page_number)
         
-        response = self.make_request(url)
+        response, error_kind = self.fetch_url(url)
         if not response:
-            logger.info(f"Страница {page_number} пропущена (недоступна)")
+            self.skip_page(page_number, error_kind)
             return None
             
-        soup = BeautifulSoup(response.text, 'html.parser')
+        self.archive_page(page_number, url, response.status_code, response.headers,
+                          response.content, response.encoding or response.apparent_encoding)
+        return self.parse_page(page_number, url, response.text)
+
+    def archive_page(self, page_number: int, url: str, status: int, headers, content: bytes, encoding: Optional[str]):
+        """Сохранение исходного HTML страницы в архив"""
+        if self.archive is None:
+            return
+        try:
+            self.archive.append(page_number, url, status, headers, content, encoding)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении страницы {page_number} в архив: {e}")
+
+    def skip_page(self, page_number: int, error_kind: Optional[str]):
+        """Учет страницы, которую не удалось загрузить"""
+        logger.info(f"Страница {page_number} пропущена (недоступна)")
+        if error_kind in DEAD_PAGE_ERRORS:
+            if self.dead_ids is not None:
+                self.dead_ids.mark(page_number)
+        else:
+            self.checkpoint.fail(page_number)
+
+    @property
+    def parse_options(self) -> Dict:
+        """Параметры разбора страниц (аргументы parse_html)"""
+        return {
+            'backend': self.parser_backend,
+            'restricted': self.restricted_parse,
+            'max_reviews': self.max_reviews,
+            'use_fast_path': self.use_fast_path
+        }
+
+    def parse_page(self, page_number: int, url: str, html: str) -> Optional[Dict]:
+        """Разбор загруженной страницы продукта"""
+        return self.record_parsed(page_number, parse_html(page_number, url, html, **self.parse_options))
+
+    def record_parsed(self, page_number: int, parsed: ParsedPage) -> Optional[Dict]:
+        """Учет результата разбора: статистика быстрого пути и отсутствующие ID"""
+        if self.use_fast_path:
+            with self._stats_lock:
+                self.fast_path_stats['pages'] += 1
+                if parsed.fast_path_hit:
+                    self.fast_path_stats['hits'] += 1
+        if self.dead_ids is not None:
+            # Страницы без <head> - заглушки отсутствующих продуктов
+            if parsed.live:
+                self.dead_ids.discard(page_number)
+            else:
+                self.dead_ids.mark(page_number)
+        return parsed.product_info
+
+    @property
+    def fast_path_hit_rate(self) -> Optional[float]:
+        """Доля страниц, разобранных без построения дерева"""
+        pages = self.fast_path_stats['pages']
+        return self.fast_path_stats['hits'] / pages if pages else None
+
+    def is_dead_page(self, page_number: int) -> bool:
+        """Проверка, что страница заведомо отсутствует и ее не нужно запрашивать"""
+        return self.dead_ids is not None and self.dead_ids.is_dead(page_number)
+
+    def probe_page(self, page_number: int) -> bool:
+        """Проверка существования страницы продукта (для поиска границы ID)"""
+        if self.is_dead_page(page_number):
+            return False
         
-        # Проверяем наличие основного контейнера продукта
-        head = soup.find('head')
-        if not head:
-            logger.info(f"На странице {page_number} не найден head")
-            return None
-            
-        # Извлекаем информацию о продукте
-        product_info = self.extract_product_info(soup, url)
-        if product_info:
-            logger.info(f"Получена информация о продукте со страницы {page_number}")
-            return product_info
+        url = self.get_product_url(page_number)
+        response, error_kind = self.fetch_url(url)
+        if not response:
+            self.skip_page(page_number, error_kind)
+            return False
+        
+        self.archive_page(page_number, url, response.status_code, response.headers,
+                          response.content, response.encoding or response.apparent_encoding)
+        live = has_head(response.text)
+        if not live and self.dead_ids is not None:
+            self.dead_ids.mark(page_number)
+        return live
+
+    def discover_end_page(self) -> int:
+        """Поиск последней живой страницы вместо фиксированного end_page"""
+        prober = FrontierProber(
+            self.probe_page,
+            window=self.config['frontier_window'],
+            samples=self.config['frontier_samples']
+        )
+        highest = prober.find_highest_live_id(self.config['start_page'])
+        if highest is None:
+            logger.warning(f"Не удалось определить последнюю живую страницу, используется end_page={self.config['end_page']}")
+            return self.config['end_page']
         
-        logger.info(f"Не удалось извлечь информацию о продукте со страницы {page_number}")
-        return None
+        end_page = highest + self.config['frontier_margin']
+        logger.info(f"Последняя живая страница: {highest}, сканируем до {end_page}")
+        return end_page
 
     def get_product_url(self, page_number):
         """Формирует URL для страницы продукта"""
@@ -584,77 +366,235 @@ class PenguinMagicScraper:
             logger.error(f"Ошибка при сохранении в Excel: {e}")
             raise
 
-    def save_to_database(self, products):
-        """Сохраняет продукты в базу данных"""
+    def save_to_database(self, products) -> Optional[int]:
+        """
+        Сохраняет продукты в базу данных.
+
+        Returns:
+            int: Количество сохраненных продуктов или None, если пакет не записан
+        """
+        if not products or self.db_manager is None:
+            return 0
         try:
-            # Сохраняем только последний батч
-            if not products:
-                return
-            
-            # Подключаемся к базе данных
-            self.db_manager.connect()
-            
-            # Сохраняем каждый продукт
-            for product in products:
-                try:
-                    self.db_manager.save_product(product)
-                    self.logger.info(f"Продукт '{product['name']}' успешно сохранен в базу данных")
-                except Exception as e:
-                    self.logger.error(f"Ошибка при сохранении продукта {product['name']}: {e}")
-            
-            # Закрываем соединение
-            if self.db_manager.conn:
-                self.db_manager.conn.close()
-                self.db_manager.cur = None
-                self.db_manager.conn = None
-            
+            # Соединение берется из пула менеджера и возвращается в него после записи
+            saved = self.db_manager.save_products(products)
+            self.logger.info(f"В базу данных сохранено продуктов: {saved} из {len(products)}")
+            return saved
         except Exception as e:
             self.logger.error(f"Ошибка при сохранении в базу данных: {e}")
-            if self.db_manager.conn:
-                self.db_manager.conn.close()
-                self.db_manager.cur = None
-                self.db_manager.conn = None
+            return None
+
+    def record_saved(self, products: List[Dict], saved: int):
+        """Пакет записан в базу данных (вызывается в потоке записи)"""
+        with self._persist_lock:
+            self.persisted_count += len(products)
+            self.db_stats['written'] += saved
+            self.db_stats['skipped'] += len(products) - saved
+
+    def commit_saved(self):
+        """Завершение в чекпоинте страниц, продукты которых сохранены в Excel и базу данных"""
+        # Вызывается сразу после save_to_excel: в Excel сохранены все собранные продукты
+        saved = len(self.products)
+        if self.db_writer is not None:
+            with self._persist_lock:
+                saved = self.persisted_count
+        pages = [page for page in self.product_pages[self.committed_count:saved] if page is not None]
+        self.committed_count = saved
+        self.checkpoint.commit(pages)
+
+    def add_product(self, product_info: Dict, page_number: Optional[int] = None):
+        """Добавление продукта и сохранение промежуточных результатов"""
+        self.products.append(product_info)
+        self.product_pages.append(page_number)
+        if self.db_writer is not None:
+            # Ожидание только при заполненной очереди записи
+            self.db_writer.put(product_info)
+        
+        # Сохраняем промежуточные результаты
+        if len(self.products) % self.config['save_interval'] == 0:
+            self.save_to_excel(self.config['excel_output'])
+            if self.dead_ids is not None:
+                self.dead_ids.save()
+            # Страницы с еще не записанными в базу продуктами остаются незавершенными
+            self.commit_saved()
+
+    def finish_page(self, page_number: int, product_info: Optional[Dict]):
+        """Учет обработанной страницы в чекпоинте и сохранение продукта"""
+        # Страница с продуктом ждет в чекпоинте, пока продукт не будет сохранен (commit_saved)
+        self.checkpoint.finish(page_number, has_product=bool(product_info))
+        if product_info:
+            self.add_product(product_info, page_number)
+
+    def save_results(self):
+        """Сохранение финальных результатов"""
+        if self.products:
+            self.save_to_excel(self.config['excel_output'])
+        if self.db_writer is not None:
+            # Дожидаемся записи продуктов из очереди
+            self.db_writer.close()
+        self.commit_saved()
+        if self.db_manager is not None:
+            logger.info(f"Записано в базу данных: {self.db_stats['written']} из {len(self.products)} продуктов")
+            if self.db_stats['written'] != len(self.products):
+                logger.warning(f"Не записано в базу данных: {len(self.products) - self.db_stats['written']} продуктов "
+                               f"(пропущено из-за ошибок: {self.db_stats['skipped']})")
+
+    def run_sequential(self, pages, pbar):
+        """Последовательная загрузка страниц"""
+        for page in pages:
+            # Скрапим страницу (частоту запросов ограничивает rate_limiter)
+            product_info = self.scrape_page(page)
+            self.finish_page(page, product_info)
+            
+            # Обновляем прогресс-бар
+            pbar.update(1)
+
+    def run_threaded(self, pages, pbar):
+        """Загрузка страниц в пуле потоков"""
+        # Результаты собираются в основном потоке, поэтому сохранение
+        # в Excel и базу данных выполняется так же, как в последовательном режиме
+        with ThreadPoolExecutor(max_workers=self.config['workers']) as executor:
+            futures = {executor.submit(self.scrape_page, page): page for page in pages}
+            for future in as_completed(futures):
+                page = futures[future]
+                try:
+                    product_info = future.result()
+                except Exception as e:
+                    logger.error(f"Ошибка при обработке страницы {page}: {e}")
+                    product_info = None
+                    self.checkpoint.fail(page)
+                self.finish_page(page, product_info)
+                pbar.update(1)
+
+    def fetch_page(self, page_number: int) -> Tuple[Optional[FetchedPage], Optional[str]]:
+        """Загрузка и архивирование страницы без разбора (для конвейера)"""
+        url = self.get_product_url(page_number)
+        self.checkpoint.start(page_number)
+        response, error_kind = self.fetch_url(url)
+        if not response:
+            return None, error_kind
+        fetched = FetchedPage(url, response.status_code, dict(response.headers), response.content,
+                              response.encoding or response.apparent_encoding)
+        self.archive_page(page_number, url, fetched.status, fetched.headers, fetched.content, fetched.encoding)
+        return fetched, None
+
+    def run_pipeline(self, pages, pbar):
+        """Загрузка в пуле потоков и разбор в пуле процессов"""
+        pipeline = FetchParsePipeline(
+            self.fetch_page,
+            parse_options=self.parse_options,
+            fetch_workers=self.config['workers'],
+            parse_workers=self.config.get('parse_workers'),
+            queue_size=self.config.get('pipeline_queue_size', 32)
+        )
+
+        # Результаты передаются в основной поток, как в режиме 'threads'
+        def on_page(page, parsed, error_kind):
+            product_info = None
+            if parsed is None:
+                self.skip_page(page, error_kind)
+            else:
+                product_info = self.record_parsed(page, parsed)
+            self.finish_page(page, product_info)
+            pbar.update(1)
+
+        pipeline.run(pages, on_page)
+
+    def run_async(self, pages, pbar):
+        """Асинхронная загрузка страниц с ограничением конкурентности"""
+        fetcher = AsyncFetcher(
+            headers=self.config['headers'],
+            concurrency=self.config['concurrency'],
+            per_host_concurrency=self.config['per_host_concurrency'],
+            timeout=self.config['timeout'],
+            rate_limiter=self.rate_limiter,
+            retry_policy=self.retry_policy,
+            queue_size=self.config['async_queue_size']
+        )
+        
+        def iter_pages():
+            for page in pages:
+                self.checkpoint.start(page)
+                yield page, self.get_product_url(page)
+        
+        def on_page(page, url, fetched, error_kind):
+            product_info = None
+            if fetched is None:
+                self.skip_page(page, error_kind)
+            else:
+                self.archive_page(page, url, fetched.status, fetched.headers, fetched.content, fetched.encoding)
+                product_info = self.parse_page(page, url, fetched.text)
+            self.finish_page(page, product_info)
+            pbar.update(1)
+        
+        fetcher.run(iter_pages(), on_page)
 
     def run(self):
         """Запуск скрапера"""
+        finished = False
         try:
-            logger.info("Начало работы скрапера")
+            fetch_mode = self.config.get('fetch_mode', 'sequential')
+            logger.info(f"Начало работы скрапера (режим загрузки: {fetch_mode})")
+            if self.db_manager is not None:
+                # Без уникального индекса по url ни один пакет не будет записан
+                self.db_manager.check_schema()
+            
+            # Определяем конец диапазона
+            start_page = self.config['start_page']
+            if self.config.get('discover_end_page'):
+                end_page = self.discover_end_page()
+            else:
+                end_page = self.config['end_page']
+            
+            # Пропускаем заведомо отсутствующие и уже обработанные страницы
+            all_pages = range(start_page, end_page + 1)
+            pages = [page for page in all_pages if not self.checkpoint.is_completed(page)]
+            if len(pages) < len(all_pages):
+                logger.info(f"Продолжение с чекпоинта: пропущено {len(all_pages) - len(pages)} обработанных страниц")
+            alive_pages = [page for page in pages if not self.is_dead_page(page)]
+            if len(alive_pages) < len(pages):
+                logger.info(f"Пропущено {len(pages) - len(alive_pages)} заведомо отсутствующих страниц")
+            pages = alive_pages
             
             # Создаем прогресс-бар
-            total_pages = self.config['end_page'] - self.config['start_page'] + 1
+            total_pages = len(pages)
             with tqdm(total=total_pages, desc="Обработка страниц") as pbar:
-                # Проходим по всем страницам
-                for page in range(self.config['start_page'], self.config['end_page'] + 1):
-                    # Добавляем случайную задержку
-                    self.random_delay()
-                    
-                    # Скрапим страницу
-                    product_info = self.scrape_page(page)
-                    if product_info:
-                        self.products.append(product_info)
-                        
-                        # Сохраняем промежуточные результаты
-                        if len(self.products) % self.config['save_interval'] == 0:
-                            self.save_to_excel(self.config['excel_output'])
-                            self.save_to_database(self.products[-self.config['batch_size']:])
-                    
-                    # Обновляем прогресс-бар
-                    pbar.update(1)
-                    
-                    # Проверяем необходимость паузы между батчами
-                    self.current_batch += 1
-                    self.batch_delay()
+                if fetch_mode == 'async':
+                    self.run_async(pages, pbar)
+                elif fetch_mode == 'threads':
+                    self.run_threaded(pages, pbar)
+                elif fetch_mode == 'pipeline':
+                    self.run_pipeline(pages, pbar)
+                elif fetch_mode == 'sequential':
+                    self.run_sequential(pages, pbar)
+                else:
+                    raise ValueError(f"Неизвестный режим загрузки: {fetch_mode}")
             
             # Сохраняем финальные результаты
-            if self.products:
-                self.save_to_excel(self.config['excel_output'])
-                self.save_to_database(self.products[-self.config['batch_size']:])
+            self.save_results()
                 
             logger.info(f"Скрапинг завершен. Обработано страниц: {total_pages}, собрано продуктов: {len(self.products)}")
+            if self.fast_path_hit_rate is not None:
+                logger.info(f"Быстрый разбор (JSON-LD): {self.fast_path_stats['hits']} из "
+                            f"{self.fast_path_stats['pages']} страниц ({self.fast_path_hit_rate:.1%})")
+
+            # Чекпоинт нужен только прерванному обходу: следующий запуск обходит диапазон заново
+            self.checkpoint.clear()
+            finished = True
             
         except Exception as e:
             logger.error(f"Критическая ошибка при работе скрапера: {e}")
             raise
+        finally:
+            # При падении продукты из очереди все равно записываются в базу данных
+            if self.db_writer is not None:
+                self.db_writer.close()
+            if self.archive:
+                self.archive.close()
+            if self.dead_ids is not None:
+                self.dead_ids.save()
+            if not finished:
+                self.checkpoint.save()
 
 def main():
     try:
@@ -1,11 +1,21 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+MIGRATION_PATH = Path(__file__).parent / 'database' / 'migrate_unique_url.sql'
+
 def remove_duplicates():
+    """
+    Удаляет дубликаты по URL и создает уникальный индекс.
+
+    Дубликаты удаляются на месте (DELETE), без пересоздания таблицы.
+    После миграции новые дубликаты не появляются: сохранение идет через
+    INSERT ... ON CONFLICT (url), и повторный запуск скрипта не нужен.
+    """
     load_dotenv()
-    
+    conn = None
+
     try:
         # Подключение к базе данных
         conn = psycopg2.connect(
@@ -15,41 +25,27 @@ def remove_duplicates():
             host=os.getenv('DB_HOST'),
             port=os.getenv('DB_PORT')
         )
-        
+        # Транзакцией управляет сам скрипт миграции (BEGIN/COMMIT)
+        conn.autocommit = True
+
         with conn.cursor() as cur:
-            # Создаем временную таблицу с уникальными записями
-            cur.execute("""
-                CREATE TEMP TABLE temp_products AS
-                SELECT DISTINCT ON (url) *
-                FROM products
-                ORDER BY url, created_at DESC;
-            """)
-            
-            # Удаляем все записи из основной таблицы
-            cur.execute("TRUNCATE TABLE products RESTART IDENTITY;")
-            
-            # Вставляем уникальные записи обратно
-            cur.execute("""
-                INSERT INTO products
-                SELECT * FROM temp_products;
-            """)
-            
-            # Удаляем временную таблицу
-            cur.execute("DROP TABLE temp_products;")
-            
+            cur.execute("SELECT COUNT(*) FROM products;")
+            before = cur.fetchone()[0]
+
+            cur.execute(MIGRATION_PATH.read_text(encoding='utf-8'))
+
             # Подсчитываем оставшиеся записи
             cur.execute("SELECT COUNT(*) FROM products;")
             count = cur.fetchone()[0]
-            
-            conn.commit()
-            print(f"\nУдаление дубликатов завершено. Осталось {count} уникальных записей.")
-            
+
+            print(f"\nУдаление дубликатов завершено. Удалено {before - count}, "
+                  f"осталось {count} уникальных записей.")
+
     except Exception as e:
         print(f"Ошибка при удалении дубликатов: {e}")
-        conn.rollback()
     finally:
         if conn:
             conn.close()
 
 if __name__ == "__main__":
-    remove_duplicates() 
\ No newline at end of file
+    remove_duplicates()
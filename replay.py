@@ -0,0 +1,164 @@
+"""
+Повторное извлечение данных из архива HTML-страниц без обращения к сайту.
+
+Страницы из архива (см. scraping/html_archive.py) разбираются в пуле процессов
+без сетевых запросов и задержек и сохраняются в те же Excel-файл и базу данных,
+что и при обычном запуске скрапера. Используется для применения исправлений
+парсера ко всему каталогу.
+
+Запуск:
+    python replay.py [--workers N] [--start ID] [--end ID] [--archive-dir DIR]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from tqdm import tqdm
+
+from config import SCRAPER_CONFIG
+from scraping import HtmlArchive
+from scraping.extraction import DEFAULT_PARSER_BACKEND
+from scraping.pipeline import parse_html
+
+logger = logging.getLogger(__name__)
+
+def parse_archived_page(record: Dict,
+                        backend: str = DEFAULT_PARSER_BACKEND,
+                        restricted: bool = False,
+                        max_reviews: Optional[int] = None,
+                        use_fast_path: bool = False) -> Tuple[int, Optional[Dict]]:
+    """Разбор одной страницы из архива (выполняется в процессе-воркере)"""
+    html = record['body'].decode(record.get('encoding') or 'utf-8', errors='replace')
+    parsed = parse_html(record['page_id'], record['url'], html, backend, restricted, max_reviews, use_fast_path)
+    return record['page_id'], parsed.product_info
+
+def is_replayed(entry: Dict, start_page: Optional[int] = None, end_page: Optional[int] = None) -> bool:
+    """Страница успешно загружена и входит в диапазон (по записи или по строке индекса архива)"""
+    page_id = entry['page_id']
+    if entry['status'] != 200:
+        return False
+    if start_page is not None and page_id < start_page:
+        return False
+    if end_page is not None and page_id > end_page:
+        return False
+    return True
+
+def iter_archived_pages(archive: HtmlArchive,
+                        start_page: Optional[int] = None,
+                        end_page: Optional[int] = None) -> Iterator[Dict]:
+    """Успешно загруженные страницы архива из заданного диапазона"""
+    for record in archive.iter_records():
+        if is_replayed(record, start_page, end_page):
+            yield record
+
+def count_archived_pages(archive: HtmlArchive,
+                         start_page: Optional[int] = None,
+                         end_page: Optional[int] = None) -> int:
+    """Количество страниц для повторного разбора (по индексу, без чтения тел)"""
+    return sum(1 for entry in archive.index.values() if is_replayed(entry, start_page, end_page))
+
+def parse_in_pool(records: Iterable[Dict], workers: int,
+                  backend: str = DEFAULT_PARSER_BACKEND,
+                  restricted: bool = False,
+                  max_reviews: Optional[int] = None,
+                  use_fast_path: bool = False) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """
+    Разбор страниц в пуле процессов.
+
+    В пул одновременно отправляется не больше workers * 4 страниц, поэтому
+    архив читается потоково и не загружается в память целиком.
+    """
+    # spawn, как в FetchParsePipeline: fork при работающих потоках tqdm и логирования небезопасен
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = deque()
+        for record in records:
+            pending.append(executor.submit(parse_archived_page, record, backend, restricted,
+                                           max_reviews, use_fast_path))
+            if len(pending) >= workers * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def replay(scraper,
+           archive: HtmlArchive,
+           workers: Optional[int] = None,
+           start_page: Optional[int] = None,
+           end_page: Optional[int] = None) -> Dict:
+    """
+    Повторный разбор архива с сохранением в Excel и базу данных.
+
+    Args:
+        scraper (PenguinMagicScraper): Скрапер, чьи хранилища используются для сохранения
+        archive (HtmlArchive): Архив страниц
+        workers (int, optional): Количество процессов (по умолчанию - число ядер)
+        start_page (int, optional): Первая страница диапазона
+        end_page (int, optional): Последняя страница диапазона
+
+    Returns:
+        dict: Статистика: страниц, продуктов, секунд, страниц в секунду
+    """
+    workers = workers or os.cpu_count()
+    total = count_archived_pages(archive, start_page, end_page)
+    logger.info(f"Повторный разбор архива {archive.directory}: {total} из {len(archive)} страниц, "
+                f"процессов: {workers}")
+
+    started = time.monotonic()
+    pages = 0
+    try:
+        with tqdm(total=total, desc="Повторный разбор архива") as pbar:
+            records = iter_archived_pages(archive, start_page, end_page)
+            parsed = parse_in_pool(records, workers, scraper.parser_backend,
+                                   scraper.restricted_parse, scraper.max_reviews, scraper.use_fast_path)
+            for page_id, product_info in parsed:
+                pages += 1
+                if product_info:
+                    scraper.add_product(product_info)
+                pbar.update(1)
+
+        scraper.save_results()
+    finally:
+        # При ошибке продукты из очереди все равно записываются в базу данных
+        if scraper.db_writer is not None:
+            scraper.db_writer.close()
+    elapsed = time.monotonic() - started
+
+    stats = {
+        'pages': pages,
+        'products': len(scraper.products),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2) if elapsed else 0.0
+    }
+    logger.info(f"Повторный разбор завершен: {stats['pages']} страниц, {stats['products']} продуктов "
+                f"за {stats['seconds']} сек ({stats['pages_per_sec']} страниц/сек)")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Повторное извлечение данных из архива HTML-страниц")
+    parser.add_argument('--archive-dir', default=SCRAPER_CONFIG['archive_dir'], help="Каталог архива страниц")
+    parser.add_argument('--workers', type=int, default=None, help="Количество процессов (по умолчанию - число ядер)")
+    parser.add_argument('--start', type=int, default=None, help="Первая страница диапазона")
+    parser.add_argument('--end', type=int, default=None, help="Последняя страница диапазона")
+    args = parser.parse_args()
+
+    # Импорт здесь, чтобы процессы-воркеры не настраивали логирование скрапера
+    from optimized_scraper import PenguinMagicScraper
+
+    try:
+        scraper = PenguinMagicScraper()
+        archive = HtmlArchive(args.archive_dir)
+        stats = replay(scraper, archive, args.workers, args.start, args.end)
+        print(f"Обработано страниц: {stats['pages']}, продуктов: {stats['products']}, "
+              f"скорость: {stats['pages_per_sec']} страниц/сек")
+    except Exception as e:
+        logger.error(f"Критическая ошибка при повторном разборе: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Пакет с компонентами загрузки страниц.
+Содержит движки загрузки, архив страниц и извлечение данных,
+используемые PenguinMagicScraper.
+"""
+
+from .async_fetcher import AsyncFetcher, FetchedPage
+from .checkpoint import CrawlCheckpoint
+from .db_writer import DatabaseWriter
+from .dead_ids import DeadIdFilter
+from .frontier import FrontierProber
+from .html_archive import HtmlArchive
+from .pipeline import FetchParsePipeline, ParsedPage
+from .rate_limiter import AdaptiveRateLimiter
+from .retry_policy import RetryPolicy
+
+__all__ = ['AdaptiveRateLimiter', 'AsyncFetcher', 'CrawlCheckpoint', 'DatabaseWriter', 'DeadIdFilter', 'FetchParsePipeline', 'FetchedPage', 'FrontierProber', 'HtmlArchive', 'ParsedPage', 'RetryPolicy']
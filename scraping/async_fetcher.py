@@ -0,0 +1,170 @@
+import asyncio
+import aiohttp
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+from .rate_limiter import AdaptiveRateLimiter
+from .retry_policy import DELETED, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+class FetchedPage(NamedTuple):
+    """Загруженная страница"""
+    url: str
+    status: int
+    headers: Dict[str, str]
+    content: bytes
+    encoding: Optional[str]
+
+    @property
+    def text(self) -> str:
+        """Тело ответа в виде строки"""
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+class AsyncFetcher:
+    def __init__(self,
+                 headers: Dict[str, str],
+                 concurrency: int = 8,
+                 per_host_concurrency: int = 4,
+                 timeout: float = 30,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 queue_size: int = 100):
+        """
+        Асинхронный загрузчик страниц с ограничением числа одновременных запросов.
+
+        Args:
+            headers (dict): HTTP-заголовки для всех запросов
+            concurrency (int): Глобальный лимит одновременных запросов
+            per_host_concurrency (int): Лимит одновременных запросов к одному хосту
+            timeout (float): Таймаут запроса в секундах
+            rate_limiter (AdaptiveRateLimiter, optional): Общий ограничитель частоты запросов
+            retry_policy (RetryPolicy, optional): Политика повторных попыток
+            queue_size (int): Сколько загруженных страниц может ждать обработки
+        """
+        self.headers = headers
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.queue_size = queue_size
+
+    def run(self,
+            pages: Iterable[Tuple[int, str]],
+            on_page: Callable[[int, str, Optional[FetchedPage], Optional[str]], None]) -> None:
+        """
+        Загружает страницы и передает каждую в on_page.
+
+        Воркеры складывают загруженные страницы в ограниченную очередь,
+        а on_page вызывается из нее в отдельном потоке, по одному вызову
+        за раз. Медленная обработка (разбор, сохранение в Excel, ожидание
+        очереди записи в базу) не останавливает загрузку, пока в очереди
+        есть место (queue_size).
+
+        Args:
+            pages: Пары (номер страницы, URL)
+            on_page: Обработчик (номер страницы, URL, FetchedPage или None, класс ошибки или None)
+        """
+        asyncio.run(self._run(pages, on_page))
+
+    async def _run(self, pages, on_page) -> None:
+        """Запуск воркеров, разбирающих общий итератор страниц"""
+        # Итератор читается лениво: страница берется в работу, когда освобождается воркер
+        pages = iter(pages)
+
+        # Лимит на хост обеспечивает пул соединений aiohttp,
+        # глобальный лимит - количество воркеров
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.per_host_concurrency
+        )
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        fetched_pages = asyncio.Queue(maxsize=self.queue_size)
+        # Один поток обработки сохраняет последовательный вызов on_page
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="on-page") as executor:
+            handler = asyncio.create_task(self._handle(fetched_pages, on_page, executor))
+            async with aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=timeout) as session:
+                workers = asyncio.gather(*(
+                    self._worker(session, pages, fetched_pages)
+                    for _ in range(self.concurrency)
+                ))
+                try:
+                    # Обработчик завершается раньше воркеров только с ошибкой:
+                    # загрузка останавливается, очередь больше никто не разбирает
+                    await asyncio.wait([workers, handler], return_when=asyncio.FIRST_COMPLETED)
+                    if handler.done():
+                        workers.cancel()
+                        await asyncio.gather(workers, return_exceptions=True)
+                        handler.result()
+                    workers.result()
+                    await fetched_pages.put(None)
+                    await handler
+                finally:
+                    workers.cancel()
+                    handler.cancel()
+
+    async def _worker(self, session, pages, fetched_pages: asyncio.Queue) -> None:
+        """Воркер: берет страницы из общего итератора, пока они не закончатся"""
+        # next() выполняется синхронно, поэтому итератор безопасно делить между воркерами
+        for page, url in pages:
+            fetched, error_kind = await self.fetch(session, url)
+            # Ожидание только при заполненной очереди обработки
+            await fetched_pages.put((page, url, fetched, error_kind))
+
+    @staticmethod
+    async def _handle(fetched_pages: asyncio.Queue, on_page, executor: ThreadPoolExecutor) -> None:
+        """Обработчик: передает страницы из очереди в on_page до метки None"""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await fetched_pages.get()
+            if item is None:
+                return
+            await loop.run_in_executor(executor, on_page, *item)
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> Tuple[Optional[FetchedPage], Optional[str]]:
+        """
+        Загрузка одной страницы с повторными попытками по политике retry_policy.
+
+        Returns:
+            tuple: (страница или None, класс ошибки или None)
+        """
+        self.retry_policy.record_request()
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            started = time.monotonic()
+            retry_after = None
+            try:
+                async with session.get(url) as response:
+                    self.rate_limiter.record(response.status, time.monotonic() - started)
+                    error_kind = self.retry_policy.classify_status(response.status)
+                    if error_kind is None:
+                        return FetchedPage(
+                            url=url,
+                            status=response.status,
+                            headers=dict(response.headers),
+                            content=await response.read(),
+                            encoding=response.get_encoding()
+                        ), None
+                    error = f"HTTP {response.status}"
+                    retry_after = self.retry_policy.parse_retry_after(response.headers.get('Retry-After'))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.rate_limiter.record(None, timed_out=isinstance(e, asyncio.TimeoutError))
+                error_kind = self.retry_policy.classify_exception(e)
+                error = repr(e)
+
+            # Специальная обработка 500 ошибки
+            if error_kind == DELETED:
+                logger.warning(f"Страница {url} вернула 500 ошибку (возможно удалена)")
+                return None, error_kind
+
+            if not self.retry_policy.should_retry(error_kind, attempt, retry_after):
+                logger.error(f"Запрос {url} завершился ошибкой ({error_kind}): {error}. Попыток: {attempt + 1}")
+                return None, error_kind
+
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            attempt += 1
+            logger.warning(f"Ошибка запроса ({error_kind}): {error}. Повторная попытка {attempt}/{self.retry_policy.max_retries} через {delay:.1f} сек")
+            await asyncio.sleep(delay)
@@ -0,0 +1,129 @@
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+from .storage import atomic_write
+
+logger = logging.getLogger(__name__)
+
+def to_ranges(ids: Iterable[int]) -> List[List[int]]:
+    """Сжатие множества ID в список диапазонов [начало, конец]"""
+    ranges = []
+    for page_id in sorted(ids):
+        if ranges and page_id == ranges[-1][1] + 1:
+            ranges[-1][1] = page_id
+        else:
+            ranges.append([page_id, page_id])
+    return ranges
+
+def from_ranges(ranges: Iterable[List[int]]) -> Set[int]:
+    """Развертывание списка диапазонов в множество ID"""
+    ids = set()
+    for start, end in ranges:
+        ids.update(range(start, end + 1))
+    return ids
+
+class CrawlCheckpoint:
+    def __init__(self, path: Optional[str] = None, resume: bool = True):
+        """
+        Сохраняемое состояние обхода: завершенные, загружаемые и неудачные ID.
+
+        Страница считается завершенной только после того, как ее продукт
+        сохранен в хранилища (commit), поэтому после падения или прерывания
+        скрапер продолжает с того же места, не загружая повторно сохраненные страницы
+        и не сохраняя их продукты второй раз. Страницы без продукта
+        (удаленные, пустые) завершаются сразу. Экземпляр потокобезопасен.
+
+        Args:
+            path (str, optional): Файл чекпоинта (None - только в памяти)
+            resume (bool): Загрузить существующий чекпоинт
+        """
+        self.path = Path(path) if path else None
+        self.completed: Set[int] = set()
+        self.in_flight: Set[int] = set()
+        self.failed: Set[int] = set()
+        self._pending: Set[int] = set()
+        self._lock = threading.Lock()
+        if resume and self.path and self.path.exists():
+            self.load()
+
+    def is_completed(self, page_id: int) -> bool:
+        """Проверка, что страница уже обработана и сохранена"""
+        return page_id in self.completed
+
+    def start(self, page_id: int) -> None:
+        """Страница взята в работу"""
+        with self._lock:
+            self.in_flight.add(page_id)
+            self.failed.discard(page_id)
+
+    def fail(self, page_id: int) -> None:
+        """Страницу не удалось загрузить (будет повторена при следующем запуске)"""
+        with self._lock:
+            self.in_flight.discard(page_id)
+            self.failed.add(page_id)
+
+    def finish(self, page_id: int, has_product: bool) -> None:
+        """
+        Страница обработана.
+
+        Args:
+            page_id (int): ID страницы
+            has_product (bool): Со страницы получен продукт, ожидающий сохранения
+        """
+        with self._lock:
+            self.in_flight.discard(page_id)
+            if page_id in self.failed:
+                return
+            if has_product:
+                self._pending.add(page_id)
+            else:
+                self.completed.add(page_id)
+
+    def commit(self, page_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Продукты сохранены в хранилища: их страницы становятся завершенными.
+
+        Args:
+            page_ids (iterable, optional): Страницы, продукты которых сохранены
+                (по умолчанию - все ожидающие сохранения)
+        """
+        with self._lock:
+            committed = self._pending if page_ids is None else self._pending.intersection(page_ids)
+            self.completed |= committed
+            self._pending -= committed
+        self.save()
+
+    def clear(self) -> None:
+        """Обход завершен: состояние сбрасывается и файл удаляется, следующий запуск начнет обход заново"""
+        with self._lock:
+            self.completed.clear()
+            self.in_flight.clear()
+            self.failed.clear()
+            self._pending.clear()
+        if self.path and self.path.exists():
+            self.path.unlink()
+
+    def save(self) -> None:
+        """Атомарная запись чекпоинта (страницы с несохраненными продуктами не завершены)"""
+        if not self.path:
+            return
+        with self._lock:
+            state = {
+                'updated_at': datetime.now().isoformat(),
+                'completed': to_ranges(self.completed),
+                'in_flight': sorted(self.in_flight | self._pending),
+                'failed': sorted(self.failed)
+            }
+        atomic_write(self.path, json.dumps(state).encode('utf-8'))
+
+    def load(self) -> None:
+        """Чтение чекпоинта; загружавшиеся и неудачные страницы будут обработаны заново"""
+        state = json.loads(self.path.read_text(encoding='utf-8'))
+        self.completed = from_ranges(state.get('completed', []))
+        self.failed = set(state.get('failed', []))
+        interrupted = state.get('in_flight', [])
+        logger.info(f"Загружен чекпоинт {self.path} от {state.get('updated_at')}: "
+                    f"завершено {len(self.completed)}, прервано {len(interrupted)}, с ошибками {len(self.failed)}")
@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class DatabaseWriter:
+    def __init__(self,
+                 save: Callable[[List[Dict]], Optional[int]],
+                 on_saved: Optional[Callable[[List[Dict], int], None]] = None,
+                 batch_size: int = 100,
+                 flush_interval: float = 5.0,
+                 queue_size: int = 1000,
+                 retry_delay: float = 5.0):
+        """
+        Фоновая запись продуктов в базу данных.
+
+        Продукты из put попадают в ограниченную очередь, а поток записи
+        собирает их в пакеты и записывает, когда набралось batch_size
+        продуктов или первый продукт пакета ждет дольше flush_interval.
+        Загрузка и разбор не ждут фиксации транзакций: put блокируется,
+        только если очередь заполнена (обратное давление при медленной или
+        недоступной базе). Пакеты записываются строго по порядку:
+        неудачный пакет повторяется через retry_delay, пока не будет записан.
+        При close оставшиеся продукты записываются одной последней попыткой.
+
+        Args:
+            save: Запись пакета: продукты -> число сохраненных или None при ошибке
+            on_saved: Вызывается в потоке записи после записи пакета (продукты, число сохраненных)
+            batch_size (int): Размер пакета
+            flush_interval (float): Максимальное ожидание неполного пакета, сек
+            queue_size (int): Емкость очереди продуктов
+            retry_delay (float): Пауза перед повтором неудачного пакета, сек
+        """
+        self.save = save
+        self.on_saved = on_saved
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Запуск потока записи (повторный вызов ничего не делает)"""
+        with self._lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def put(self, product: Dict) -> None:
+        """Добавление продукта в очередь (ждет, если очередь заполнена)"""
+        self.start()
+        if self.queue.full():
+            logger.debug("Очередь записи в базу данных заполнена, ожидание")
+        self.queue.put(product)
+
+    def close(self) -> None:
+        """Запись оставшихся продуктов и остановка потока"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        # Сначала сигнал: поток перестает ждать повтора и освобождает очередь
+        self._stopping.set()
+        self.queue.put(_STOP)
+        thread.join()
+
+    def _write(self, batch: List[Dict]) -> bool:
+        """Запись пакета; False - пакет нужно повторить"""
+        try:
+            saved = self.save(batch)
+            if saved is None:
+                return False
+            if self.on_saved:
+                self.on_saved(batch, saved)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка фоновой записи в базу данных: {e}")
+            return False
+
+    def _run(self) -> None:
+        batch: List[Dict] = []
+        deadline = None  # Время записи неполного пакета или повтора неудачного
+        while True:
+            if self._stopping.is_set():
+                # Остановка: забираем все продукты до метки и записываем их
+                item = self.queue.get()
+                while item is not _STOP:
+                    batch.append(item)
+                    item = self.queue.get()
+                self._flush(batch)
+                return
+
+            if len(batch) < self.batch_size:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    self._flush(batch)
+                    return
+                if item is not None:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                    if len(batch) < self.batch_size:
+                        continue
+            elif time.monotonic() < deadline:
+                # Полный пакет ждет повтора: очередь заполняется и тормозит загрузку
+                self._stopping.wait(deadline - time.monotonic())
+                continue
+
+            chunk = batch[:self.batch_size]
+            if self._write(chunk):
+                del batch[:len(chunk)]
+                deadline = time.monotonic() + self.flush_interval if batch else None
+            else:
+                logger.warning(f"Пакет из {len(chunk)} продуктов будет повторен через {self.retry_delay} сек")
+                deadline = time.monotonic() + self.retry_delay
+
+    def _flush(self, batch: List[Dict]) -> None:
+        """Последняя попытка записи при остановке (по порядку, до первой ошибки)"""
+        for start in range(0, len(batch), self.batch_size):
+            if not self._write(batch[start:start + self.batch_size]):
+                logger.error(f"При остановке не записано в базу данных: {len(batch) - start} продуктов")
+                return
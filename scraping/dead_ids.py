@@ -0,0 +1,110 @@
+import logging
+import struct
+import threading
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, Optional
+from .storage import atomic_write
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DID1'
+HEADER = struct.Struct('<4sII')  # magic, первый ID, количество бит
+
+class DeadIdFilter:
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        """
+        Сохраняемое множество ID страниц, которые заведомо отсутствуют
+        (500 "возможно удалена", 404/410, страница без <head>).
+
+        На диске хранится сжатая битовая карта по диапазону ID и время
+        пометки каждого ID. Через ttl секунд ID снова считается живым,
+        чтобы страница была перепроверена.
+
+        Args:
+            path (str, optional): Файл для хранения (None - только в памяти)
+            ttl (float, optional): Время жизни пометки в секундах (None - бессрочно)
+        """
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self._marked: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.path and self.path.exists():
+            self.load()
+
+    def is_dead(self, page_id: int) -> bool:
+        """Проверка, что страницу не нужно запрашивать"""
+        marked_at = self._marked.get(page_id)
+        if marked_at is None:
+            return False
+        if self.ttl is not None and time.time() - marked_at > self.ttl:
+            return False
+        return True
+
+    def mark(self, page_id: int) -> None:
+        """Пометка страницы как отсутствующей"""
+        with self._lock:
+            self._marked[page_id] = int(time.time())
+            self._dirty = True
+
+    def discard(self, page_id: int) -> None:
+        """Снятие пометки (страница снова доступна)"""
+        with self._lock:
+            if self._marked.pop(page_id, None) is not None:
+                self._dirty = True
+
+    def __contains__(self, page_id: int) -> bool:
+        """Проверка пометки с учетом ttl"""
+        return self.is_dead(page_id)
+
+    def __len__(self) -> int:
+        """Количество помеченных ID"""
+        return len(self._marked)
+
+    def load(self) -> None:
+        """Чтение битовой карты и времен пометки из файла"""
+        data = zlib.decompress(self.path.read_bytes())
+        magic, first_id, bit_count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"Неизвестный формат файла {self.path}")
+
+        bitmap_size = (bit_count + 7) // 8
+        bitmap = data[HEADER.size:HEADER.size + bitmap_size]
+        stamps = array('I')
+        stamps.frombytes(data[HEADER.size + bitmap_size:])
+
+        marked = {}
+        stamp_index = 0
+        for byte_index, byte in enumerate(bitmap):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte & (1 << bit):
+                    marked[first_id + byte_index * 8 + bit] = stamps[stamp_index]
+                    stamp_index += 1
+        self._marked = marked
+        logger.info(f"Загружено {len(marked)} отсутствующих ID из {self.path}")
+
+    def save(self) -> None:
+        """Атомарная запись в файл (только при наличии изменений)"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            ids = sorted(self._marked)
+            stamps = array('I', (self._marked[page_id] for page_id in ids))
+            self._dirty = False
+
+        first_id = ids[0] if ids else 0
+        bit_count = ids[-1] - first_id + 1 if ids else 0
+        bitmap = bytearray((bit_count + 7) // 8)
+        for page_id in ids:
+            offset = page_id - first_id
+            bitmap[offset // 8] |= 1 << (offset % 8)
+
+        data = HEADER.pack(MAGIC, first_id, bit_count) + bytes(bitmap) + stamps.tobytes()
+        atomic_write(self.path, zlib.compress(data))
@@ -0,0 +1,604 @@
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
+from . import lxml_extraction, single_pass
+from .price_text import find_price_in_text
+
+logger = logging.getLogger(__name__)
+
+HEAD_PATTERN = re.compile(r'<head[\s>]', re.IGNORECASE)
+HELPFUL_PATTERN = re.compile(r'(\d+)\s+of\s+(\d+)\s+magicians\s+found\s+this\s+helpful')
+
+# Парсеры страниц: BeautifulSoup со встроенным html.parser, BeautifulSoup
+# с деревом lxml, прямое извлечение через lxml/XPath без BeautifulSoup
+# и извлечение из дерева lxml за один обход.
+# Результат извлечения у всех одинаковый (см. tests/test_parser_backends.py)
+PARSER_BACKENDS = ('html.parser', 'lxml', 'lxml-xpath', 'lxml-single-pass')
+LXML_EXTRACTORS = {
+    'lxml-xpath': lxml_extraction.extract_product_info,
+    'lxml-single-pass': single_pass.extract_product_info
+}
+DEFAULT_PARSER_BACKEND = 'lxml-single-pass'
+
+def extract_product_info(soup, url, html: Optional[str] = None, max_reviews: Optional[int] = None):
+    """
+    Извлекает информацию о продукте из HTML.
+
+    Args:
+        soup (BeautifulSoup): Дерево страницы
+        url (str): URL страницы
+        html (str, optional): Исходный HTML для запасного поиска цены
+            (если не передан, дерево сериализуется обратно в HTML)
+        max_reviews (int, optional): Ограничение числа отзывов (см. extract_reviews)
+    """
+    try:
+        # Название продукта
+        product_name = None
+
+        # 1. Ищем в основном контейнере продукта
+        product_container = soup.find('div', class_='product-main')
+        if product_container:
+            # Ищем заголовок в контейнере
+            title_element = product_container.find('h1')
+            if title_element:
+                product_name = title_element.text.strip()
+
+        # 2. Ищем в мета-тегах
+        if not product_name:
+            meta_title = soup.find('meta', {'property': 'og:title'})
+            if meta_title:
+                product_name = meta_title.get('content', '').strip()
+                # Удаляем лишние части из заголовка
+                product_name = product_name.replace(' - Penguin Magic Shop', '').strip()
+
+        # 3. Ищем в заголовке страницы
+        if not product_name:
+            title_element = soup.find('title')
+            if title_element:
+                product_name = title_element.text.strip()
+                # Удаляем лишние части из заголовка
+                product_name = product_name.replace(' - Penguin Magic Shop', '').strip()
+
+        if not product_name:
+            product_name = "Название не найдено"
+
+        # Извлекаем автора из названия
+        author = None
+        author_match = re.search(r'by\s+([^(]+?)(?:\s*\(|$)', product_name)
+        if author_match:
+            author = author_match.group(1).strip()
+
+        # Цена без скидки (List price) и цена со скидкой (Price)
+        price = None  # Цена без скидки (List price)
+        discounted_price = None  # Цена со скидкой (Price)
+
+        # 1. Ищем в таблице product_price_details (приоритетный источник)
+        price_table = soup.find('table', class_='product_price_details')
+        if price_table:
+            # Ищем все строки таблицы
+            rows = price_table.find_all('tr')
+            for row in rows:
+                cells = row.find_all('td')
+                if len(cells) >= 2:
+                    label = cells[0].get_text(strip=True).lower()
+                    value_cell = cells[1]
+
+                    # List price (цена без скидки) - обычно в <strike> теге
+                    if 'list price' in label:
+                        strike_tag = value_cell.find('strike')
+                        if strike_tag:
+                            try:
+                                price_text = strike_tag.get_text(strip=True)
+                                price = float(re.sub(r'[^\d.]', '', price_text))
+                            except (ValueError, TypeError):
+                                pass
+                        # Если нет strike, берем из самой ячейки
+                        elif not price:
+                            try:
+                                price_text = value_cell.get_text(strip=True)
+                                price = float(re.sub(r'[^\d.]', '', price_text))
+                            except (ValueError, TypeError):
+                                pass
+
+                    # Price (цена со скидкой) - в ячейке с классом ourprice
+                    elif 'price:' in label and value_cell.get('class') and 'ourprice' in value_cell.get('class'):
+                        try:
+                            price_text = value_cell.get_text(strip=True)
+                            discounted_price = float(re.sub(r'[^\d.]', '', price_text))
+                        except (ValueError, TypeError):
+                            pass
+
+        # 2. Если не нашли в таблице, ищем в JSON-данных
+        if not price or not discounted_price:
+            script_tags = soup.find_all('script', {'type': 'application/ld+json'})
+            for script in script_tags:
+                try:
+                    json_data = json.loads(script.string)
+                    if isinstance(json_data, dict):
+                        if 'offers' in json_data:
+                            offers = json_data['offers']
+                            if isinstance(offers, dict):
+                                # Цена со скидкой обычно в 'price'
+                                if 'price' in offers and not discounted_price:
+                                    try:
+                                        discounted_price = float(offers['price'])
+                                    except (ValueError, TypeError):
+                                        pass
+                                # Цена без скидки может быть в 'priceSpecification'
+                                if 'priceSpecification' in offers:
+                                    price_spec = offers['priceSpecification']
+                                    if isinstance(price_spec, dict) and 'price' in price_spec and not price:
+                                        try:
+                                            price = float(price_spec['price'])
+                                        except (ValueError, TypeError):
+                                            pass
+                            break
+                except (json.JSONDecodeError, ValueError, TypeError, AttributeError):
+                    continue
+
+        # 3. Если не нашли цену без скидки, используем цену со скидкой как основную
+        if not price and discounted_price:
+            price = discounted_price
+            discounted_price = None  # Если нет скидки, не сохраняем discounted_price
+
+        # 4. Fallback: ищем цену в мета-тегах
+        if not price:
+            meta_price = soup.find('meta', {'property': 'product:price:amount'})
+            if meta_price:
+                try:
+                    price = float(meta_price.get('content'))
+                except (ValueError, TypeError):
+                    pass
+
+        # 5. Fallback: ищем в элементах с ценой
+        if not price:
+            price_selectors = [
+                ('span', {'class': 'price'}),
+                ('div', {'class': 'product-price'}),
+                ('span', {'class': 'regular-price'}),
+                ('div', {'class': 'price-box'}),
+                ('span', {'itemprop': 'price'})
+            ]
+
+            for tag, attrs in price_selectors:
+                price_element = soup.find(tag, attrs)
+                if price_element:
+                    try:
+                        price_text = price_element.text.strip()
+                        # Удаляем все нечисловые символы, кроме точки
+                        price_text = ''.join(filter(lambda x: x.isdigit() or x == '.', price_text))
+                        if price_text:
+                            price = float(price_text)
+                            break
+                    except (ValueError, TypeError):
+                        continue
+
+        # 6. Fallback: ищем цену в тексте страницы с помощью регулярных выражений
+        if not price:
+            price = find_price_in_text(html if html is not None else str(soup))
+
+        # Если цена все еще не найдена, логируем это
+        if not price:
+            logger.warning(f"Не удалось найти цену для продукта {url}")
+            price = 0.0
+
+        # URL изображения
+        image_url = None
+        meta_image = soup.find('meta', {'property': 'og:image'})
+        if meta_image:
+            image_url = meta_image.get('content')
+
+        # Описание - ищем полное описание в div#product_description
+        description = None
+        description_div = soup.find('div', id='product_description')
+        if description_div:
+            # Ищем первый параграф в product_subsection
+            product_subsection = description_div.find('div', class_='product_subsection')
+            if product_subsection:
+                description_p = product_subsection.find('p')
+                if description_p:
+                    # Получаем весь текст, заменяем <br> на пробелы
+                    description = description_p.get_text(separator=' ', strip=True)
+                    # Очищаем от лишних пробелов
+                    description = ' '.join(description.split())
+
+        # Если не нашли полное описание, используем meta как fallback
+        if not description:
+            description_meta = soup.find('meta', {'property': 'og:description'})
+            if description_meta:
+                description = description_meta.get('content').strip()
+
+        # Теги - ищем ссылки на /tricks/tagged/ рядом с продуктом
+        # Теги продукта находятся в div с float:left после product_addtocart
+        # Каждый тег в отдельном div с стилем: border:1px solid #999; background:#aaa
+        # НЕ в навигационном меню (browse_menu)
+        tags = []
+
+        # Ищем область с тегами продукта - div с float:left после product_addtocart
+        # Теги находятся в div с float:left, который содержит div'ы с серыми блоками
+        tags_container = find_tags_container(soup)
+        if tags_container:
+            # Извлекаем все ссылки на /tricks/tagged/ из этого контейнера
+            tag_links = tags_container.find_all('a', href=lambda x: x and '/tricks/tagged/' in x)
+            for link in tag_links:
+                tag_text = link.get_text(strip=True)
+                if tag_text:
+                    tags.append(tag_text)
+
+        # Удаляем дубликаты, сохраняя порядок
+        tags = list(dict.fromkeys(tags))
+
+        # Отзывы и оценки
+        reviews = extract_reviews(soup, max_reviews)
+
+        product_info = {
+            'name': product_name,
+            'author': author,
+            'price': price,  # Цена без скидки (List price)
+            'discounted_price': discounted_price,  # Цена со скидкой (если есть)
+            'url': url,
+            'image_url': image_url,
+            'description': description,
+            'tags': tags,
+            'reviews': reviews,  # Отзывы и оценки
+            'created_at': datetime.now(),
+            'updated_at': datetime.now()
+        }
+
+        logger.info(f"Извлечена информация о продукте: {product_name} (${price})")
+        return product_info
+
+    except Exception as e:
+        logger.error(f"Ошибка при извлечении информации о продукте {url}: {str(e)}")
+        return None
+
+def is_gray_block(style: Optional[str]) -> bool:
+    """Стиль серого блока, в котором находится тег продукта"""
+    return bool(style) and 'background:#aaa' in style and 'border:1px solid #999' in style
+
+def find_tags_container(soup):
+    """
+    Поиск контейнера тегов: первый div с float:left после product_addtocart,
+    который не входит в навигацию (browse_menu) и содержит серые блоки.
+
+    Вместо поиска серых блоков внутри каждого следующего div элементы
+    просматриваются лениво до первого серого блока, а контейнер находится
+    среди его предков. Первый по порядку документа div, содержащий серый
+    блок, - самый внешний подходящий предок первого такого блока.
+    """
+    product_addtocart = soup.find('div', class_='product_addtocart')
+    if not product_addtocart:
+        return None
+
+    # Сам product_addtocart и его предки не следуют за ним
+    not_after = {id(product_addtocart)}
+    not_after.update(id(parent) for parent in product_addtocart.parents)
+
+    for element in product_addtocart.next_elements:
+        if element.name != 'div' or not is_gray_block(element.get('style')):
+            continue
+        container = None
+        in_menu = False
+        for parent in element.parents:
+            if parent.name != 'div':
+                continue
+            if id(parent) not in not_after and 'float:left' in parent.get('style', ''):
+                container = parent
+                in_menu = False
+            elif parent.get('id') == 'browse_menu':
+                # Навигация выше контейнера
+                in_menu = True
+        if container is not None and not in_menu:
+            return container
+    return None
+
+def iter_parent_reviews(reviews_container):
+    """
+    Родительские отзывы внутри sorted-reviews в порядке документа.
+
+    Каждый отзыв это div.product_review, который НЕ является review_header.
+    Структура: <div class="product_review"> содержит <div class="product_review review_header">
+    и <div class="review_body">. Отзывы перебираются лениво, поэтому при
+    ограничении числа отзывов остальные не просматриваются.
+    """
+    for div in reviews_container.descendants:
+        if not isinstance(div, Tag) or div.name != 'div':
+            continue
+        classes = div.get('class', [])
+        # Если это review_header, пропускаем (это дочерний элемент)
+        if 'product_review' not in classes or 'review_header' in classes:
+            continue
+        # Проверяем, что внутри есть review_header или review_body
+        if div.find('div', class_='review_header') or div.find('div', class_='review_body'):
+            yield div
+
+def find_helpful_votes(review_div):
+    """
+    Голоса "X of Y magicians found this helpful".
+
+    Строка голосов - собственный текст отзыва между review_body и
+    review_votes, поэтому проверяются только текстовые узлы самого отзыва,
+    без сборки всего текста отзыва.
+
+    Returns:
+        tuple: (helpful_count, helpful_total) или (None, None)
+    """
+    for child in review_div.children:
+        # Комментарии не входят в текст отзыва
+        if type(child) is not NavigableString:
+            continue
+        helpful_match = HELPFUL_PATTERN.search(child)
+        if helpful_match:
+            return int(helpful_match.group(1)), int(helpful_match.group(2))
+    return None, None
+
+def extract_reviews(soup, max_reviews: Optional[int] = None) -> List[Dict]:
+    """
+    Извлекает отзывы и оценки из HTML.
+
+    Args:
+        soup (BeautifulSoup): Дерево страницы
+        max_reviews (int, optional): Максимум отзывов (None - все, 0 - только
+            общая оценка из review_summary, без разбора отзывов)
+
+    Returns:
+        list: Отзывы; первым элементом - общая оценка (если есть)
+    """
+    reviews = []
+
+    try:
+        parent_reviews = ()
+        if max_reviews != 0:
+            # Ищем контейнер с отзывами
+            reviews_container = soup.find('div', id='sorted-reviews')
+            if not reviews_container:
+                logger.debug("Контейнер sorted-reviews не найден")
+                return reviews
+            parent_reviews = iter_parent_reviews(reviews_container)
+
+        for review_div in parent_reviews:
+            if max_reviews is not None and len(reviews) >= max_reviews:
+                break
+            review_data = {}
+
+            # Извлекаем оценку (rating) из изображения звезд в review_header
+            rating = None
+            review_header = review_div.find('div', class_='review_header')
+            if review_header:
+                star_img = review_header.find('img', src=lambda x: x and 'stars.gif' in x)
+                if star_img:
+                    src = star_img.get('src', '')
+                    # Извлекаем число из названия файла (например, "5stars.gif" -> 5)
+                    rating_match = re.search(r'(\d+)stars\.gif', src)
+                    if rating_match:
+                        rating = int(rating_match.group(1))
+
+                # Извлекаем заголовок отзыва
+                subject = None
+                subject_span = review_header.find('span', class_='review_subject')
+                if subject_span:
+                    subject = subject_span.get_text(strip=True)
+
+                # Извлекаем дату
+                date = None
+                review_from = review_header.find('div', class_='review_from')
+                if review_from:
+                    # Ищем текст после "on"
+                    text = review_from.get_text()
+                    date_match = re.search(r'on\s+([A-Za-z]+\s+\d+[a-z]{0,2},\s+\d{4})', text)
+                    if date_match:
+                        date = date_match.group(1)
+
+                    # Проверяем, является ли покупатель верифицированным
+                    verified_spans = review_from.find_all('span', class_='review_verified')
+                    verified_buyer = any('Verified buyer' in span.get_text() for span in verified_spans)
+                else:
+                    verified_buyer = False
+            else:
+                subject = None
+                date = None
+                verified_buyer = False
+
+            # Извлекаем текст отзыва
+            review_text = None
+            review_body = review_div.find('div', class_='review_body')
+            if review_body:
+                # Получаем весь текст, заменяем <br> на пробелы
+                review_text = review_body.get_text(separator=' ', strip=True)
+                # Очищаем от лишних пробелов
+                review_text = ' '.join(review_text.split())
+
+            # Извлекаем количество полезных голосов
+            helpful_count, helpful_total = find_helpful_votes(review_div)
+
+            # Собираем данные отзыва
+            if rating or review_text:  # Добавляем отзыв, если есть хотя бы оценка или текст
+                review_data = {
+                    'rating': rating,
+                    'subject': subject,
+                    'text': review_text,
+                    'date': date,
+                    'verified_buyer': verified_buyer,
+                    'helpful_count': helpful_count,
+                    'helpful_total': helpful_total
+                }
+                reviews.append(review_data)
+
+        logger.debug(f"Извлечено {len(reviews)} отзывов")
+
+        # Также извлекаем общую оценку из review_summary
+        overall_rating = None
+        review_count = None
+        review_summary = soup.find('div', id='review_summary')
+        if review_summary:
+            summary_link = review_summary.find('a', href='#reviews')
+            if summary_link:
+                summary_text = summary_link.get_text(strip=True)
+                # Ищем паттерн "4.8 stars / 6 reviews"
+                rating_match = re.search(r'([\d.]+)\s+stars?\s*/\s*(\d+)\s+reviews?', summary_text)
+                if rating_match:
+                    overall_rating = float(rating_match.group(1))
+                    review_count = int(rating_match.group(2))
+
+        # Добавляем общую информацию в начало списка отзывов (если есть)
+        if overall_rating is not None:
+            reviews.insert(0, {
+                'type': 'summary',
+                'overall_rating': overall_rating,
+                'total_reviews': review_count
+            })
+
+    except Exception as e:
+        logger.error(f"Ошибка при извлечении отзывов: {str(e)}")
+
+    return reviews
+
+def soup_builder(backend: str) -> str:
+    """Построитель дерева BeautifulSoup для парсера backend"""
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Неизвестный парсер: {backend}")
+    return 'html.parser' if backend == 'html.parser' else 'lxml'
+
+# Области страницы, которые строятся при ограниченном разборе
+# browse_menu сохраняется (без содержимого вне областей), чтобы find_tags_container
+# не принял float:left-блоки внутри навигации за контейнер тегов
+REGION_DIV_IDS = frozenset(['product_description', 'sorted-reviews', 'review_summary', 'browse_menu'])
+REGION_DIV_CLASSES = frozenset(['product-main', 'product_addtocart', 'product-price', 'price-box'])
+REGION_SPAN_CLASSES = frozenset(['price', 'regular-price'])
+
+def _class_marker(name: str):
+    return re.compile(r'class\s*=\s*["\']?[^"\'>]*\b' + name + r'\b')
+
+def _id_marker(name: str):
+    return re.compile(r'id\s*=\s*["\']?' + name + r'\b')
+
+# Атрибут области в исходном HTML -> поиск области в ограниченном дереве
+REGION_MARKERS = [
+    (_class_marker('product-main'), lambda soup: soup.find('div', class_='product-main')),
+    (_class_marker('product_addtocart'), lambda soup: soup.find('div', class_='product_addtocart')),
+    (_id_marker('product_description'), lambda soup: soup.find('div', id='product_description')),
+    (_id_marker('sorted-reviews'), lambda soup: soup.find('div', id='sorted-reviews')),
+    (_id_marker('review_summary'), lambda soup: soup.find('div', id='review_summary'))
+]
+
+class ProductRegionStrainer(SoupStrainer):
+    """
+    Фильтр построения дерева BeautifulSoup: сохраняются только области,
+    которые читают extract_product_info и extract_reviews (мета-теги,
+    ld+json, таблица цен, описание, блок покупки, контейнеры тегов,
+    селекторы цены и отзывы). Из навигации остается только сам div
+    browse_menu; скрипты и подвал не строятся.
+    """
+
+    @staticmethod
+    def is_region(name: str, attrs) -> bool:
+        """Проверка открывающего тега: начинается ли с него нужная область"""
+        if name in ('meta', 'title'):
+            return True
+        if name not in ('div', 'span', 'table', 'script'):
+            return False
+        attrs = dict(attrs or {})
+        if name == 'script':
+            return attrs.get('type') == 'application/ld+json'
+        classes = attrs.get('class') or ''
+        classes = set(classes.split() if isinstance(classes, str) else classes)
+        if name == 'table':
+            return 'product_price_details' in classes
+        if name == 'span':
+            return bool(classes & REGION_SPAN_CLASSES) or attrs.get('itemprop') == 'price'
+        return (attrs.get('id') in REGION_DIV_IDS or bool(classes & REGION_DIV_CLASSES)
+                or 'float:left' in (attrs.get('style') or ''))
+
+    # beautifulsoup4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return self.is_region(markup_name, markup_attrs)
+
+    # beautifulsoup4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self.is_region(name, attrs)
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+def build_soup(html: str, backend: str, restricted: bool = False) -> BeautifulSoup:
+    """
+    Построение дерева BeautifulSoup.
+
+    В ограниченном режиме строятся только нужные области страницы
+    (ProductRegionStrainer). Если страница устроена не так, как ожидается,
+    и результат извлечения может отличаться, строится полное дерево.
+
+    Args:
+        html (str): HTML страницы
+        backend (str): Парсер из PARSER_BACKENDS
+        restricted (bool): Строить только нужные области
+
+    Returns:
+        BeautifulSoup: Дерево страницы
+    """
+    builder = soup_builder(backend)
+    if restricted and can_restrict(html):
+        soup = BeautifulSoup(html, builder, parse_only=ProductRegionStrainer())
+        if all(find(soup) is not None for marker, find in REGION_MARKERS if marker.search(html)):
+            return soup
+        logger.debug("Ограниченный разбор потерял часть областей, строится полное дерево")
+    return BeautifulSoup(html, builder)
+
+def can_restrict(html: str) -> bool:
+    """Проверка, что ограниченный разбор даст тот же результат, что и полный"""
+    # Навигацию после блока покупки нельзя отличить от контейнера тегов
+    addtocart = html.find('product_addtocart')
+    return addtocart == -1 or html.find('browse_menu', addtocart) == -1
+
+def parse_product_page(page_number: int, url: str, html: str,
+                       backend: str = DEFAULT_PARSER_BACKEND,
+                       restricted: bool = False,
+                       max_reviews: Optional[int] = None) -> Optional[Dict]:
+    """
+    Разбор загруженной страницы продукта.
+
+    Args:
+        page_number (int): Номер страницы
+        url (str): URL страницы
+        html (str): HTML страницы
+        backend (str): Парсер из PARSER_BACKENDS
+        restricted (bool): Строить только нужные области страницы (для парсеров BeautifulSoup)
+        max_reviews (int, optional): Максимум отзывов (None - все, 0 - только общая оценка)
+
+    Returns:
+        dict: Информация о продукте или None
+    """
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Неизвестный парсер: {backend}")
+
+    # Наличие <head> проверяется по исходному HTML одинаково для всех парсеров:
+    # lxml достраивает неявный <head>, а ограниченное дерево BeautifulSoup его не содержит
+    if not has_head(html):
+        logger.info(f"На странице {page_number} не найден head")
+        return None
+
+    if backend in LXML_EXTRACTORS:
+        tree = lxml_extraction.build_tree(html)
+        if tree is None:
+            logger.info(f"Не удалось разобрать страницу {page_number}")
+            return None
+        extract = LXML_EXTRACTORS[backend]
+    else:
+        tree = build_soup(html, backend, restricted)
+        extract = extract_product_info
+
+    # Извлекаем информацию о продукте
+    product_info = extract(tree, url, html=html, max_reviews=max_reviews)
+    if product_info:
+        logger.info(f"Получена информация о продукте со страницы {page_number}")
+        return product_info
+
+    logger.info(f"Не удалось извлечь информацию о продукте со страницы {page_number}")
+    return None
+
+def has_head(html: str) -> bool:
+    """Быстрая проверка наличия <head> без построения дерева"""
+    return HEAD_PATTERN.search(html) is not None
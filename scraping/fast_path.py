@@ -0,0 +1,185 @@
+import html as html_lib
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from .extraction import has_head
+
+logger = logging.getLogger(__name__)
+
+# Разметка, из которой полное извлечение берет данные приоритетнее JSON-LD
+# и мета-тегов (название из product-main, цены из таблицы, описание, теги,
+# отзывы). Если ни одной из этих строк нет в исходном HTML, соответствующие
+# элементы заведомо отсутствуют и в дереве любого парсера
+TREE_MARKERS = (
+    'product-main',
+    'product_price_details',
+    'product_description',
+    '/tricks/tagged/',
+    'sorted-reviews',
+    'review_summary'
+)
+
+# Комментарии пропускаются, содержимое script/style/title не разбирается как разметка
+OPEN_PATTERN = re.compile(r'<(?:(!--)|(script|style|title)\b([^>]*)>|meta\b([^>]*)>)', re.IGNORECASE)
+CLOSE_PATTERNS = {
+    tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE) for tag in ('script', 'style', 'title')
+}
+ATTRIBUTE_PATTERN = re.compile(r'''([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?''')
+
+def parse_attributes(source: str) -> Dict[str, str]:
+    """Атрибуты тега (имена в нижнем регистре, ссылки на символы раскрыты)"""
+    attributes = {}
+    for match in ATTRIBUTE_PATTERN.finditer(source):
+        name = match.group(1).lower()
+        value = next((group for group in match.group(2, 3, 4) if group is not None), '')
+        attributes.setdefault(name, html_lib.unescape(value))
+    return attributes
+
+def scan_head(html: str) -> Optional[Tuple[Dict[str, Dict[str, str]], List[str], Optional[str]]]:
+    """
+    Легкий просмотр исходного HTML без построения дерева.
+
+    Returns:
+        tuple: (первый мета-тег для каждого property, содержимое скриптов
+            application/ld+json, текст первого <title>) или None, если
+            комментарий или элемент не закрыт и разбор неоднозначен
+    """
+    meta = {}
+    ld_json = []
+    title = None
+    position = 0
+    while True:
+        match = OPEN_PATTERN.search(html, position)
+        if match is None:
+            return meta, ld_json, title
+        if match.group(1):
+            end = html.find('-->', match.end())
+            if end < 0:
+                return None
+            position = end + 3
+            continue
+        if match.group(4) is not None:
+            attributes = parse_attributes(match.group(4))
+            property = attributes.get('property')
+            if property is not None:
+                meta.setdefault(property, attributes)
+            position = match.end()
+            continue
+
+        tag = match.group(2).lower()
+        close = CLOSE_PATTERNS[tag].search(html, match.end())
+        if close is None:
+            return None
+        content = html[match.end():close.start()]
+        if tag == 'script':
+            if parse_attributes(match.group(3)).get('type') == 'application/ld+json':
+                ld_json.append(content)
+        elif tag == 'title' and title is None:
+            title = html_lib.unescape(content)
+        position = close.end()
+
+def extract_product_info(html: str, url: str) -> Optional[Dict]:
+    """
+    Быстрое извлечение из JSON-LD и мета-тегов без построения дерева.
+
+    Запись возвращается только тогда, когда полное извлечение (extraction.
+    extract_product_info) заведомо дало бы тот же результат: на странице нет
+    разметки из TREE_MARKERS, а цена найдена в JSON-LD или мета-тегах.
+    В остальных случаях возвращается None и страница разбирается полностью.
+
+    Args:
+        html (str): Исходный HTML страницы
+        url (str): URL страницы
+
+    Returns:
+        dict: Информация о продукте или None
+    """
+    # Та же проверка <head>, что и при полном разборе
+    if not has_head(html) or any(marker in html for marker in TREE_MARKERS):
+        return None
+
+    scanned = scan_head(html)
+    if scanned is None:
+        return None
+    meta, ld_json, title = scanned
+
+    # Название: og:title, затем <title> (product-main на странице нет)
+    product_name = None
+    if 'og:title' in meta:
+        product_name = meta['og:title'].get('content', '').strip()
+        product_name = product_name.replace(' - Penguin Magic Shop', '').strip()
+    if not product_name and title is not None:
+        product_name = title.strip().replace(' - Penguin Magic Shop', '').strip()
+    if not product_name:
+        product_name = "Название не найдено"
+
+    author = None
+    author_match = re.search(r'by\s+([^(]+?)(?:\s*\(|$)', product_name)
+    if author_match:
+        author = author_match.group(1).strip()
+
+    # Цены из JSON-LD (таблицы product_price_details на странице нет)
+    price = None
+    discounted_price = None
+    for script in ld_json:
+        try:
+            json_data = json.loads(script)
+            if isinstance(json_data, dict) and 'offers' in json_data:
+                offers = json_data['offers']
+                if isinstance(offers, dict):
+                    if 'price' in offers and not discounted_price:
+                        try:
+                            discounted_price = float(offers['price'])
+                        except (ValueError, TypeError):
+                            pass
+                    if 'priceSpecification' in offers:
+                        price_spec = offers['priceSpecification']
+                        if isinstance(price_spec, dict) and 'price' in price_spec and not price:
+                            try:
+                                price = float(price_spec['price'])
+                            except (ValueError, TypeError):
+                                pass
+                break
+        except (json.JSONDecodeError, ValueError, TypeError):
+            continue
+
+    if not price and discounted_price:
+        price = discounted_price
+        discounted_price = None
+
+    if not price and 'product:price:amount' in meta:
+        try:
+            price = float(meta['product:price:amount'].get('content'))
+        except (ValueError, TypeError):
+            pass
+
+    # Дальше цена ищется по элементам дерева и тексту страницы
+    if not price:
+        return None
+
+    image_url = meta['og:image'].get('content') if 'og:image' in meta else None
+
+    # Описание только из og:description (div#product_description на странице нет)
+    description = None
+    if 'og:description' in meta:
+        content = meta['og:description'].get('content')
+        if content is None:
+            return None
+        description = content.strip()
+
+    logger.debug(f"Информация о продукте {url} получена из JSON-LD и мета-тегов")
+    return {
+        'name': product_name,
+        'author': author,
+        'price': price,
+        'discounted_price': discounted_price,
+        'url': url,
+        'image_url': image_url,
+        'description': description,
+        'tags': [],
+        'reviews': [],
+        'created_at': datetime.now(),
+        'updated_at': datetime.now()
+    }
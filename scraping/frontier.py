@@ -0,0 +1,84 @@
+import logging
+import random
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class FrontierProber:
+    def __init__(self,
+                 is_live: Callable[[int], bool],
+                 window: int = 50,
+                 samples: int = 5,
+                 seed: Optional[int] = None):
+        """
+        Оценка максимального живого ID продукта.
+
+        ID проверяются не по одному, а окнами: окно [x, x + window) считается
+        живым, если жив хотя бы один из samples случайно выбранных ID в нем.
+        Это позволяет проходить разреженные участки удаленных продуктов.
+        Поиск галопирующий: шаг удваивается, пока окна живы, затем граница
+        уточняется бинарным поиском и проверкой ID сверху вниз.
+
+        Args:
+            is_live (callable): Проверка одного ID (выполняет запрос)
+            window (int): Размер окна, в пределах которого допускается пропуск
+            samples (int): Количество проверяемых ID в окне
+            seed (int, optional): Начальное значение генератора случайных чисел
+        """
+        self.is_live = is_live
+        self.window = window
+        self.samples = samples
+        self.random = random.Random(seed)
+        self.probes: Dict[int, bool] = {}
+        self.highest_seen: Optional[int] = None
+
+    def probe(self, page_id: int) -> bool:
+        """Проверка одного ID с кэшированием результата"""
+        if page_id not in self.probes:
+            live = self.is_live(page_id)
+            self.probes[page_id] = live
+            if live and (self.highest_seen is None or page_id > self.highest_seen):
+                self.highest_seen = page_id
+        return self.probes[page_id]
+
+    def window_alive(self, start: int) -> bool:
+        """Проверка окна [start, start + window) по выборке ID"""
+        candidates = [start] + self.random.sample(range(start + 1, start + self.window),
+                                                  min(self.samples - 1, self.window - 1))
+        return any(self.probe(page_id) for page_id in candidates)
+
+    def find_highest_live_id(self, start: int) -> Optional[int]:
+        """
+        Поиск максимального живого ID начиная со start.
+
+        Returns:
+            int: Оценка максимального живого ID или None, если живых ID не найдено
+        """
+        if not self.window_alive(start):
+            logger.warning(f"Не найдено живых ID в окне [{start}, {start + self.window})")
+            return None
+
+        # Галоп: удваиваем шаг, пока окна живы
+        low, step = start, self.window
+        while self.window_alive(low + step):
+            low += step
+            step *= 2
+        high = low + step
+
+        # Бинарный поиск: окно low живо, окно high мертво
+        while high - low > self.window:
+            middle = (low + high) // 2
+            if self.window_alive(middle):
+                low = middle
+            else:
+                high = middle
+
+        # Уточнение: ищем живой ID сверху вниз в последних окнах
+        for page_id in range(high + self.window - 1, low, -1):
+            if self.highest_seen is not None and page_id <= self.highest_seen:
+                break
+            if self.probe(page_id):
+                break
+
+        logger.info(f"Оценка максимального живого ID: {self.highest_seen} (запросов: {len(self.probes)})")
+        return self.highest_seen
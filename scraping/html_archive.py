@@ -0,0 +1,199 @@
+import gzip
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_TEMPLATE = 'segment_{:06d}.gz'
+INDEX_FILE = 'index.jsonl'
+
+class HtmlArchive:
+    def __init__(self, directory: str, max_segment_bytes: int = 256 * 1024 * 1024):
+        """
+        Сжатый архив загруженных страниц только для дозаписи.
+
+        Каждая запись - отдельный gzip-член в файле сегмента: строка JSON с
+        метаданными (URL, ID страницы, статус, заголовки, время загрузки,
+        кодировка), затем тело ответа. Индекс index.jsonl хранит смещение
+        каждой записи, что дает произвольный доступ по ID страницы (при
+        повторной загрузке страницы действует последняя запись). При
+        превышении max_segment_bytes начинается новый сегмент.
+
+        Args:
+            directory (str): Каталог архива
+            max_segment_bytes (int): Размер сегмента, после которого начинается новый
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.index: Dict[int, Dict] = {}
+
+        self._lock = threading.Lock()
+        self._segment_number = 0
+        self._segment_file = None
+        self._index_file = None
+        self._load_index()
+
+    def _segment_path(self, number: int) -> Path:
+        """Путь к файлу сегмента по номеру"""
+        return self.directory / SEGMENT_TEMPLATE.format(number)
+
+    def _load_index(self) -> None:
+        """Чтение индекса; последняя запись для страницы перекрывает предыдущие"""
+        index_path = self.directory / INDEX_FILE
+        if index_path.exists():
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Недописанная строка после аварийного завершения
+                        logger.warning(f"Пропущена поврежденная строка индекса архива: {line[:80]!r}")
+                        continue
+                    self.index[entry['page_id']] = entry
+
+        segments = sorted(self.directory.glob('segment_*.gz'))
+        if segments:
+            self._segment_number = int(segments[-1].stem.split('_')[1])
+        logger.info(f"Архив страниц {self.directory}: {len(self.index)} страниц, сегментов: {len(segments)}")
+
+    def _open_for_append(self, record_size: int) -> None:
+        """Открывает текущий сегмент на дозапись, при необходимости начиная новый"""
+        if self._segment_file is None:
+            if self._segment_number == 0:
+                self._segment_number = 1
+            self._segment_file = open(self._segment_path(self._segment_number), 'ab')
+            self._index_file = open(self.directory / INDEX_FILE, 'a', encoding='utf-8')
+
+        size = self._segment_file.tell()
+        if size > 0 and size + record_size > self.max_segment_bytes:
+            self._segment_file.close()
+            self._segment_number += 1
+            self._segment_file = open(self._segment_path(self._segment_number), 'ab')
+            logger.info(f"Начат новый сегмент архива: {self._segment_path(self._segment_number).name}")
+
+    def append(self,
+               page_id: int,
+               url: str,
+               status: int,
+               headers: Dict[str, str],
+               body: bytes,
+               encoding: Optional[str] = None,
+               fetched_at: Optional[datetime] = None) -> None:
+        """
+        Добавление страницы в архив.
+
+        Args:
+            page_id (int): ID страницы продукта
+            url (str): URL страницы
+            status (int): HTTP-статус ответа
+            headers (dict): Заголовки ответа
+            body (bytes): Тело ответа
+            encoding (str, optional): Кодировка тела ответа
+            fetched_at (datetime, optional): Время загрузки
+        """
+        meta = {
+            'page_id': page_id,
+            'url': url,
+            'status': status,
+            'headers': dict(headers),
+            'encoding': encoding,
+            'fetched_at': (fetched_at or datetime.now()).isoformat()
+        }
+        record = gzip.compress(json.dumps(meta, ensure_ascii=False).encode('utf-8') + b'\n' + body)
+
+        with self._lock:
+            self._open_for_append(len(record))
+            offset = self._segment_file.tell()
+            self._segment_file.write(record)
+            self._segment_file.flush()
+
+            entry = {
+                'page_id': page_id,
+                'segment': self._segment_number,
+                'offset': offset,
+                'length': len(record),
+                'status': status
+            }
+            # Индекс пишется после данных: запись без индекса просто не видна
+            self._index_file.write(json.dumps(entry) + '\n')
+            self._index_file.flush()
+            self.index[page_id] = entry
+
+    def get(self, page_id: int) -> Optional[Dict]:
+        """
+        Чтение страницы из архива по ID.
+
+        Returns:
+            dict: Метаданные записи и тело ответа в ключе 'body', либо None
+        """
+        entry = self.index.get(page_id)
+        if entry is None:
+            return None
+        return self._read_entry(entry)
+
+    def _read_entry(self, entry: Dict, segment_file=None) -> Dict:
+        """Чтение и распаковка одной записи по смещению"""
+        if segment_file is None:
+            with open(self._segment_path(entry['segment']), 'rb') as f:
+                f.seek(entry['offset'])
+                data = f.read(entry['length'])
+        else:
+            segment_file.seek(entry['offset'])
+            data = segment_file.read(entry['length'])
+
+        meta_line, body = gzip.decompress(data).split(b'\n', 1)
+        record = json.loads(meta_line)
+        record['body'] = body
+        return record
+
+    def iter_records(self) -> Iterator[Dict]:
+        """
+        Потоковое чтение всех страниц архива (последняя версия каждой страницы)
+        в порядке их расположения на диске.
+        """
+        self.flush()
+        entries = sorted(self.index.values(), key=lambda e: (e['segment'], e['offset']))
+        segment_number, segment_file = None, None
+        try:
+            for entry in entries:
+                if entry['segment'] != segment_number:
+                    if segment_file:
+                        segment_file.close()
+                    segment_number = entry['segment']
+                    segment_file = open(self._segment_path(segment_number), 'rb')
+                yield self._read_entry(entry, segment_file)
+        finally:
+            if segment_file:
+                segment_file.close()
+
+    def __contains__(self, page_id: int) -> bool:
+        """Проверка наличия страницы в архиве"""
+        return page_id in self.index
+
+    def __len__(self) -> int:
+        """Количество страниц в архиве"""
+        return len(self.index)
+
+    def flush(self) -> None:
+        """Сброс буферов на диск"""
+        with self._lock:
+            for f in (self._segment_file, self._index_file):
+                if f:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def close(self) -> None:
+        """Закрытие файлов архива"""
+        self.flush()
+        with self._lock:
+            for f in (self._segment_file, self._index_file):
+                if f:
+                    f.close()
+            self._segment_file = None
+            self._index_file = None
@@ -0,0 +1,466 @@
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import lxml.html
+from lxml import etree
+
+from .price_text import find_price_in_text
+
+logger = logging.getLogger(__name__)
+
+# Текст этих элементов не входит в get_text() BeautifulSoup
+NON_TEXT_TAGS = frozenset(['script', 'style', 'template'])
+
+def _has_class(name: str) -> str:
+    """XPath-условие на класс (как class_= в BeautifulSoup: совпадение с одним из классов)"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Запросы компилируются один раз
+FIND_PRODUCT_MAIN = etree.XPath(f"(//div[{_has_class('product-main')}])[1]")
+FIND_H1 = etree.XPath("(.//h1)[1]")
+FIND_META = etree.XPath("(//meta[@property = $property])[1]")
+FIND_TITLE = etree.XPath("(//title)[1]")
+FIND_PRICE_TABLE = etree.XPath(f"(//table[{_has_class('product_price_details')}])[1]")
+FIND_ROWS = etree.XPath(".//tr")
+FIND_CELLS = etree.XPath(".//td")
+FIND_STRIKE = etree.XPath("(.//strike)[1]")
+FIND_LD_JSON = etree.XPath("//script[@type = 'application/ld+json']")
+PRICE_SELECTORS = [
+    etree.XPath(f"(//span[{_has_class('price')}])[1]"),
+    etree.XPath(f"(//div[{_has_class('product-price')}])[1]"),
+    etree.XPath(f"(//span[{_has_class('regular-price')}])[1]"),
+    etree.XPath(f"(//div[{_has_class('price-box')}])[1]"),
+    etree.XPath("(//span[@itemprop = 'price'])[1]")
+]
+FIND_DESCRIPTION_DIV = etree.XPath("(//div[@id = 'product_description'])[1]")
+FIND_SUBSECTION = etree.XPath(f"(.//div[{_has_class('product_subsection')}])[1]")
+FIND_P = etree.XPath("(.//p)[1]")
+FIND_ADDTOCART = etree.XPath(f"(//div[{_has_class('product_addtocart')}])[1]")
+# find_all_next в BeautifulSoup включает и потомков самого элемента
+FIND_GRAY_BLOCKS_AFTER = etree.XPath(
+    "(descendant::div | following::div)"
+    "[contains(@style, 'background:#aaa') and contains(@style, 'border:1px solid #999')]"
+)
+FIND_TAG_LINKS = etree.XPath(".//a[contains(@href, '/tricks/tagged/')]")
+
+FIND_SORTED_REVIEWS = etree.XPath("(//div[@id = 'sorted-reviews'])[1]")
+FIND_REVIEW_DIVS = etree.XPath(f".//div[{_has_class('product_review')}]")
+FIND_REVIEW_HEADER = etree.XPath(f"(.//div[{_has_class('review_header')}])[1]")
+FIND_REVIEW_BODY = etree.XPath(f"(.//div[{_has_class('review_body')}])[1]")
+FIND_STARS = etree.XPath("(.//img[contains(@src, 'stars.gif')])[1]")
+FIND_SUBJECT = etree.XPath(f"(.//span[{_has_class('review_subject')}])[1]")
+FIND_REVIEW_FROM = etree.XPath(f"(.//div[{_has_class('review_from')}])[1]")
+FIND_VERIFIED = etree.XPath(f".//span[{_has_class('review_verified')}]")
+# Собственные текстовые узлы элемента (без потомков и комментариев)
+FIND_OWN_TEXT = etree.XPath("text()")
+HELPFUL_PATTERN = re.compile(r'(\d+)\s+of\s+(\d+)\s+magicians\s+found\s+this\s+helpful')
+FIND_REVIEW_SUMMARY = etree.XPath("(//div[@id = 'review_summary'])[1]")
+FIND_SUMMARY_LINK = etree.XPath("(.//a[@href = '#reviews'])[1]")
+
+def _first(query, element, **variables):
+    """Первый результат запроса или None"""
+    result = query(element, **variables)
+    return result[0] if result else None
+
+def _classes(element) -> List[str]:
+    """Список классов элемента"""
+    return (element.get('class') or '').split()
+
+def _iter_strings(element) -> Iterator[str]:
+    """Текстовые узлы элемента в порядке документа (без комментариев, скриптов и стилей)"""
+    if element.text and element.tag not in NON_TEXT_TAGS:
+        yield element.text
+    for child in element:
+        # У комментариев tag - функция, их текст пропускаем, хвост оставляем
+        if isinstance(child.tag, str) and child.tag not in NON_TEXT_TAGS:
+            yield from _iter_strings(child)
+        if child.tail:
+            yield child.tail
+
+def get_text(element, separator: str = '', strip: bool = False) -> str:
+    """Аналог Tag.get_text() из BeautifulSoup"""
+    strings = _iter_strings(element)
+    if strip:
+        strings = (string.strip() for string in strings)
+        strings = (string for string in strings if string)
+    return separator.join(strings)
+
+def build_tree(html: str):
+    """Построение дерева lxml; None для пустого документа"""
+    try:
+        return lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        # ValueError - строка с объявлением кодировки, разбираем байты
+        try:
+            return lxml.html.document_fromstring(html.encode('utf-8'))
+        except etree.ParserError:
+            return None
+
+class XPathLandmarks:
+    def __init__(self, tree):
+        """
+        Опорные элементы страницы, найденные запросами XPath.
+
+        Каждый запрос - отдельный обход дерева. Альтернатива с одним
+        обходом - SinglePassLandmarks из scraping/single_pass.py.
+
+        Args:
+            tree: Корневой элемент lxml
+        """
+        self.tree = tree
+
+    def product_main(self):
+        return _first(FIND_PRODUCT_MAIN, self.tree)
+
+    def meta(self, property: str):
+        return _first(FIND_META, self.tree, property=property)
+
+    def title(self):
+        return _first(FIND_TITLE, self.tree)
+
+    def price_table(self):
+        return _first(FIND_PRICE_TABLE, self.tree)
+
+    def ld_json_scripts(self) -> list:
+        return FIND_LD_JSON(self.tree)
+
+    def price_element(self, index: int):
+        """Первый элемент index-го селектора цены из PRICE_SELECTORS"""
+        return _first(PRICE_SELECTORS[index], self.tree)
+
+    def description_div(self):
+        return _first(FIND_DESCRIPTION_DIV, self.tree)
+
+    def tags_container(self):
+        """div с float:left после product_addtocart, содержащий серые блоки тегов"""
+        product_addtocart = _first(FIND_ADDTOCART, self.tree)
+        if product_addtocart is None:
+            return None
+        # Контейнер - самый внешний div с float:left среди предков первого
+        # серого блока (см. extraction.find_tags_container)
+        not_after = {product_addtocart}
+        not_after.update(product_addtocart.iterancestors())
+        for block in FIND_GRAY_BLOCKS_AFTER(product_addtocart):
+            container = None
+            in_menu = False
+            for parent in block.iterancestors('div'):
+                if parent not in not_after and 'float:left' in parent.get('style', ''):
+                    container = parent
+                    in_menu = False
+                elif parent.get('id') == 'browse_menu':
+                    in_menu = True
+            if container is not None and not in_menu:
+                return container
+        return None
+
+    def sorted_reviews(self):
+        return _first(FIND_SORTED_REVIEWS, self.tree)
+
+    def review_divs(self) -> list:
+        """div.product_review внутри sorted-reviews"""
+        return FIND_REVIEW_DIVS(self.sorted_reviews())
+
+    def review_summary(self):
+        return _first(FIND_REVIEW_SUMMARY, self.tree)
+
+def extract_product_info(tree, url, landmarks=None, html: Optional[str] = None,
+                         max_reviews: Optional[int] = None):
+    """
+    Извлекает информацию о продукте из дерева lxml (результат совпадает с BeautifulSoup-версией).
+
+    Args:
+        tree: Корневой элемент lxml
+        url (str): URL страницы
+        landmarks (optional): Поиск опорных элементов (по умолчанию XPathLandmarks)
+        html (str, optional): Исходный HTML для запасного поиска цены
+        max_reviews (int, optional): Ограничение числа отзывов (см. extract_reviews)
+    """
+    if landmarks is None:
+        landmarks = XPathLandmarks(tree)
+    try:
+        # Название продукта
+        product_name = None
+
+        # 1. Ищем в основном контейнере продукта
+        product_container = landmarks.product_main()
+        if product_container is not None:
+            title_element = _first(FIND_H1, product_container)
+            if title_element is not None:
+                product_name = get_text(title_element).strip()
+
+        # 2. Ищем в мета-тегах
+        if not product_name:
+            meta_title = landmarks.meta('og:title')
+            if meta_title is not None:
+                product_name = meta_title.get('content', '').strip()
+                product_name = product_name.replace(' - Penguin Magic Shop', '').strip()
+
+        # 3. Ищем в заголовке страницы
+        if not product_name:
+            title_element = landmarks.title()
+            if title_element is not None:
+                product_name = get_text(title_element).strip()
+                product_name = product_name.replace(' - Penguin Magic Shop', '').strip()
+
+        if not product_name:
+            product_name = "Название не найдено"
+
+        # Извлекаем автора из названия
+        author = None
+        author_match = re.search(r'by\s+([^(]+?)(?:\s*\(|$)', product_name)
+        if author_match:
+            author = author_match.group(1).strip()
+
+        price = None  # Цена без скидки (List price)
+        discounted_price = None  # Цена со скидкой (Price)
+
+        # 1. Таблица product_price_details
+        price_table = landmarks.price_table()
+        if price_table is not None:
+            for row in FIND_ROWS(price_table):
+                cells = FIND_CELLS(row)
+                if len(cells) >= 2:
+                    label = get_text(cells[0], strip=True).lower()
+                    value_cell = cells[1]
+
+                    if 'list price' in label:
+                        strike_tag = _first(FIND_STRIKE, value_cell)
+                        if strike_tag is not None:
+                            try:
+                                price = float(re.sub(r'[^\d.]', '', get_text(strike_tag, strip=True)))
+                            except (ValueError, TypeError):
+                                pass
+                        elif not price:
+                            try:
+                                price = float(re.sub(r'[^\d.]', '', get_text(value_cell, strip=True)))
+                            except (ValueError, TypeError):
+                                pass
+
+                    elif 'price:' in label and 'ourprice' in _classes(value_cell):
+                        try:
+                            discounted_price = float(re.sub(r'[^\d.]', '', get_text(value_cell, strip=True)))
+                        except (ValueError, TypeError):
+                            pass
+
+        # 2. JSON-LD
+        if not price or not discounted_price:
+            for script in landmarks.ld_json_scripts():
+                try:
+                    # Script.string в BeautifulSoup - None, если у тега нет текста
+                    json_data = json.loads(script.text)
+                    if isinstance(json_data, dict):
+                        if 'offers' in json_data:
+                            offers = json_data['offers']
+                            if isinstance(offers, dict):
+                                if 'price' in offers and not discounted_price:
+                                    try:
+                                        discounted_price = float(offers['price'])
+                                    except (ValueError, TypeError):
+                                        pass
+                                if 'priceSpecification' in offers:
+                                    price_spec = offers['priceSpecification']
+                                    if isinstance(price_spec, dict) and 'price' in price_spec and not price:
+                                        try:
+                                            price = float(price_spec['price'])
+                                        except (ValueError, TypeError):
+                                            pass
+                            break
+                except (json.JSONDecodeError, ValueError, TypeError, AttributeError):
+                    continue
+
+        # 3. Нет цены без скидки - цена со скидкой становится основной
+        if not price and discounted_price:
+            price = discounted_price
+            discounted_price = None
+
+        # 4. Мета-теги
+        if not price:
+            meta_price = landmarks.meta('product:price:amount')
+            if meta_price is not None:
+                try:
+                    price = float(meta_price.get('content'))
+                except (ValueError, TypeError):
+                    pass
+
+        # 5. Элементы с ценой
+        if not price:
+            for index in range(len(PRICE_SELECTORS)):
+                price_element = landmarks.price_element(index)
+                if price_element is not None:
+                    try:
+                        price_text = get_text(price_element).strip()
+                        price_text = ''.join(filter(lambda x: x.isdigit() or x == '.', price_text))
+                        if price_text:
+                            price = float(price_text)
+                            break
+                    except (ValueError, TypeError):
+                        continue
+
+        # 6. Регулярные выражения по тексту страницы
+        if not price:
+            price = find_price_in_text(html if html is not None else lxml.html.tostring(tree, encoding='unicode'))
+
+        if not price:
+            logger.warning(f"Не удалось найти цену для продукта {url}")
+            price = 0.0
+
+        # URL изображения
+        image_url = None
+        meta_image = landmarks.meta('og:image')
+        if meta_image is not None:
+            image_url = meta_image.get('content')
+
+        # Описание
+        description = None
+        description_div = landmarks.description_div()
+        if description_div is not None:
+            product_subsection = _first(FIND_SUBSECTION, description_div)
+            if product_subsection is not None:
+                description_p = _first(FIND_P, product_subsection)
+                if description_p is not None:
+                    description = get_text(description_p, separator=' ', strip=True)
+                    description = ' '.join(description.split())
+
+        if not description:
+            description_meta = landmarks.meta('og:description')
+            if description_meta is not None:
+                description = description_meta.get('content').strip()
+
+        # Теги: div с float:left после product_addtocart, содержащий серые блоки
+        tags = []
+        tags_container = landmarks.tags_container()
+        if tags_container is not None:
+            for link in FIND_TAG_LINKS(tags_container):
+                tag_text = get_text(link, strip=True)
+                if tag_text:
+                    tags.append(tag_text)
+
+        tags = list(dict.fromkeys(tags))
+
+        reviews = extract_reviews(tree, landmarks, max_reviews)
+
+        product_info = {
+            'name': product_name,
+            'author': author,
+            'price': price,
+            'discounted_price': discounted_price,
+            'url': url,
+            'image_url': image_url,
+            'description': description,
+            'tags': tags,
+            'reviews': reviews,
+            'created_at': datetime.now(),
+            'updated_at': datetime.now()
+        }
+
+        logger.info(f"Извлечена информация о продукте: {product_name} (${price})")
+        return product_info
+
+    except Exception as e:
+        logger.error(f"Ошибка при извлечении информации о продукте {url}: {str(e)}")
+        return None
+
+def iter_parent_reviews(landmarks) -> Iterator:
+    """Родительские отзывы (не review_header) в порядке документа, лениво"""
+    for div in landmarks.review_divs():
+        if 'review_header' in _classes(div):
+            continue
+        if _first(FIND_REVIEW_HEADER, div) is not None or _first(FIND_REVIEW_BODY, div) is not None:
+            yield div
+
+def find_helpful_votes(review_div):
+    """Голоса "X of Y magicians found this helpful" из собственного текста отзыва"""
+    for text in FIND_OWN_TEXT(review_div):
+        helpful_match = HELPFUL_PATTERN.search(text)
+        if helpful_match:
+            return int(helpful_match.group(1)), int(helpful_match.group(2))
+    return None, None
+
+def extract_reviews(tree, landmarks=None, max_reviews: Optional[int] = None) -> List[Dict]:
+    """
+    Извлекает отзывы и оценки из дерева lxml.
+
+    Args:
+        tree: Корневой элемент lxml
+        landmarks: Опорные элементы страницы (по умолчанию XPathLandmarks)
+        max_reviews (int, optional): Максимум отзывов (None - все, 0 - только общая оценка)
+    """
+    if landmarks is None:
+        landmarks = XPathLandmarks(tree)
+    reviews = []
+
+    try:
+        parent_reviews = ()
+        if max_reviews != 0:
+            if landmarks.sorted_reviews() is None:
+                logger.debug("Контейнер sorted-reviews не найден")
+                return reviews
+            parent_reviews = iter_parent_reviews(landmarks)
+
+        for review_div in parent_reviews:
+            if max_reviews is not None and len(reviews) >= max_reviews:
+                break
+            rating = None
+            subject = None
+            date = None
+            verified_buyer = False
+            review_header = _first(FIND_REVIEW_HEADER, review_div)
+            if review_header is not None:
+                star_img = _first(FIND_STARS, review_header)
+                if star_img is not None:
+                    rating_match = re.search(r'(\d+)stars\.gif', star_img.get('src', ''))
+                    if rating_match:
+                        rating = int(rating_match.group(1))
+
+                subject_span = _first(FIND_SUBJECT, review_header)
+                if subject_span is not None:
+                    subject = get_text(subject_span, strip=True)
+
+                review_from = _first(FIND_REVIEW_FROM, review_header)
+                if review_from is not None:
+                    date_match = re.search(r'on\s+([A-Za-z]+\s+\d+[a-z]{0,2},\s+\d{4})', get_text(review_from))
+                    if date_match:
+                        date = date_match.group(1)
+                    verified_buyer = any('Verified buyer' in get_text(span) for span in FIND_VERIFIED(review_from))
+
+            review_text = None
+            review_body = _first(FIND_REVIEW_BODY, review_div)
+            if review_body is not None:
+                review_text = get_text(review_body, separator=' ', strip=True)
+                review_text = ' '.join(review_text.split())
+
+            helpful_count, helpful_total = find_helpful_votes(review_div)
+
+            if rating or review_text:
+                reviews.append({
+                    'rating': rating,
+                    'subject': subject,
+                    'text': review_text,
+                    'date': date,
+                    'verified_buyer': verified_buyer,
+                    'helpful_count': helpful_count,
+                    'helpful_total': helpful_total
+                })
+
+        logger.debug(f"Извлечено {len(reviews)} отзывов")
+
+        # Общая оценка из review_summary
+        review_summary = landmarks.review_summary()
+        if review_summary is not None:
+            summary_link = _first(FIND_SUMMARY_LINK, review_summary)
+            if summary_link is not None:
+                rating_match = re.search(r'([\d.]+)\s+stars?\s*/\s*(\d+)\s+reviews?', get_text(summary_link, strip=True))
+                if rating_match:
+                    reviews.insert(0, {
+                        'type': 'summary',
+                        'overall_rating': float(rating_match.group(1)),
+                        'total_reviews': int(rating_match.group(2))
+                    })
+
+    except Exception as e:
+        logger.error(f"Ошибка при извлечении отзывов: {str(e)}")
+
+    return reviews
@@ -0,0 +1,149 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+from . import fast_path
+from .async_fetcher import FetchedPage
+from .extraction import DEFAULT_PARSER_BACKEND, has_head, parse_product_page
+
+logger = logging.getLogger(__name__)
+
+class ParsedPage(NamedTuple):
+    """Результат разбора страницы"""
+    product_info: Optional[Dict]
+    fast_path_hit: bool  # Продукт получен из JSON-LD без построения дерева
+    live: bool  # Страница существует (есть продукт или <head>)
+
+def parse_html(page_number: int, url: str, html: str,
+               backend: str = DEFAULT_PARSER_BACKEND,
+               restricted: bool = False,
+               max_reviews: Optional[int] = None,
+               use_fast_path: bool = False) -> ParsedPage:
+    """
+    Разбор страницы: сначала быстрый путь (если включен), затем полный разбор.
+
+    Args:
+        page_number (int): Номер страницы
+        url (str): URL страницы
+        html (str): HTML страницы
+        backend (str): Парсер из PARSER_BACKENDS
+        restricted (bool): Строить только нужные области страницы
+        max_reviews (int, optional): Максимум отзывов
+        use_fast_path (bool): Пробовать извлечение из JSON-LD и мета-тегов
+
+    Returns:
+        ParsedPage: Продукт и признаки разбора
+    """
+    if use_fast_path:
+        product_info = fast_path.extract_product_info(html, url)
+        if product_info:
+            logger.info(f"Получена информация о продукте со страницы {page_number} (JSON-LD)")
+            return ParsedPage(product_info, True, True)
+    product_info = parse_product_page(page_number, url, html, backend, restricted, max_reviews)
+    return ParsedPage(product_info, False, product_info is not None or has_head(html))
+
+def parse_fetched_page(page_number: int, fetched: FetchedPage, options: Dict) -> ParsedPage:
+    """Декодирование и разбор загруженной страницы (выполняется в процессе-воркере)"""
+    return parse_html(page_number, fetched.url, fetched.text, **options)
+
+class FetchParsePipeline:
+    def __init__(self,
+                 fetch: Callable[[int], Tuple[Optional[FetchedPage], Optional[str]]],
+                 parse_options: Optional[Dict] = None,
+                 fetch_workers: int = 4,
+                 parse_workers: Optional[int] = None,
+                 queue_size: int = 32):
+        """
+        Конвейер загрузки и разбора страниц.
+
+        Потоки загрузки (ввод-вывод) передают тела ответов через ограниченную
+        очередь в пул процессов разбора (процессор), поэтому разбор
+        использует все ядра, пока сеть загружена. Заполненная очередь
+        останавливает загрузку, а число страниц в пуле не превышает
+        parse_workers * 2, так что память не растет при медленном разборе.
+
+        Args:
+            fetch: Загрузка страницы в потоке: номер -> (FetchedPage или None, класс ошибки)
+            parse_options (dict, optional): Аргументы parse_html (парсер, отзывы, быстрый путь)
+            fetch_workers (int): Количество потоков загрузки
+            parse_workers (int, optional): Количество процессов разбора (по умолчанию - число ядер)
+            queue_size (int): Емкость очереди загруженных страниц
+        """
+        self.fetch = fetch
+        self.parse_options = parse_options or {}
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count()
+        self.queue_size = queue_size
+
+    def run(self,
+            pages: Iterable[int],
+            on_page: Callable[[int, Optional[ParsedPage], Optional[str]], None]) -> None:
+        """
+        Загружает и разбирает страницы, передавая каждую в on_page (в вызывающем потоке).
+
+        Args:
+            pages: Номера страниц
+            on_page: Обработчик (номер страницы, ParsedPage или None, класс ошибки или None)
+        """
+        pages = iter(pages)
+        pages_lock = threading.Lock()
+        fetched_pages = queue.Queue(maxsize=self.queue_size)
+        done = object()
+
+        def fetch_worker():
+            try:
+                while True:
+                    with pages_lock:
+                        page = next(pages, None)
+                    if page is None:
+                        break
+                    try:
+                        fetched, error_kind = self.fetch(page)
+                    except Exception as e:
+                        logger.error(f"Ошибка при загрузке страницы {page}: {e}")
+                        fetched, error_kind = None, None
+                    fetched_pages.put((page, fetched, error_kind))
+            finally:
+                fetched_pages.put(done)
+
+        # spawn: fork при работающих потоках загрузки небезопасен
+        with ProcessPoolExecutor(max_workers=self.parse_workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            threads = [threading.Thread(target=fetch_worker, daemon=True) for _ in range(self.fetch_workers)]
+            for thread in threads:
+                thread.start()
+
+            pending = deque()
+            running = len(threads)
+            while running:
+                item = fetched_pages.get()
+                if item is done:
+                    running -= 1
+                    continue
+                page, fetched, error_kind = item
+                if fetched is None:
+                    on_page(page, None, error_kind)
+                    continue
+                pending.append((page, executor.submit(parse_fetched_page, page, fetched, self.parse_options)))
+                if len(pending) >= self.parse_workers * 2:
+                    self._complete(pending.popleft(), on_page)
+            while pending:
+                self._complete(pending.popleft(), on_page)
+
+            for thread in threads:
+                thread.join()
+
+    @staticmethod
+    def _complete(item, on_page) -> None:
+        """Ожидание разбора страницы и передача результата"""
+        page, future = item
+        try:
+            parsed = future.result()
+        except Exception as e:
+            logger.error(f"Ошибка при разборе страницы {page}: {e}")
+            parsed = None
+        on_page(page, parsed, None)
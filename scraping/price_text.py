@@ -0,0 +1,27 @@
+import re
+from typing import Optional
+
+# Шаблоны запасного поиска цены в тексте страницы, в порядке приоритета
+PRICE_PATTERNS = (
+    re.compile(r'\$(\d+\.?\d*)'),
+    re.compile(r'Price:\s*\$(\d+\.?\d*)'),
+    re.compile(r'price:\s*\$(\d+\.?\d*)')
+)
+
+def find_price_in_text(html: str) -> Optional[float]:
+    """
+    Поиск цены в исходном HTML страницы регулярными выражениями.
+
+    Выполняется по исходному тексту ответа, без сериализации дерева.
+
+    Returns:
+        float: Максимальная из найденных цен (обычно это реальная цена) или None
+    """
+    for pattern in PRICE_PATTERNS:
+        price_matches = pattern.findall(html)
+        if price_matches:
+            try:
+                return max(float(p) for p in price_matches)
+            except (ValueError, TypeError):
+                continue
+    return None
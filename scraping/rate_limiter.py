@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class AdaptiveRateLimiter:
+    def __init__(self,
+                 initial_rate: float = 0.5,
+                 min_rate: float = 0.1,
+                 max_rate: float = 5.0,
+                 increase_step: float = 0.05,
+                 decrease_factor: float = 0.5,
+                 latency_factor: float = 2.0,
+                 baseline_decay: float = 0.01,
+                 burst: int = 1,
+                 cooldown: float = 5.0):
+        """
+        Адаптивный ограничитель частоты запросов (token bucket + AIMD).
+
+        Пока ответы быстрые и успешные (2xx), частота растет аддитивно на increase_step.
+        Прочие 4xx и 500 частоту не меняют. При 429, 403 (так блокирует
+        Cloudflare), 5xx, таймаутах и росте задержки частота уменьшается
+        мультипликативно в decrease_factor раз, но не чаще одного раза за cooldown.
+        Базовая задержка сразу опускается до скользящей, а вверх подтягивается
+        медленно (на baseline_decay от разницы за ответ): случайный быстрый
+        ответ не делает обычный разброс задержек признаком перегрузки.
+        Экземпляр потокобезопасен и общий для всех режимов загрузки.
+
+        Args:
+            initial_rate (float): Начальная частота, запросов в секунду
+            min_rate (float): Минимальная частота
+            max_rate (float): Максимальная частота
+            increase_step (float): Прирост частоты после успешного ответа
+            decrease_factor (float): Множитель частоты при перегрузке сервера
+            latency_factor (float): Во сколько раз задержка может превысить базовую
+            baseline_decay (float): Скорость подтягивания базовой задержки к текущей
+            burst (int): Емкость корзины токенов
+            cooldown (float): Минимальный интервал между снижениями частоты, сек
+        """
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.baseline_decay = baseline_decay
+        self.burst = burst
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._latency_avg = None
+        self._latency_base = None
+
+    def reserve(self) -> float:
+        """
+        Резервирует токен и возвращает время ожидания до запроса.
+
+        Returns:
+            float: Сколько секунд нужно подождать перед запросом
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Блокирующее ожидание разрешения на запрос"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Ожидание разрешения на запрос внутри event loop"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, status: Optional[int], latency: Optional[float] = None, timed_out: bool = False) -> None:
+        """
+        Учитывает результат запроса и подстраивает частоту.
+
+        Args:
+            status (int, optional): HTTP-статус ответа (None при сетевой ошибке)
+            latency (float, optional): Время ответа в секундах
+            timed_out (bool): Запрос завершился по таймауту
+        """
+        with self._lock:
+            # 500 на этом сайте означает удаленный продукт, а не перегрузку
+            # 403 - блокировка защитой от ботов, реагируем как на 429
+            overloaded = timed_out or status in (403, 429) or (status is not None and status > 500)
+            if not overloaded and latency is not None:
+                overloaded = self._latency_rising(latency)
+
+            if overloaded:
+                self._decrease()
+            elif status is not None and 200 <= status < 300:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def _latency_rising(self, latency: float) -> bool:
+        """Обновляет скользящую задержку и проверяет ее рост относительно базовой"""
+        if self._latency_avg is None:
+            self._latency_avg = latency
+        else:
+            self._latency_avg = 0.8 * self._latency_avg + 0.2 * latency
+        if self._latency_base is None or self._latency_avg < self._latency_base:
+            self._latency_base = self._latency_avg
+        else:
+            self._latency_base += self.baseline_decay * (self._latency_avg - self._latency_base)
+        return self._latency_avg > self._latency_base * self.latency_factor
+
+    def _decrease(self) -> None:
+        """Мультипликативное снижение частоты (не чаще одного раза за cooldown)"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        new_rate = max(self.min_rate, self.rate * self.decrease_factor)
+        logger.warning(f"Снижение частоты запросов: {self.rate:.2f} -> {new_rate:.2f} запросов/сек")
+        self.rate = new_rate
@@ -0,0 +1,144 @@
+import asyncio
+import aiohttp
+import logging
+import random
+import requests
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Классы ошибок запроса
+CONNECT_ERROR = 'connect'  # Не удалось установить соединение
+READ_TIMEOUT = 'read_timeout'  # Сервер не ответил вовремя
+RATE_LIMITED = 'rate_limited'  # 429 Too Many Requests
+SERVER_ERROR = 'server_error'  # 5xx, кроме 500
+DELETED = 'deleted'  # 500 - на этом сайте означает удаленный продукт
+NOT_FOUND = 'not_found'  # 404/410 - страницы нет
+CLIENT_ERROR = 'client_error'  # Прочие 4xx (например, 403)
+
+RETRYABLE_ERRORS = {CONNECT_ERROR, READ_TIMEOUT, RATE_LIMITED, SERVER_ERROR}
+# Ошибки, означающие, что страницы с таким ID не существует
+DEAD_PAGE_ERRORS = {DELETED, NOT_FOUND}
+
+class RetryPolicy:
+    def __init__(self,
+                 max_retries: int = 3,
+                 base_delay: float = 1.0,
+                 max_delay: float = 60.0,
+                 budget_ratio: float = 0.1,
+                 budget_min: int = 10):
+        """
+        Политика повторных попыток: классификация ошибок, экспоненциальная
+        задержка с полным джиттером, поддержка Retry-After и общий бюджет повторов.
+
+        Бюджет ограничивает число повторов долей от числа исходных запросов
+        (budget_min + budget_ratio * запросы), чтобы при частичной недоступности
+        сайта повторы не умножали объем трафика. Retry-After соблюдается
+        полностью: если сервер просит ждать дольше max_delay, запрос не
+        повторяется, а завершается ошибкой. Экземпляр потокобезопасен.
+
+        Args:
+            max_retries (int): Максимальное количество повторов одного запроса
+            base_delay (float): Базовая задержка перед повтором, сек
+            max_delay (float): Максимальная задержка перед повтором (в т.ч. по Retry-After), сек
+            budget_ratio (float): Доля повторов от числа исходных запросов
+            budget_min (int): Количество повторов, доступных без учета доли
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+
+    @staticmethod
+    def classify_status(status: int) -> Optional[str]:
+        """
+        Классификация HTTP-статуса.
+
+        Returns:
+            str: Класс ошибки или None, если ответ успешный
+        """
+        if status < 400:
+            return None
+        if status == 429:
+            return RATE_LIMITED
+        if status == 500:
+            return DELETED
+        if status > 500:
+            return SERVER_ERROR
+        if status in (404, 410):
+            return NOT_FOUND
+        return CLIENT_ERROR
+
+    @staticmethod
+    def classify_exception(error: Exception) -> str:
+        """Классификация сетевой ошибки requests или aiohttp"""
+        if isinstance(error, (requests.ConnectionError, aiohttp.ClientConnectionError)):
+            # ConnectTimeout в requests - подкласс ConnectionError,
+            # а ServerTimeoutError в aiohttp - таймаут чтения
+            if isinstance(error, asyncio.TimeoutError):
+                return READ_TIMEOUT
+            return CONNECT_ERROR
+        if isinstance(error, (requests.Timeout, asyncio.TimeoutError)):
+            return READ_TIMEOUT
+        if isinstance(error, aiohttp.ClientResponseError):
+            return RetryPolicy.classify_status(error.status) or SERVER_ERROR
+        return CONNECT_ERROR
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Разбор заголовка Retry-After (секунды или HTTP-дата)"""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def record_request(self) -> None:
+        """Учитывает исходный (не повторный) запрос в бюджете"""
+        with self._lock:
+            self.requests += 1
+
+    def should_retry(self, kind: str, attempt: int, retry_after: Optional[float] = None) -> bool:
+        """
+        Решает, нужен ли повтор, и списывает его из бюджета.
+
+        Args:
+            kind (str): Класс ошибки
+            attempt (int): Номер уже выполненной попытки (с нуля)
+            retry_after (float, optional): Значение Retry-After из ответа, сек
+        """
+        if kind not in RETRYABLE_ERRORS or attempt >= self.max_retries:
+            return False
+        if retry_after is not None and retry_after > self.max_delay:
+            # Повтор раньше срока сервер все равно отклонит
+            logger.warning(f"Retry-After {retry_after:.0f} сек превышает максимальную задержку {self.max_delay:.0f} сек, повтора не будет")
+            return False
+        with self._lock:
+            if self.retries >= self.budget_min + self.budget_ratio * self.requests:
+                logger.warning(f"Исчерпан бюджет повторных попыток ({self.retries} повторов на {self.requests} запросов)")
+                return False
+            self.retries += 1
+            return True
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Задержка перед повтором: полный джиттер от экспоненциальной задержки,
+        но не меньше Retry-After (превышение max_delay отсекает should_retry).
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
@@ -0,0 +1,146 @@
+from typing import Dict, Iterator, List, Optional
+
+from . import lxml_extraction
+
+# Селекторы цены в порядке PRICE_SELECTORS: (тег, класс) -> индекс
+PRICE_CLASSES = {
+    ('span', 'price'): 0,
+    ('div', 'product-price'): 1,
+    ('span', 'regular-price'): 2,
+    ('div', 'price-box'): 3
+}
+ITEMPROP_PRICE_INDEX = 4
+COLLECTED_TAGS = ('div', 'span', 'meta', 'script', 'table', 'title')
+
+class SinglePassLandmarks:
+    def __init__(self, tree):
+        """
+        Опорные элементы страницы, собранные за один обход дерева.
+
+        Вместо отдельного поиска по всему дереву для каждого поля каждый
+        элемент посещается один раз и передается сборщикам по тегу, классу,
+        id и property. Интерфейс совпадает с XPathLandmarks, поэтому поля
+        извлекаются тем же кодом и результат не отличается.
+
+        Args:
+            tree: Корневой элемент lxml
+        """
+        self.tree = tree
+        self._first: Dict[str, object] = {}
+        self._meta: Dict[str, object] = {}
+        self._ld_json: List = []
+        self._price_elements: Dict[int, object] = {}
+        self._product_reviews: List = []
+        self._float_divs: List = []
+        self._gray_blocks: List = []
+        self._addtocart_order: Optional[int] = None
+        self._collect()
+
+    def _collect(self) -> None:
+        """Единственный обход дерева"""
+        first = self._first
+        # Отбор по тегам выполняется в lxml, в Python попадают только нужные элементы
+        for order, element in enumerate(self.tree.iter(*COLLECTED_TAGS)):
+            tag = element.tag
+            if tag == 'div':
+                element_id = element.get('id')
+                if element_id in ('product_description', 'sorted-reviews', 'review_summary') \
+                        and element_id not in first:
+                    first[element_id] = element
+
+                classes = element.get('class')
+                if classes:
+                    for name in classes.split():
+                        if name == 'product_review':
+                            self._product_reviews.append(element)
+                        elif name == 'product_addtocart' and self._addtocart_order is None:
+                            self._addtocart_order = order
+                        elif name == 'product-main' and 'product-main' not in first:
+                            first['product-main'] = element
+                        elif ('div', name) in PRICE_CLASSES:
+                            self._price_elements.setdefault(PRICE_CLASSES[('div', name)], element)
+
+                style = element.get('style')
+                if style:
+                    if 'float:left' in style:
+                        self._float_divs.append((order, element))
+                    if 'background:#aaa' in style and 'border:1px solid #999' in style:
+                        self._gray_blocks.append(element)
+
+            elif tag == 'span':
+                classes = element.get('class')
+                if classes:
+                    for name in classes.split():
+                        if ('span', name) in PRICE_CLASSES:
+                            self._price_elements.setdefault(PRICE_CLASSES[('span', name)], element)
+                if element.get('itemprop') == 'price':
+                    self._price_elements.setdefault(ITEMPROP_PRICE_INDEX, element)
+
+            elif tag == 'meta':
+                property = element.get('property')
+                if property is not None and property not in self._meta:
+                    self._meta[property] = element
+
+            elif tag == 'script':
+                if element.get('type') == 'application/ld+json':
+                    self._ld_json.append(element)
+
+            elif tag == 'table':
+                classes = element.get('class')
+                if classes and 'product_price_details' in classes.split() and 'price_table' not in first:
+                    first['price_table'] = element
+
+            elif tag == 'title' and 'title' not in first:
+                first['title'] = element
+
+    def product_main(self):
+        return self._first.get('product-main')
+
+    def meta(self, property: str):
+        return self._meta.get(property)
+
+    def title(self):
+        return self._first.get('title')
+
+    def price_table(self):
+        return self._first.get('price_table')
+
+    def ld_json_scripts(self) -> list:
+        return self._ld_json
+
+    def price_element(self, index: int):
+        return self._price_elements.get(index)
+
+    def description_div(self):
+        return self._first.get('product_description')
+
+    def tags_container(self):
+        """Первый div с float:left после product_addtocart вне browse_menu, содержащий серые блоки"""
+        if self._addtocart_order is None or not self._gray_blocks:
+            return None
+        # Контейнеры серых блоков - их предки, а не сами блоки
+        with_gray_blocks = set()
+        for block in self._gray_blocks:
+            with_gray_blocks.update(block.iterancestors('div'))
+        for order, element in self._float_divs:
+            if order <= self._addtocart_order or element not in with_gray_blocks:
+                continue
+            if any(ancestor.get('id') == 'browse_menu' for ancestor in element.iterancestors('div')):
+                continue
+            return element
+        return None
+
+    def sorted_reviews(self):
+        return self._first.get('sorted-reviews')
+
+    def review_divs(self) -> Iterator:
+        """div.product_review внутри sorted-reviews (лениво, для ограничения числа отзывов)"""
+        container = self.sorted_reviews()
+        return (div for div in self._product_reviews if container in div.iterancestors('div'))
+
+    def review_summary(self):
+        return self._first.get('review_summary')
+
+def extract_product_info(tree, url, html: Optional[str] = None, max_reviews: Optional[int] = None):
+    """Извлечение информации о продукте за один обход дерева"""
+    return lxml_extraction.extract_product_info(tree, url, SinglePassLandmarks(tree), html, max_reviews)
@@ -0,0 +1,17 @@
+import os
+from pathlib import Path
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """
+    Атомарная запись файла: данные пишутся во временный файл рядом
+    и заменяют исходный только после fsync, поэтому при аварийном
+    завершении на диске остается либо старая, либо новая версия.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,220 @@
+"""
+Сквозной бенчмарк обхода: PenguinMagicScraper против локальной имитации сайта.
+
+Для каждого сочетания режима загрузки и числа воркеров измеряет:
+страниц в секунду, задержку страницы (p50/p95/p99), процессорное время
+на страницу, пиковый RSS и время сохранения в Excel и базу данных.
+Результаты записываются в JSON для сравнения между версиями.
+
+Запуск:
+    python tests/benchmark_crawl.py --start 1 --end 500 --modes sequential threads async pipeline --workers 4 8
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from tests.mock_server import MockPenguinServer
+
+OUTPUT_DIR = Path(__file__).parent / "output"
+
+def percentile(values: List[float], percent: float) -> Optional[float]:
+    """Перцентиль методом ближайшего ранга"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+def peak_rss_mb() -> Optional[float]:
+    """Пиковый RSS текущего процесса в МБ"""
+    if resource is None:
+        return None
+    # На Linux ru_maxrss в килобайтах, на macOS - в байтах
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+
+def children_cpu_time() -> float:
+    """Процессорное время завершившихся дочерних процессов (воркеры разбора в режиме 'pipeline')"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def run_case(base_url: str, fetch_mode: str, workers: int, start_page: int, end_page: int,
+             save_to_db: bool, rate: float) -> Dict:
+    """
+    Один прогон скрапера в отдельном процессе (чтобы пиковый RSS и
+    процессорное время не смешивались с другими прогонами и сервером).
+
+    Returns:
+        dict: Измерения прогона
+    """
+    from config import SCRAPER_CONFIG
+    from optimized_scraper import PenguinMagicScraper
+    from scraping.checkpoint import CrawlCheckpoint
+
+    # Предупреждения о каждой удаленной странице искажают замеры
+    logging.getLogger().setLevel(logging.ERROR)
+
+    class TimedCheckpoint(CrawlCheckpoint):
+        """Чекпоинт в памяти, фиксирующий время обработки каждой страницы"""
+
+        def __init__(self):
+            super().__init__()
+            self.started_at = {}
+            self.latencies = []
+
+        def start(self, page_id):
+            self.started_at[page_id] = time.perf_counter()
+            super().start(page_id)
+
+        def finish(self, page_id, has_product):
+            started = self.started_at.pop(page_id, None)
+            if started is not None:
+                self.latencies.append(time.perf_counter() - started)
+            super().finish(page_id, has_product)
+
+    class TimedScraper(PenguinMagicScraper):
+        """Скрапер с замером времени сохранения"""
+
+        def __init__(self, config):
+            super().__init__(config)
+            self.sink_time = {'excel': 0.0, 'database': 0.0}
+
+        def save_to_excel(self, filename):
+            started = time.perf_counter()
+            try:
+                super().save_to_excel(filename)
+            finally:
+                self.sink_time['excel'] += time.perf_counter() - started
+
+        def save_to_database(self, products):
+            started = time.perf_counter()
+            try:
+                return super().save_to_database(products)
+            finally:
+                self.sink_time['database'] += time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = dict(
+            SCRAPER_CONFIG,
+            base_url=base_url,
+            start_page=start_page,
+            end_page=end_page,
+            discover_end_page=False,
+            fetch_mode=fetch_mode,
+            workers=workers,
+            concurrency=workers,
+            per_host_concurrency=workers,
+            save_to_db=save_to_db,
+            excel_output=str(Path(tmp) / "products.xlsx"),
+            archive_dir=None,
+            dead_ids_file=None,
+            checkpoint_file=None,
+            rate_limit=dict(SCRAPER_CONFIG['rate_limit'], initial_rate=rate, max_rate=rate, burst=workers)
+        )
+        scraper = TimedScraper(config)
+        scraper.checkpoint = TimedCheckpoint()
+
+        cpu_started = time.process_time() + children_cpu_time()
+        started = time.perf_counter()
+        scraper.run()
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() + children_cpu_time() - cpu_started
+
+    latencies = scraper.checkpoint.latencies
+    pages = len(latencies)
+    return {
+        'fetch_mode': fetch_mode,
+        'workers': workers,
+        'pages': pages,
+        'products': len(scraper.products),
+        'elapsed_sec': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+            'p95': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+            'p99': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            'mean': round(statistics.mean(latencies) * 1000, 2) if latencies else None
+        },
+        'cpu_ms_per_page': round(cpu / pages * 1000, 2) if pages else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1) if resource else None,
+        'sink_sec': {name: round(value, 3) for name, value in scraper.sink_time.items()},
+        'retries': scraper.retry_policy.retries
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк обхода через локальную имитацию сайта")
+    parser.add_argument('--start', type=int, default=1, help="Первый ID")
+    parser.add_argument('--end', type=int, default=200, help="Последний ID")
+    parser.add_argument('--modes', nargs='+', default=['sequential', 'threads', 'async', 'pipeline'],
+                        help="Режимы загрузки")
+    parser.add_argument('--workers', type=int, nargs='+', default=[4], help="Количество воркеров")
+    parser.add_argument('--rate', type=float, default=1000.0, help="Лимит запросов в секунду")
+    parser.add_argument('--latency', type=float, default=0.02, help="Задержка сервера в секундах")
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help="Случайная добавка к задержке")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля ошибок 503")
+    parser.add_argument('--deleted-ratio', type=float, default=0.2, help="Доля удаленных продуктов")
+    parser.add_argument('--db', action='store_true', help="Сохранять продукты в базу данных")
+    parser.add_argument('--output', default=str(OUTPUT_DIR / "benchmark_crawl.json"), help="Файл результатов")
+    args = parser.parse_args()
+
+    server_params = {
+        'latency': args.latency,
+        'latency_jitter': args.latency_jitter,
+        'error_rate': args.error_rate,
+        'deleted_ratio': args.deleted_ratio,
+        'retry_after': 0
+    }
+    results = []
+    with MockPenguinServer(**server_params) as server:
+        for fetch_mode in args.modes:
+            # В последовательном режиме число воркеров не используется
+            for workers in ([1] if fetch_mode == 'sequential' else args.workers):
+                # Каждый прогон в новом процессе: пиковый RSS считается отдельно
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                    result = executor.submit(run_case, server.base_url, fetch_mode, workers,
+                                             args.start, args.end, args.db, args.rate).result()
+                results.append(result)
+                print(f"{fetch_mode:<10} workers={workers:<3} {result['pages_per_sec']:>8} стр/с  "
+                      f"p50={result['latency_ms']['p50']} p95={result['latency_ms']['p95']} "
+                      f"p99={result['latency_ms']['p99']} мс  CPU={result['cpu_ms_per_page']} мс/стр  "
+                      f"RSS={result['peak_rss_mb']} МБ  Excel={result['sink_sec']['excel']} с  "
+                      f"БД={result['sink_sec']['database']} с")
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'pages': {'start': args.start, 'end': args.end},
+        'server': server_params,
+        'rate': args.rate,
+        'save_to_db': args.db,
+        'results': results
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"Результаты сохранены в {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Микробенчмарк разбора сохраненных страниц с контролем регрессий.
+
+Для каждой страницы из tests/fixtures и каждого парсера измеряет:
+разбор страницы целиком (parse_product_page), extract_product_info и
+extract_reviews по готовому дереву, а также отдельные стратегии извлечения
+полей (таблица цен, JSON-LD, теги, отзывы, поиск цены в тексте).
+Для каждого замера выводятся операций в секунду, пиковый объем памяти,
+выделенной за один вызов, и число блоков, оставшихся выделенными после
+вызова (tracemalloc учитывает только память Python: деревья lxml строятся
+в libxml2 и в замер не попадают).
+
+Результаты сравниваются с сохраненной базовой линией: если замер медленнее
+базового больше чем на --threshold или выделяет больше памяти больше чем
+на --alloc-threshold, скрипт завершается с кодом 1. Скорость машины
+оценивается эталонной нагрузкой в начале и в конце прогона, и базовые
+значения масштабируются на нее, чтобы общая загрузка машины не выглядела
+как регрессия.
+
+Запуск:
+    python tests/benchmark_parsing.py                   # сравнение с базовой линией
+    python tests/benchmark_parsing.py --save-baseline   # обновление базовой линии
+    python tests/benchmark_parsing.py --backends lxml-single-pass --fixtures page_10016
+"""
+import argparse
+import gc
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraping import fast_path, lxml_extraction, single_pass
+from scraping.extraction import (
+    LXML_EXTRACTORS, PARSER_BACKENDS, build_soup, extract_product_info, extract_reviews,
+    find_tags_container, parse_product_page
+)
+from scraping.price_text import find_price_in_text
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+OUTPUT_DIR = Path(__file__).parent / "output"
+BASELINE_FILE = FIXTURES_DIR / "benchmark_parsing_baseline.json"
+URL = "https://www.penguinmagic.com/p/1"
+
+def bs4_ld_json(soup) -> list:
+    """Разбор JSON-LD через дерево BeautifulSoup"""
+    return [json.loads(script.string) for script in soup.find_all('script', {'type': 'application/ld+json'})]
+
+def lxml_ld_json(landmarks) -> list:
+    """Разбор JSON-LD через опорные элементы lxml"""
+    return [json.loads(script.text) for script in landmarks.ld_json_scripts()]
+
+def build_cases(html: str, backend: str) -> Dict[str, Callable[[], object]]:
+    """
+    Замеряемые операции для страницы и парсера.
+
+    Деревья строятся заранее, поэтому замеры extract_* и стратегий полей
+    не включают время построения дерева (оно входит только в 'page').
+    """
+    cases = {'page': lambda: parse_product_page(1, URL, html, backend)}
+
+    if backend in LXML_EXTRACTORS:
+        tree = lxml_extraction.build_tree(html)
+        landmarks_class = (single_pass.SinglePassLandmarks if backend == 'lxml-single-pass'
+                           else lxml_extraction.XPathLandmarks)
+        extract = LXML_EXTRACTORS[backend]
+        # Опорные элементы собираются заново в каждом вызове, как при разборе страницы
+        cases.update({
+            'extract_product_info': lambda: extract(tree, URL, html=html),
+            'extract_reviews': lambda: lxml_extraction.extract_reviews(tree, landmarks_class(tree)),
+            'field:price_table': lambda: landmarks_class(tree).price_table(),
+            'field:ld_json': lambda: lxml_ld_json(landmarks_class(tree)),
+            'field:tags': lambda: landmarks_class(tree).tags_container()
+        })
+    else:
+        soup = build_soup(html, backend)
+        cases.update({
+            'extract_product_info': lambda: extract_product_info(soup, URL, html),
+            'extract_reviews': lambda: extract_reviews(soup),
+            'field:price_table': lambda: soup.find('table', class_='product_price_details'),
+            'field:ld_json': lambda: bs4_ld_json(soup),
+            'field:tags': lambda: find_tags_container(soup)
+        })
+
+    # Стратегии по исходному HTML не зависят от парсера
+    if backend == PARSER_BACKENDS[0]:
+        cases.update({
+            'raw:price_text': lambda: find_price_in_text(html),
+            'raw:fast_path': lambda: fast_path.extract_product_info(html, URL)
+        })
+    return cases
+
+def measure_speed(function: Callable[[], object], min_time: float, repeat: int) -> float:
+    """
+    Операций в секунду: лучший из repeat замеров длительностью не меньше min_time.
+
+    Число вызовов в замере подбирается так же, как в timeit.autorange;
+    сборщик мусора на время замера отключается, как в timeit.
+    """
+    def timed(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        return time.perf_counter() - started
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        while True:
+            elapsed = timed(number)
+            if elapsed >= min_time:
+                break
+            number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+        best = min([elapsed] + [timed(number) for _ in range(repeat - 1)]) / number
+    finally:
+        if gc_enabled:
+            gc.enable()
+        gc.collect()
+    return 1 / best if best else float('inf')
+
+def calibration_workload() -> int:
+    """Эталонная нагрузка, не зависящая от кода проекта (разбор HTML и работа со строками)"""
+    html = '<div class="a"><p>' + '<span>text</span>' * 200 + '</p></div>'
+    tree = lxml_extraction.build_tree(html)
+    return sum(len(text.strip().lower()) for text in tree.itertext())
+
+def calibrate(min_time: float, repeat: int) -> float:
+    """Скорость эталонной нагрузки, операций в секунду"""
+    return measure_speed(calibration_workload, min_time, repeat)
+
+def measure_allocations(function: Callable[[], object]) -> Dict[str, float]:
+    """Пиковый объем памяти за один вызов и число блоков, оставшихся выделенными (включая результат)"""
+    function()  # Прогрев: кэши и ленивые импорты не считаются
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    return {'peak_kb': round(peak / 1024, 1), 'blocks': blocks}
+
+def run(fixtures: List[Path], backends: List[str], min_time: float, repeat: int) -> Dict[str, Dict]:
+    """
+    Замеры для всех сочетаний страницы, парсера и операции.
+
+    Returns:
+        dict: {"страница/парсер/операция": {"ops_per_sec", "peak_kb", "blocks"}}
+    """
+    results = {}
+    for fixture in fixtures:
+        html = fixture.read_text(encoding='utf-8')
+        for backend in backends:
+            for name, function in build_cases(html, backend).items():
+                key = f"{fixture.stem}/{backend}/{name}"
+                result = {'ops_per_sec': round(measure_speed(function, min_time, repeat), 1)}
+                result.update(measure_allocations(function))
+                results[key] = result
+                print(f"{key:<60} {result['ops_per_sec']:>10} оп/с  {result['peak_kb']:>9} КБ  "
+                      f"{result['blocks']:>7} блоков")
+    return results
+
+def remeasure(key: str, min_time: float, repeat: int) -> float:
+    """Повторный замер скорости одной операции (для подтверждения регрессии)"""
+    fixture, backend, name = key.split('/', 2)
+    html = (FIXTURES_DIR / f"{fixture}.html").read_text(encoding='utf-8')
+    return round(measure_speed(build_cases(html, backend)[name], min_time, repeat), 1)
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            threshold: float, alloc_threshold: float, speed_factor: float = 1.0) -> List[Tuple[str, str]]:
+    """
+    Сравнение с базовой линией.
+
+    Args:
+        results (dict): Текущие замеры
+        baseline (dict): Замеры базовой линии
+        threshold (float): Допустимое замедление
+        alloc_threshold (float): Допустимый рост пика памяти
+        speed_factor (float): Скорость машины относительно базовой линии (по эталонной нагрузке)
+
+    Returns:
+        list: Пары (операция, описание регрессии); пустой, если регрессий нет
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        expected = base['ops_per_sec'] * speed_factor
+        slowdown = expected / result['ops_per_sec'] - 1 if result['ops_per_sec'] else float('inf')
+        if slowdown > threshold:
+            regressions.append((key, f"{result['ops_per_sec']} оп/с против {expected:.1f} "
+                                     f"(медленнее на {slowdown:.0%})"))
+        # Небольшие объемы не сравниваются: там заметны колебания сборщика мусора
+        if base['peak_kb'] >= 16 and result['peak_kb'] > base['peak_kb'] * (1 + alloc_threshold):
+            regressions.append((key, f"пик памяти {result['peak_kb']} КБ против {base['peak_kb']} КБ"))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарк разбора страниц с контролем регрессий")
+    parser.add_argument('--backends', nargs='+', default=list(PARSER_BACKENDS), help="Парсеры")
+    parser.add_argument('--fixtures', nargs='+', help="Имена страниц из tests/fixtures (без .html)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Минимальная длительность замера, сек")
+    parser.add_argument('--repeat', type=int, default=5, help="Количество замеров (берется лучший)")
+    parser.add_argument('--baseline', default=str(BASELINE_FILE), help="Файл базовой линии")
+    parser.add_argument('--threshold', type=float, default=0.50, help="Допустимое замедление (0.50 = 50%%)")
+    parser.add_argument('--alloc-threshold', type=float, default=0.10, help="Допустимый рост пика памяти")
+    parser.add_argument('--confirm', type=int, default=2, help="Повторных замеров для подтверждения регрессии")
+    parser.add_argument('--save-baseline', action='store_true', help="Сохранить результаты как базовую линию")
+    parser.add_argument('--output', default=str(OUTPUT_DIR / "benchmark_parsing.json"), help="Файл результатов")
+    args = parser.parse_args()
+
+    unknown = set(args.backends) - set(PARSER_BACKENDS)
+    if unknown:
+        parser.error(f"Неизвестные парсеры: {', '.join(sorted(unknown))}")
+    fixtures = sorted(FIXTURES_DIR.glob("page_*.html"))
+    if args.fixtures:
+        fixtures = [fixture for fixture in fixtures if fixture.stem in args.fixtures]
+    if not fixtures:
+        parser.error("Не найдены страницы для замеров")
+
+    # Сообщения парсера о каждом продукте искажают замеры
+    logging.disable(logging.CRITICAL)
+    calibration_started = calibrate(args.min_time, args.repeat)
+    results = run(fixtures, args.backends, args.min_time, args.repeat)
+    calibration = round((calibration_started + calibrate(args.min_time, args.repeat)) / 2, 1)
+    print(f"Эталонная нагрузка: {calibration} оп/с")
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'calibration_ops_per_sec': calibration,
+        'results': results
+    }
+    output = Path(args.baseline if args.save_baseline else args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"Результаты сохранены в {output}")
+    if args.save_baseline:
+        return
+
+    baseline_file = Path(args.baseline)
+    if not baseline_file.exists():
+        print(f"Базовая линия {baseline_file} не найдена, сравнение пропущено")
+        return
+    baseline = json.loads(baseline_file.read_text(encoding='utf-8'))
+    speed_factor = calibration / baseline['calibration_ops_per_sec'] if baseline.get('calibration_ops_per_sec') else 1.0
+    print(f"Скорость машины относительно базовой линии: {speed_factor:.2f}")
+    regressions = compare(results, baseline['results'], args.threshold, args.alloc_threshold, speed_factor)
+    # Единичные выбросы (работа других процессов) не считаются регрессией:
+    # медленные операции замеряются повторно и берется лучший результат
+    for _ in range(args.confirm):
+        suspects = {key for key, _ in regressions}
+        if not suspects:
+            break
+        print(f"Повторный замер {len(suspects)} операций...")
+        for key in suspects:
+            results[key]['ops_per_sec'] = max(results[key]['ops_per_sec'],
+                                              remeasure(key, args.min_time, args.repeat))
+        regressions = compare(results, baseline['results'], args.threshold, args.alloc_threshold, speed_factor)
+
+    if regressions:
+        print(f"Регрессии относительно {baseline_file} ({baseline.get('platform')}):")
+        for key, description in regressions:
+            print(f"  {key}: {description}")
+        sys.exit(1)
+    print(f"Регрессий нет (порог времени {args.threshold:.0%}, памяти {args.alloc_threshold:.0%})")
+
+if __name__ == '__main__':
+    main()
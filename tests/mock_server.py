@@ -0,0 +1,264 @@
+"""
+Локальная имитация сайта Penguin Magic для нагрузочного тестирования.
+
+Отдает сохраненные страницы из tests/fixtures по произвольным адресам /p/<id>
+с настраиваемой задержкой, долей ошибок, удаленных продуктов и всплесками 429.
+
+Запуск:
+    python tests/mock_server.py --port 8799 --latency 0.05 --deleted-ratio 0.2
+"""
+import argparse
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+PAGE_PATTERN = re.compile(r'^/p/(\d+)/?$')
+FIXTURE_PATTERN = re.compile(r'page_(\d+)\.html$')
+
+# Заглушка отсутствующего продукта: сайт отдает 200 без <head>
+STUB_PAGE = b'<html><body><p>Product not found</p></body></html>'
+DELETED_PAGE = b'<html><head><title>Error</title></head><body>Internal Server Error</body></html>'
+
+class MockPenguinServer:
+    def __init__(self,
+                 port: int = 0,
+                 latency: float = 0.0,
+                 latency_jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 deleted_ratio: float = 0.0,
+                 stub_ratio: float = 0.0,
+                 max_id: Optional[int] = None,
+                 burst_limit: Optional[int] = None,
+                 burst_window: float = 1.0,
+                 retry_after: Optional[int] = 1,
+                 seed: int = 0,
+                 fixtures_dir: Path = FIXTURES_DIR):
+        """
+        Имитация сайта с настраиваемым поведением.
+
+        Состав каталога детерминирован: удаленный ID остается удаленным
+        при повторных запросах, поэтому прогоны воспроизводимы. Случайными
+        являются только временные ошибки 503.
+
+        Args:
+            port (int): Порт (0 - выбрать свободный)
+            latency (float): Задержка ответа в секундах
+            latency_jitter (float): Случайная добавка к задержке (от 0 до latency_jitter)
+            error_rate (float): Доля временных ошибок 503
+            deleted_ratio (float): Доля ID, для которых возвращается 500 (удаленный продукт)
+            stub_ratio (float): Доля ID, для которых возвращается страница без <head>
+            max_id (int, optional): ID выше этого значения возвращают 500
+            burst_limit (int, optional): Максимум запросов за burst_window, сверх - 429
+            burst_window (float): Окно подсчета запросов для 429 в секундах
+            retry_after (int, optional): Значение заголовка Retry-After в секундах для 429 и 503
+            seed (int): Начальное значение для состава каталога и ошибок
+            fixtures_dir (Path): Директория с сохраненными страницами
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.deleted_ratio = deleted_ratio
+        self.stub_ratio = stub_ratio
+        self.max_id = max_id
+        self.burst_limit = burst_limit
+        self.burst_window = burst_window
+        self.retry_after = retry_after
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.fixtures = self._load_fixtures(Path(fixtures_dir))
+        self.stats = Counter()
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @staticmethod
+    def _load_fixtures(fixtures_dir: Path) -> list:
+        """Загрузка страниц: (ID исходной страницы, HTML)"""
+        fixtures = []
+        for path in sorted(fixtures_dir.glob('page_*.html')):
+            match = FIXTURE_PATTERN.search(path.name)
+            if match:
+                fixtures.append((match.group(1).encode(), path.read_bytes()))
+        if not fixtures:
+            raise FileNotFoundError(f"Не найдены страницы в {fixtures_dir}")
+        return fixtures
+
+    @property
+    def port(self) -> int:
+        """Фактический порт сервера"""
+        return self.httpd.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        """Базовый URL страниц продуктов (для SCRAPER_CONFIG['base_url'])"""
+        return f"http://127.0.0.1:{self.port}/p/"
+
+    def page_kind(self, page_id: int) -> str:
+        """
+        Детерминированный тип страницы по ID.
+
+        Returns:
+            str: 'product', 'deleted' или 'stub'
+        """
+        if self.max_id is not None and page_id > self.max_id:
+            return 'deleted'
+        value = random.Random(self.seed * 1000003 + page_id).random()
+        if value < self.deleted_ratio:
+            return 'deleted'
+        if value < self.deleted_ratio + self.stub_ratio:
+            return 'stub'
+        return 'product'
+
+    def render_page(self, page_id: int) -> bytes:
+        """Синтетический вариант страницы: сохраненная страница с подставленным ID"""
+        fixture_id, html = self.fixtures[page_id % len(self.fixtures)]
+        return html.replace(b'/p/' + fixture_id, b'/p/' + str(page_id).encode())
+
+    def _rate_limited(self) -> bool:
+        """Проверка превышения лимита запросов в скользящем окне"""
+        if self.burst_limit is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > self.burst_window:
+                self._recent.popleft()
+            if len(self._recent) >= self.burst_limit:
+                return True
+            self._recent.append(now)
+            return False
+
+    def _transient_error(self) -> bool:
+        """Случайная временная ошибка"""
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+    def respond(self, path: str):
+        """
+        Формирование ответа на запрос.
+
+        Returns:
+            tuple: (статус, заголовки, тело)
+        """
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        match = PAGE_PATTERN.match(path.split('?', 1)[0])
+        if not match:
+            return 404, headers, b'Not Found'
+
+        if self._rate_limited():
+            if self.retry_after is not None:
+                headers['Retry-After'] = str(self.retry_after)
+            return 429, headers, b'Too Many Requests'
+
+        if self._transient_error():
+            if self.retry_after is not None:
+                headers['Retry-After'] = str(self.retry_after)
+            return 503, headers, b'Service Unavailable'
+
+        page_id = int(match.group(1))
+        kind = self.page_kind(page_id)
+        if kind == 'deleted':
+            return 500, headers, DELETED_PAGE
+        if kind == 'stub':
+            return 200, headers, STUB_PAGE
+        return 200, headers, self.render_page(page_id)
+
+    def _make_handler(self):
+        """Класс обработчика, привязанный к этому серверу"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                delay = server.latency
+                if server.latency_jitter:
+                    delay += random.uniform(0, server.latency_jitter)
+                if delay:
+                    time.sleep(delay)
+
+                status, headers, body = server.respond(self.path)
+                with server._lock:
+                    server.stats['requests'] += 1
+                    server.stats[status] += 1
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'MockPenguinServer':
+        """Запуск сервера в фоновом потоке"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Остановка сервера"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная имитация сайта Penguin Magic")
+    parser.add_argument('--port', type=int, default=8799, help="Порт сервера")
+    parser.add_argument('--latency', type=float, default=0.0, help="Задержка ответа в секундах")
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help="Случайная добавка к задержке")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля временных ошибок 503")
+    parser.add_argument('--deleted-ratio', type=float, default=0.0, help="Доля удаленных продуктов (500)")
+    parser.add_argument('--stub-ratio', type=float, default=0.0, help="Доля страниц без <head>")
+    parser.add_argument('--max-id', type=int, help="Максимальный существующий ID")
+    parser.add_argument('--burst-limit', type=int, help="Максимум запросов за окно, сверх - 429")
+    parser.add_argument('--burst-window', type=float, default=1.0, help="Окно подсчета запросов в секундах")
+    parser.add_argument('--retry-after', type=int, default=1, help="Значение заголовка Retry-After")
+    parser.add_argument('--seed', type=int, default=0, help="Начальное значение генератора")
+    args = parser.parse_args()
+
+    server = MockPenguinServer(
+        port=args.port,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        deleted_ratio=args.deleted_ratio,
+        stub_ratio=args.stub_ratio,
+        max_id=args.max_id,
+        burst_limit=args.burst_limit,
+        burst_window=args.burst_window,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    print(f"Сервер запущен: {server.base_url}<id>")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Статистика: {dict(server.stats)}")
+
+if __name__ == '__main__':
+    main()
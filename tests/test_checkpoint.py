@@ -0,0 +1,143 @@
+"""
+Тесты чекпоинта обхода
+"""
+import unittest
+from pathlib import Path
+import sys
+import tempfile
+import json
+import logging
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import SCRAPER_CONFIG
+from optimized_scraper import PenguinMagicScraper
+from scraping.checkpoint import CrawlCheckpoint, from_ranges, to_ranges
+from tests.mock_server import MockPenguinServer
+
+class TestRanges(unittest.TestCase):
+    """Тесты сжатия множества ID в диапазоны"""
+
+    def test_roundtrip(self):
+        """Диапазоны разворачиваются в исходное множество"""
+        ids = {1, 2, 3, 7, 9, 10, 11, 20}
+        self.assertEqual(to_ranges(ids), [[1, 3], [7, 7], [9, 11], [20, 20]])
+        self.assertEqual(from_ranges(to_ranges(ids)), ids)
+
+class TestCrawlCheckpoint(unittest.TestCase):
+    """Тесты завершения страниц и продолжения после перезапуска"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "checkpoint.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_page_without_product_completes_immediately(self):
+        """Страница без продукта завершается без сохранения данных"""
+        checkpoint = CrawlCheckpoint()
+        checkpoint.start(7920)
+        checkpoint.finish(7920, has_product=False)
+        self.assertTrue(checkpoint.is_completed(7920))
+
+    def test_product_page_completes_on_commit(self):
+        """Страница с продуктом завершается только после сохранения"""
+        checkpoint = CrawlCheckpoint(self.path)
+        checkpoint.start(7921)
+        checkpoint.finish(7921, has_product=True)
+        self.assertFalse(checkpoint.is_completed(7921))
+        checkpoint.commit()
+        self.assertTrue(checkpoint.is_completed(7921))
+
+    def test_partial_commit(self):
+        """Завершаются только страницы, продукты которых уже сохранены"""
+        checkpoint = CrawlCheckpoint()
+        for page in (1, 2, 3):
+            checkpoint.start(page)
+            checkpoint.finish(page, has_product=True)
+        checkpoint.commit([1, 3, 4])
+        self.assertEqual([checkpoint.is_completed(page) for page in (1, 2, 3, 4)], [True, False, True, False])
+        checkpoint.commit()
+        self.assertTrue(checkpoint.is_completed(2))
+
+    def test_resume_after_crash(self):
+        """После падения повторяются только несохраненные и неудачные страницы"""
+        checkpoint = CrawlCheckpoint(self.path)
+        for page in range(1, 6):
+            checkpoint.start(page)
+            checkpoint.finish(page, has_product=True)
+        checkpoint.commit()
+        checkpoint.start(6)
+        checkpoint.finish(6, has_product=True)  # продукт еще не сохранен
+        checkpoint.start(7)
+        checkpoint.fail(7)
+        checkpoint.start(8)  # загрузка прервана
+        checkpoint.save()
+
+        state = json.loads(self.path.read_text(encoding='utf-8'))
+        self.assertEqual(state['completed'], [[1, 5]])
+        self.assertEqual(state['in_flight'], [6, 8])
+        self.assertEqual(state['failed'], [7])
+
+        resumed = CrawlCheckpoint(self.path)
+        remaining = [page for page in range(1, 10) if not resumed.is_completed(page)]
+        self.assertEqual(remaining, [6, 7, 8, 9])
+
+    def test_failed_page_is_not_completed(self):
+        """Неудачная страница не завершается при finish"""
+        checkpoint = CrawlCheckpoint()
+        checkpoint.start(10)
+        checkpoint.fail(10)
+        checkpoint.finish(10, has_product=False)
+        self.assertFalse(checkpoint.is_completed(10))
+
+    def test_resume_disabled(self):
+        """При resume=False существующий чекпоинт игнорируется"""
+        checkpoint = CrawlCheckpoint(self.path)
+        checkpoint.finish(1, has_product=False)
+        checkpoint.save()
+        self.assertFalse(CrawlCheckpoint(self.path, resume=False).is_completed(1))
+
+class TestCheckpointAcrossRuns(unittest.TestCase):
+    """Чекпоинт продолжает только прерванный обход"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "checkpoint.json"
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        self.tmp.cleanup()
+
+    def test_second_run_after_success_crawls_again(self):
+        """После успешного обхода следующий запуск снова загружает весь диапазон"""
+        with MockPenguinServer(seed=3) as server:
+            config = dict(
+                SCRAPER_CONFIG,
+                base_url=server.base_url,
+                start_page=1,
+                end_page=10,
+                fetch_mode='sequential',
+                save_to_db=False,
+                excel_output=str(Path(self.tmp.name) / "products.xlsx"),
+                archive_dir=None,
+                dead_ids_file=None,
+                checkpoint_file=str(self.path),
+                resume=True,
+                retry_delay=0,
+                rate_limit=dict(SCRAPER_CONFIG['rate_limit'], initial_rate=200, max_rate=200, burst=10)
+            )
+            first = PenguinMagicScraper(config)
+            first.run()
+            self.assertFalse(self.path.exists())
+
+            second = PenguinMagicScraper(config)
+            second.run()
+        self.assertGreater(len(first.products), 0)
+        self.assertEqual(len(second.products), len(first.products))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -2,6 +2,10 @@ import unittest
 from pathlib import Path
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import psycopg2
 
 # Добавляем путь к корневой директории проекта в PYTHONPATH
 sys.path.append(str(Path(__file__).parent.parent))
@@ -128,6 +132,83 @@ class TestDatabaseManager(unittest.TestCase):
             for product_id in product_ids:
                 self.db.delete_product(product_id)
 
+    def test_save_products(self):
+        """Тест пакетного сохранения продуктов с изоляцией ошибочных строк."""
+        urls = [f'https://example.com/batch/{i}' for i in range(3)]
+        products = [
+            {'name': f'Пакетный продукт {i}', 'price': 10 + i, 'url': url, 'tags': ['cards']}
+            for i, url in enumerate(urls)
+        ]
+        # Некорректная цена ломает только свою строку
+        products[1]['price'] = 'не число'
+        # Продукт без обязательного поля пропускается
+        products.append({'url': 'https://example.com/batch/no-name', 'price': 1})
+
+        try:
+            saved = self.db.save_products(products)
+            self.assertEqual(saved, 2)
+            rows = self.db.execute_query(
+                "SELECT url FROM products WHERE url = ANY(%s)", (urls,))
+            self.assertEqual(sorted(row['url'] for row in rows), [urls[0], urls[2]])
+
+            # Повторное сохранение обновляет записи, а не добавляет дубликаты
+            products[1]['price'] = 11
+            self.assertEqual(self.db.save_products(products[:3]), 3)
+            rows = self.db.execute_query(
+                "SELECT url, price FROM products WHERE url = ANY(%s)", (urls,))
+            self.assertEqual(len(rows), 3)
+        finally:
+            self.db.execute_query("DELETE FROM products WHERE url = ANY(%s) RETURNING id", (urls,))
+            self.db.conn.commit()
+
+    def test_save_product_upsert(self):
+        """Тест обновления продукта по URL: только изменившиеся записи получают новый updated_at."""
+        url = 'https://example.com/upsert'
+        product = {'name': 'Продукт', 'price': 10, 'url': url}
+        try:
+            self.db.save_product(product)
+            first = self.db.execute_query(
+                "SELECT id, updated_at FROM products WHERE url = %s", (url,), fetch_one=True)
+
+            # Те же данные: запись не меняется
+            self.db.save_product(product)
+            same = self.db.execute_query(
+                "SELECT id, updated_at FROM products WHERE url = %s", (url,), fetch_one=True)
+            self.assertEqual(same, first)
+
+            # Новая цена и повтор URL внутри пакета: одна запись с последней версией
+            self.db.save_products([dict(product, price=12), dict(product, price=15)])
+            rows = self.db.execute_query("SELECT id, price, updated_at FROM products WHERE url = %s", (url,))
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0]['id'], first['id'])
+            self.assertEqual(float(rows[0]['price']), 15)
+            self.assertGreater(rows[0]['updated_at'], first['updated_at'])
+        finally:
+            self.db.execute_query("DELETE FROM products WHERE url = %s RETURNING id", (url,))
+            self.db.conn.commit()
+
+    def test_pool_shared_across_threads(self):
+        """Тест параллельного сохранения через общий пул без утечки соединений."""
+        # Повторный connect не открывает новое соединение
+        conn = self.db.conn
+        self.db.connect()
+        self.assertIs(self.db.conn, conn)
+
+        urls = [f'https://example.com/pool/{i}' for i in range(40)]
+        batches = [
+            [{'name': f'Продукт {i}', 'price': i, 'url': url} for i, url in enumerate(urls[start:start + 10], start)]
+            for start in range(0, len(urls), 10)
+        ]
+        try:
+            with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+                saved = list(executor.map(self.db.save_products, batches))
+            self.assertEqual(saved, [10] * len(batches))
+            rows = self.db.execute_query("SELECT url FROM products WHERE url = ANY(%s)", (urls,))
+            self.assertEqual(len(rows), len(urls))
+        finally:
+            self.db.execute_query("DELETE FROM products WHERE url = ANY(%s) RETURNING id", (urls,))
+            self.db.conn.commit()
+
     def test_validation(self):
         """Тест валидации данных."""
         # Тест на отсутствие названия
@@ -148,5 +229,94 @@ class TestDatabaseManager(unittest.TestCase):
                 'url': 'некорректный-url'
             })
 
+class FakeCursor:
+    """Курсор, на котором каждая вставка продукта завершается заданной ошибкой"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(sql.split()[0])
+        if sql.startswith('INSERT'):
+            raise self.connection.error
+
+    def fetchone(self):
+        return self.connection.row
+
+class FakeConnection:
+    """Соединение без сервера, запоминающее выполненные команды"""
+
+    def __init__(self, error=None, row=None):
+        self.error = error
+        self.row = row
+        self.statements = []
+        self.closed = 0
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.statements.append('COMMIT')
+
+    def rollback(self):
+        self.statements.append('ROLLBACK')
+
+class FakePool:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def getconn(self):
+        return self.connection
+
+    def putconn(self, conn, close=False):
+        pass
+
+class TestSaveProductsErrors(unittest.TestCase):
+    """Пакет, который не удалось записать, не считается сохраненным (без работающего PostgreSQL)"""
+
+    def save(self, error):
+        db = DatabaseManager()
+        connection = FakeConnection(error)
+        db.pool = FakePool(connection)
+        products = [{'name': f'Продукт {i}', 'price': i, 'url': f'https://example.com/p/{i}'} for i in range(3)]
+        with mock.patch('database.db_manager.execute_values', side_effect=error):
+            with self.assertRaises(type(error)):
+                db.save_products(products)
+        self.assertNotIn('COMMIT', connection.statements)
+        return connection
+
+    def test_systemic_error_is_raised(self):
+        """Ошибка не в данных (нет уникального индекса) не переводит запись на построчный режим"""
+        connection = self.save(psycopg2.ProgrammingError("there is no unique or exclusion constraint"))
+        self.assertNotIn('SAVEPOINT', connection.statements)
+
+    def test_all_rows_failed_is_raised(self):
+        """Если не записалась ни одна строка, пакет откатывается с ошибкой"""
+        connection = self.save(psycopg2.DataError("invalid input syntax"))
+        self.assertEqual(connection.statements.count('SAVEPOINT'), 3)
+
+class TestCheckSchema(unittest.TestCase):
+    """Проверка уникального индекса по url перед сохранением (без работающего PostgreSQL)"""
+
+    def check(self, row):
+        db = DatabaseManager()
+        db.pool = FakePool(FakeConnection(row=row))
+        db.check_schema()
+
+    def test_missing_index_fails(self):
+        """Без уникального индекса сохранение не начинается"""
+        with self.assertRaisesRegex(RuntimeError, "migrate_unique_url.sql"):
+            self.check(None)
+
+    def test_index_present(self):
+        """С уникальным индексом проверка проходит"""
+        self.check({'?column?': 1})
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+Тесты пула соединений с базой данных (без работающего PostgreSQL)
+"""
+import unittest
+from pathlib import Path
+import sys
+
+import psycopg2
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import DatabaseManager
+from database.pool import ConnectionPool, get_pool
+
+# Порт, на котором заведомо нет сервера
+UNREACHABLE = {
+    'dbname': 'penguin', 'user': 'penguin', 'password': 'penguin',
+    'host': '127.0.0.1', 'port': '1', 'connect_timeout': '2'
+}
+
+class TestConnectionPool(unittest.TestCase):
+    """Ленивое создание и общий пул соединений"""
+
+    def test_manager_does_not_connect_on_init(self):
+        """Менеджер не открывает соединение при создании"""
+        db = DatabaseManager()
+        self.assertIsNone(db.pool._pool)
+        self.assertIsNone(db._conn)
+
+    def test_pool_shared_by_params(self):
+        """Менеджеры с одинаковыми параметрами используют один пул"""
+        self.assertIs(DatabaseManager().pool, DatabaseManager().pool)
+        self.assertIs(get_pool(dict(UNREACHABLE)), get_pool(dict(UNREACHABLE)))
+        self.assertIsNot(get_pool(dict(UNREACHABLE)), get_pool(dict(UNREACHABLE, port='2')))
+
+    def test_failed_connect_releases_slot(self):
+        """Ошибка подключения не занимает место в пуле"""
+        pool = ConnectionPool(UNREACHABLE, min_connections=1, max_connections=1, timeout=0.1)
+        for _ in range(3):
+            with self.assertRaises(psycopg2.OperationalError):
+                pool.getconn()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,93 @@
+"""
+Тесты однократной записи продуктов в базу данных
+"""
+import unittest
+from pathlib import Path
+import sys
+import tempfile
+import threading
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import SCRAPER_CONFIG
+from optimized_scraper import PenguinMagicScraper
+
+class RecordingDatabase:
+    """Менеджер базы данных, запоминающий записанные URL"""
+
+    def __init__(self):
+        self.urls = []
+        self.fail_next = False
+        self.available = threading.Event()
+        self.available.set()
+
+    def save_products(self, products):
+        self.available.wait()
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("база данных недоступна")
+        self.urls.extend(product['url'] for product in products)
+        return len(products)
+
+class TestPersistWatermark(unittest.TestCase):
+    """Каждый продукт записывается в базу ровно один раз"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = RecordingDatabase()
+        config = dict(
+            SCRAPER_CONFIG,
+            excel_output=str(Path(self.tmp.name) / "products.xlsx"),
+            archive_dir=None,
+            dead_ids_file=None,
+            checkpoint_file=None,
+            save_interval=10,
+            batch_size=10,
+            retry_delay=0.01,
+            db_flush_interval=0.01
+        )
+        self.scraper = PenguinMagicScraper(config, db_manager=self.db)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def scrape(self, pages):
+        for page in pages:
+            self.scraper.checkpoint.start(page)
+            self.scraper.finish_page(page, {'name': f'Продукт {page}', 'price': 1.0,
+                                            'url': f'https://example.com/p/{page}'})
+
+    def test_each_product_written_once(self):
+        """Фоновая запись и финальный сброс записывают каждый продукт один раз"""
+        self.scrape(range(1, 26))
+        self.scraper.save_results()
+
+        expected = [f'https://example.com/p/{page}' for page in range(1, 26)]
+        self.assertEqual(self.db.urls, expected)
+        self.assertEqual(self.scraper.persisted_count, 25)
+        self.assertEqual(self.scraper.db_stats['written'], len(self.scraper.products))
+        self.assertTrue(all(self.scraper.checkpoint.is_completed(page) for page in range(1, 26)))
+
+    def test_failed_batch_is_retried(self):
+        """После ошибки записи пакет повторяется без дубликатов"""
+        self.db.fail_next = True
+        self.scrape(range(1, 21))
+        self.scraper.save_results()
+        self.assertEqual(self.db.urls, [f'https://example.com/p/{page}' for page in range(1, 21)])
+        self.assertEqual(self.scraper.db_stats['written'], 20)
+        self.assertTrue(self.scraper.checkpoint.is_completed(15))
+
+    def test_pages_complete_after_write(self):
+        """Страница не завершается, пока ее продукт не записан в базу"""
+        self.db.available.clear()
+        self.scrape(range(1, 11))
+        self.assertEqual(self.scraper.persisted_count, 0)
+        self.assertFalse(self.scraper.checkpoint.is_completed(5))
+
+        self.db.available.set()
+        self.scraper.save_results()
+        self.assertTrue(self.scraper.checkpoint.is_completed(5))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
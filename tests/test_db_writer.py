@@ -0,0 +1,99 @@
+"""
+Тесты фоновой записи в базу данных
+"""
+import unittest
+from pathlib import Path
+import sys
+import threading
+import time
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraping.db_writer import DatabaseWriter
+
+class RecordingSave:
+    """Запись пакетов с возможностью задержать или сломать базу"""
+
+    def __init__(self):
+        self.batches = []
+        self.failures = 0
+        self.available = threading.Event()
+        self.available.set()
+
+    def __call__(self, batch):
+        self.available.wait()
+        if self.failures:
+            self.failures -= 1
+            return None
+        self.batches.append([product['id'] for product in batch])
+        return len(batch)
+
+class TestDatabaseWriter(unittest.TestCase):
+    """Пакеты по размеру и времени, обратное давление, запись при остановке"""
+
+    def setUp(self):
+        self.save = RecordingSave()
+
+    def test_batches_by_size(self):
+        """Полные пакеты записываются сразу, остаток - при остановке"""
+        writer = DatabaseWriter(self.save, batch_size=3, flush_interval=60)
+        for i in range(7):
+            writer.put({'id': i})
+        writer.close()
+        self.assertEqual(self.save.batches, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_batches_by_time(self):
+        """Неполный пакет записывается через flush_interval"""
+        saved = threading.Event()
+        writer = DatabaseWriter(self.save, on_saved=lambda batch, count: saved.set(),
+                                batch_size=100, flush_interval=0.05)
+        writer.put({'id': 1})
+        self.assertTrue(saved.wait(5))
+        self.assertEqual(self.save.batches, [[1]])
+        writer.close()
+
+    def test_backpressure(self):
+        """При недоступной базе put ждет, когда очередь заполнена"""
+        self.save.available.clear()
+        writer = DatabaseWriter(self.save, batch_size=1, flush_interval=60, queue_size=2)
+        # Один продукт записывается, два ждут в очереди
+        for i in range(3):
+            writer.put({'id': i})
+        blocked = threading.Thread(target=writer.put, args=({'id': 3},))
+        blocked.start()
+        blocked.join(0.2)
+        self.assertTrue(blocked.is_alive())
+
+        self.save.available.set()
+        blocked.join(5)
+        self.assertFalse(blocked.is_alive())
+        writer.close()
+        self.assertEqual(self.save.batches, [[0], [1], [2], [3]])
+
+    def test_retry_keeps_order(self):
+        """Неудачный пакет повторяется до записи следующих"""
+        self.save.failures = 2
+        writer = DatabaseWriter(self.save, batch_size=2, flush_interval=60, retry_delay=0.01)
+        for i in range(4):
+            writer.put({'id': i})
+        deadline = time.monotonic() + 5
+        while len(self.save.batches) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+        self.assertEqual(self.save.batches, [[0, 1], [2, 3]])
+
+    def test_close_during_retry(self):
+        """Остановка во время ожидания повтора записывает все продукты последней попыткой"""
+        self.save.failures = 1
+        writer = DatabaseWriter(self.save, batch_size=2, flush_interval=60, retry_delay=60)
+        for i in range(5):
+            writer.put({'id': i})
+        deadline = time.monotonic() + 5
+        while self.save.failures and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+        self.assertEqual(self.save.batches, [[0, 1], [2, 3], [4]])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,64 @@
+"""
+Тесты фильтра заведомо отсутствующих ID страниц
+"""
+import unittest
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraping.dead_ids import DeadIdFilter
+
+class TestDeadIdFilter(unittest.TestCase):
+    """Тесты пометки, сохранения и ttl"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "dead_ids.bin"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_mark_and_discard(self):
+        """Пометка и снятие пометки"""
+        dead_ids = DeadIdFilter()
+        dead_ids.mark(7921)
+        self.assertTrue(dead_ids.is_dead(7921))
+        self.assertFalse(dead_ids.is_dead(7922))
+        dead_ids.discard(7921)
+        self.assertNotIn(7921, dead_ids)
+
+    def test_save_and_load(self):
+        """Битовая карта переживает перезапуск"""
+        ids = {7920, 7921, 7999, 8500, 9999}
+        dead_ids = DeadIdFilter(self.path)
+        for page_id in ids:
+            dead_ids.mark(page_id)
+        dead_ids.save()
+
+        reloaded = DeadIdFilter(self.path)
+        self.assertEqual(len(reloaded), len(ids))
+        for page_id in range(7900, 10010):
+            self.assertEqual(reloaded.is_dead(page_id), page_id in ids)
+
+    def test_ttl_expires_marks(self):
+        """После ttl ID снова запрашивается"""
+        dead_ids = DeadIdFilter(self.path, ttl=3600)
+        dead_ids.mark(1)
+        dead_ids._marked[2] = int(time.time()) - 7200
+        self.assertTrue(dead_ids.is_dead(1))
+        self.assertFalse(dead_ids.is_dead(2))
+
+    def test_file_is_compact(self):
+        """Файл для тысяч ID занимает единицы килобайт"""
+        dead_ids = DeadIdFilter(self.path)
+        for page_id in range(0, 20000, 3):
+            dead_ids.mark(page_id)
+        dead_ids.save()
+        self.assertLess(self.path.stat().st_size, 40 * 1024)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,96 @@
+"""
+Тесты быстрого извлечения из JSON-LD и мета-тегов
+"""
+import unittest
+from pathlib import Path
+import sys
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraping import fast_path
+from scraping.extraction import PARSER_BACKENDS, parse_product_page
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+URL = "https://www.penguinmagic.com/p/1"
+
+def without_timestamps(product_info):
+    """Информация о продукте без полей времени создания"""
+    if product_info:
+        product_info = dict(product_info)
+        product_info.pop('created_at')
+        product_info.pop('updated_at')
+    return product_info
+
+def page(head: str, body: str = "<p>Nice trick</p>") -> str:
+    return f"<html><head>{head}</head><body>{body}</body></html>"
+
+LD_JSON = """<script type="application/ld+json">
+{"@type": "Product", "name": "Trick", "offers": {"@type": "Offer", "price": "19.95",
+ "priceSpecification": {"price": "24.95"}}}
+</script>"""
+META = """<meta property="og:title" content="Trick &amp; More by Someone (DVD) - Penguin Magic Shop">
+<meta property="og:image" content="https://images.penguinmagic.com/trick.jpg" />
+<meta property='og:description' content='  Great trick  '>"""
+
+class TestFastPath(unittest.TestCase):
+    """Быстрый путь дает тот же результат, что и полный разбор"""
+
+    def assert_same_as_full(self, html: str):
+        fast = without_timestamps(fast_path.extract_product_info(html, URL))
+        self.assertIsNotNone(fast)
+        for backend in PARSER_BACKENDS:
+            with self.subTest(backend=backend):
+                self.assertEqual(fast, without_timestamps(parse_product_page(1, URL, html, backend)))
+        return fast
+
+    def test_ld_json_and_meta(self):
+        """Цены из JSON-LD, название, изображение и описание из мета-тегов"""
+        fast = self.assert_same_as_full(page(META + LD_JSON))
+        self.assertEqual(fast['name'], "Trick & More by Someone (DVD)")
+        self.assertEqual(fast['author'], "Someone")
+        self.assertEqual(fast['price'], 24.95)
+        self.assertEqual(fast['discounted_price'], 19.95)
+        self.assertEqual(fast['description'], "Great trick")
+
+    def test_title_and_meta_price(self):
+        """Название из <title>, цена из product:price:amount, ложные теги в комментариях и скриптах"""
+        head = """<!-- <meta property="og:title" content="Commented"> -->
+        <script>var s = '<meta property="product:price:amount" content="1.00">';</script>
+        <title>Deck &amp; Coins - Penguin Magic Shop</title>
+        <meta property="product:price:amount" content="7.50">
+        <script type="application/ld+json">not json</script>"""
+        fast = self.assert_same_as_full(page(head))
+        self.assertEqual(fast['name'], "Deck & Coins")
+        self.assertEqual(fast['price'], 7.5)
+        self.assertIsNone(fast['image_url'])
+        self.assertIsNone(fast['description'])
+
+    def test_falls_back_when_tree_needed(self):
+        """Разметка, которую полное извлечение читает приоритетнее, отключает быстрый путь"""
+        bodies = [
+            '<div class="product-main"><h1>Name</h1></div>',
+            '<table class="product_price_details"><tr><td>Price:</td><td>$5</td></tr></table>',
+            '<div id="product_description"><p>Text</p></div>',
+            '<a href="/tricks/tagged/cards">Cards</a>',
+            '<div id="sorted-reviews"></div>',
+            '<div id="review_summary"><a href="#reviews">5 stars / 1 reviews</a></div>'
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                self.assertIsNone(fast_path.extract_product_info(page(META + LD_JSON, body), URL))
+
+    def test_falls_back_without_price_or_head(self):
+        """Без цены в JSON-LD и мета-тегах и без <head> страница разбирается полностью"""
+        self.assertIsNone(fast_path.extract_product_info(page(META, '<span class="price">$3</span>'), URL))
+        self.assertIsNone(fast_path.extract_product_info(
+            "<html><body>" + META + LD_JSON + "</body></html>", URL))
+
+    def test_fixtures_fall_back(self):
+        """Сохраненные страницы содержат таблицу цен и теги - нужен полный разбор"""
+        for fixture in sorted(FIXTURES_DIR.glob("page_*.html")):
+            with self.subTest(fixture=fixture.name):
+                self.assertIsNone(fast_path.extract_product_info(fixture.read_text(encoding='utf-8'), URL))
+
+if __name__ == '__main__':
+    unittest.main()
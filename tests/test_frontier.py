@@ -0,0 +1,51 @@
+"""
+Тесты поиска максимального живого ID продукта
+"""
+import unittest
+from pathlib import Path
+import sys
+import random
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraping.frontier import FrontierProber
+
+def make_catalog(last_id: int, dead_ratio: float, seed: int = 1) -> set:
+    """Синтетический каталог: живые ID до last_id с долей удаленных"""
+    rng = random.Random(seed)
+    live = {page_id for page_id in range(1, last_id + 1) if rng.random() >= dead_ratio}
+    live.add(last_id)
+    return live
+
+class TestFrontierProber(unittest.TestCase):
+    """Тесты галопирующего поиска с выборкой"""
+
+    def test_finds_exact_frontier_in_dense_catalog(self):
+        """В плотном каталоге граница находится точно"""
+        live = make_catalog(23456, dead_ratio=0.0)
+        prober = FrontierProber(lambda page_id: page_id in live, seed=1)
+        self.assertEqual(prober.find_highest_live_id(7920), 23456)
+
+    def test_tolerates_sparse_gaps(self):
+        """Разреженные участки удаленных ID не останавливают поиск"""
+        live = make_catalog(23456, dead_ratio=0.4)
+        # Сплошной пропуск короче окна
+        live -= set(range(15000, 15030))
+        prober = FrontierProber(lambda page_id: page_id in live, window=50, samples=8, seed=2)
+        self.assertEqual(prober.find_highest_live_id(7920), 23456)
+
+    def test_probe_count_is_logarithmic(self):
+        """Число запросов много меньше размера диапазона"""
+        live = make_catalog(30000, dead_ratio=0.2)
+        prober = FrontierProber(lambda page_id: page_id in live, seed=3)
+        prober.find_highest_live_id(7920)
+        self.assertLess(len(prober.probes), 400)
+
+    def test_dead_start(self):
+        """Если в стартовом окне нет живых ID, возвращается None"""
+        prober = FrontierProber(lambda page_id: False, seed=4)
+        self.assertIsNone(prober.find_highest_live_id(100))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+"""
+Тесты архива исходного HTML страниц
+"""
+import unittest
+from pathlib import Path
+import sys
+import tempfile
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraping.html_archive import HtmlArchive, INDEX_FILE
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+class TestHtmlArchive(unittest.TestCase):
+    """Тесты записи, произвольного доступа и ротации сегментов"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.html = (FIXTURES_DIR / "page_10016.html").read_bytes()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _append(self, archive, page_id, body=None):
+        archive.append(page_id, f"https://www.penguinmagic.com/p/{page_id}", 200,
+                       {'Content-Type': 'text/html; charset=utf-8'}, body or self.html, 'utf-8')
+
+    def test_append_and_get(self):
+        """Запись читается по ID страницы со всеми метаданными"""
+        archive = HtmlArchive(self.tmp.name)
+        self._append(archive, 10016)
+        archive.close()
+
+        record = HtmlArchive(self.tmp.name).get(10016)
+        self.assertEqual(record['body'], self.html)
+        self.assertEqual(record['url'], "https://www.penguinmagic.com/p/10016")
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['headers']['Content-Type'], 'text/html; charset=utf-8')
+        self.assertEqual(record['encoding'], 'utf-8')
+        self.assertIn('fetched_at', record)
+        self.assertIsNone(archive.get(1))
+
+    def test_segment_rollover(self):
+        """При превышении размера сегмента начинается новый"""
+        archive = HtmlArchive(self.tmp.name, max_segment_bytes=40 * 1024)
+        for page_id in range(5):
+            self._append(archive, page_id)
+        archive.close()
+
+        segments = sorted(Path(self.tmp.name).glob('segment_*.gz'))
+        self.assertGreater(len(segments), 1)
+        reopened = HtmlArchive(self.tmp.name, max_segment_bytes=40 * 1024)
+        self.assertEqual([r['page_id'] for r in reopened.iter_records()], list(range(5)))
+        self.assertEqual(reopened.get(3)['body'], self.html)
+
+    def test_latest_record_wins(self):
+        """Повторно загруженная страница перекрывает предыдущую версию"""
+        archive = HtmlArchive(self.tmp.name)
+        self._append(archive, 7, b'<html>old</html>')
+        self._append(archive, 7, b'<html>new</html>')
+        archive.close()
+
+        reopened = HtmlArchive(self.tmp.name)
+        self.assertEqual(len(reopened), 1)
+        self.assertEqual(reopened.get(7)['body'], b'<html>new</html>')
+
+    def test_truncated_index_line_is_ignored(self):
+        """Недописанная строка индекса не ломает открытие архива"""
+        archive = HtmlArchive(self.tmp.name)
+        self._append(archive, 1)
+        archive.close()
+        with open(Path(self.tmp.name) / INDEX_FILE, 'a', encoding='utf-8') as f:
+            f.write('{"page_id": 2, "segm')
+
+        reopened = HtmlArchive(self.tmp.name)
+        self.assertIn(1, reopened)
+        self.assertNotIn(2, reopened)
+        self._append(reopened, 3)
+        self.assertEqual(reopened.get(3)['body'], self.html)
+        reopened.close()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,164 @@
+"""
+Тесты локальной имитации сайта и прогона скрапера через нее
+"""
+import unittest
+from pathlib import Path
+import sys
+import tempfile
+import logging
+import threading
+import time
+
+import requests
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from tests.mock_server import MockPenguinServer
+from optimized_scraper import PenguinMagicScraper
+from config import SCRAPER_CONFIG
+from scraping import AdaptiveRateLimiter, AsyncFetcher
+
+class TestMockPenguinServer(unittest.TestCase):
+    """Тесты поведения имитации сайта"""
+
+    def test_serves_fixture_variants(self):
+        """Страница отдается по произвольному ID с подставленным адресом"""
+        with MockPenguinServer() as server:
+            response = requests.get(f"{server.base_url}123456", timeout=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/p/123456', response.text)
+        self.assertIn('<head', response.text)
+
+    def test_deleted_ids_are_stable(self):
+        """Удаленные ID детерминированы и отдают 500"""
+        with MockPenguinServer(deleted_ratio=0.5, seed=7) as server:
+            kinds = [server.page_kind(page_id) for page_id in range(100)]
+            self.assertEqual(kinds, [server.page_kind(page_id) for page_id in range(100)])
+            deleted = kinds.index('deleted')
+            response = requests.get(f"{server.base_url}{deleted}", timeout=5)
+        self.assertEqual(response.status_code, 500)
+        self.assertTrue(20 < kinds.count('deleted') < 80)
+
+    def test_max_id(self):
+        """ID выше max_id отсутствуют"""
+        with MockPenguinServer(max_id=100) as server:
+            self.assertEqual(requests.get(f"{server.base_url}100", timeout=5).status_code, 200)
+            self.assertEqual(requests.get(f"{server.base_url}101", timeout=5).status_code, 500)
+
+    def test_burst_limit_returns_429_with_retry_after(self):
+        """Сверх лимита запросов в окне возвращается 429 с Retry-After"""
+        with MockPenguinServer(burst_limit=3, burst_window=60, retry_after=2) as server:
+            statuses = []
+            with requests.Session() as session:
+                for page_id in range(5):
+                    response = session.get(f"{server.base_url}{page_id}", timeout=5)
+                    statuses.append(response.status_code)
+            self.assertEqual(statuses, [200, 200, 200, 429, 429])
+            self.assertEqual(response.headers['Retry-After'], '2')
+            self.assertEqual(server.stats[429], 2)
+
+class TestScraperAgainstMockServer(unittest.TestCase):
+    """Прогон скрапера через имитацию сайта без базы данных"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        self.tmp.cleanup()
+
+    def _run(self, fetch_mode):
+        with MockPenguinServer(deleted_ratio=0.2, error_rate=0.05, retry_after=0, seed=3) as server:
+            config = dict(
+                SCRAPER_CONFIG,
+                base_url=server.base_url,
+                start_page=1,
+                end_page=30,
+                fetch_mode=fetch_mode,
+                save_to_db=False,
+                excel_output=str(Path(self.tmp.name) / f"{fetch_mode}.xlsx"),
+                archive_dir=None,
+                dead_ids_file=None,
+                checkpoint_file=None,
+                fast_path=True,
+                retry_delay=0,
+                rate_limit=dict(SCRAPER_CONFIG['rate_limit'], initial_rate=200, max_rate=200, burst=10)
+            )
+            scraper = PenguinMagicScraper(config)
+            scraper.run()
+            expected = [page_id for page_id in range(1, 31) if server.page_kind(page_id) == 'product']
+        return scraper, expected
+
+    def test_fetch_modes(self):
+        """Во всех режимах загрузки собираются все живые продукты"""
+        for fetch_mode in ('sequential', 'threads', 'async', 'pipeline'):
+            with self.subTest(fetch_mode=fetch_mode):
+                scraper, expected = self._run(fetch_mode)
+                urls = sorted(int(product['url'].rsplit('/', 1)[-1]) for product in scraper.products)
+                self.assertEqual(urls, expected)
+                # Страницы имитации содержат таблицу цен и теги: быстрый путь не применяется
+                self.assertEqual(scraper.fast_path_stats['pages'], len(expected))
+                self.assertEqual(scraper.fast_path_hit_rate, 0.0)
+
+class TestAsyncFetcherHandler(unittest.TestCase):
+    """Обработка страниц в асинхронном режиме не останавливает загрузку"""
+
+    def test_slow_handler_does_not_block_fetching(self):
+        """Пока обработчик занят, остальные страницы продолжают загружаться"""
+        pages = 20
+        concurrency = 4
+        blocked = threading.Event()
+        released = threading.Event()
+        handled = []
+        active = []
+        overlaps = []
+        timed_out = []
+
+        with MockPenguinServer(latency=0.01, seed=3) as server:
+            def on_page(page, url, fetched, error_kind):
+                active.append(page)
+                overlaps.append(len(active) > 1)
+                handled.append((page, threading.current_thread() is fetcher_thread))
+                if len(handled) == 1:
+                    # Первая страница держит обработчик, пока тест не отпустит его
+                    blocked.set()
+                    if not released.wait(timeout=5):
+                        timed_out.append(page)
+                active.remove(page)
+
+            fetcher = AsyncFetcher(
+                headers={},
+                concurrency=concurrency,
+                rate_limiter=AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, burst=pages)
+            )
+            fetcher_thread = threading.Thread(
+                target=fetcher.run,
+                args=([(page, f"{server.base_url}{page}") for page in range(1, pages + 1)], on_page)
+            )
+            fetcher_thread.start()
+            try:
+                self.assertTrue(blocked.wait(timeout=5), "Обработчик не вызван")
+                deadline = time.monotonic() + 3
+                while server.stats['requests'] < pages and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                served = server.stats['requests']
+                handled_while_blocked = len(handled)
+            finally:
+                released.set()
+                fetcher_thread.join(timeout=30)
+
+        self.assertFalse(timed_out, "Обработчик не был отпущен вовремя")
+        self.assertFalse(fetcher_thread.is_alive())
+        # Загрузка продолжалась, пока первая страница обрабатывалась
+        self.assertEqual(handled_while_blocked, 1)
+        self.assertGreater(served, concurrency)
+        self.assertEqual(served, pages)
+        self.assertEqual(sorted(page for page, _ in handled), list(range(1, pages + 1)))
+        # Обработчик вызывается вне цикла событий и по одному вызову за раз
+        self.assertFalse(any(in_loop for _, in_loop in handled))
+        self.assertFalse(any(overlaps))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
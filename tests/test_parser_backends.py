@@ -0,0 +1,199 @@
+"""
+Тесты взаимозаменяемости парсеров страниц
+"""
+import unittest
+from pathlib import Path
+import sys
+import logging
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from bs4 import BeautifulSoup
+from scraping.extraction import (
+    DEFAULT_PARSER_BACKEND, PARSER_BACKENDS, build_soup, can_restrict, parse_product_page
+)
+from scraping import lxml_extraction
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FIXTURES = sorted(FIXTURES_DIR.glob("page_*.html"))
+
+def parse(html: str, backend: str, restricted: bool = False, max_reviews=None):
+    """Разбор страницы без полей времени создания"""
+    product_info = parse_product_page(1, "https://www.penguinmagic.com/p/1", html, backend, restricted, max_reviews)
+    if product_info:
+        product_info.pop('created_at')
+        product_info.pop('updated_at')
+    return product_info
+
+class TestParserBackends(unittest.TestCase):
+    """Все парсеры дают одинаковый результат"""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_fixtures_identical(self):
+        """На сохраненных страницах результат совпадает с html.parser"""
+        self.assertTrue(FIXTURES)
+        for fixture in FIXTURES:
+            html = fixture.read_text(encoding='utf-8')
+            expected = parse(html, 'html.parser')
+            self.assertIsNotNone(expected)
+            for backend in PARSER_BACKENDS:
+                with self.subTest(fixture=fixture.name, backend=backend):
+                    self.assertEqual(parse(html, backend), expected)
+
+    def test_synthetic_edge_cases(self):
+        """Теги вне навигации, цена из запасных селекторов, вложенные отзывы"""
+        html = """<html><head><title>Trick by Someone (DVD) - Penguin Magic Shop</title></head><body>
+        <div id="browse_menu"><div style="float:left;">
+            <div style="border:1px solid #999; background:#aaa"><a href="/tricks/tagged/menu">menu</a></div>
+        </div></div>
+        <div style="float:left;"><div style="border:1px solid #999; background:#aaa">
+            <a href="/tricks/tagged/early">early</a></div></div>
+        <div class="product_addtocart"><div style="float:left;">no tags</div></div>
+        <div id="browse_menu"><div style="float:left;">
+            <div style="border:1px solid #999; background:#aaa"><a href="/tricks/tagged/menu2">menu2</a></div>
+        </div></div>
+        <div class="wrap" style="float:left;"><div style="border:1px solid #999; background:#aaa">
+            <a href="/tricks/tagged/cards">Cards</a> <a href="/tricks/tagged/close-up">Close-up</a>
+            <a href="/tricks/tagged/cards">Cards</a></div></div>
+        <span class="old price">was <b>$12.50</b></span>
+        <div class="product_review">outside</div>
+        <div id="sorted-reviews">
+            <div class="product_review"><div class="product_review review_header">
+                <img src="/images/4stars.gif"><span class="review_subject"> Great </span>
+                <div class="review_from">by X on March 3rd, 2020 <span class="review_verified">Verified buyer</span></div>
+            </div><div class="review_body">Line one<br>line <!-- c --> two</div>
+            2 of 3 magicians found this helpful.</div>
+        </div>
+        <div id="review_summary"><a href="#reviews">4.0 stars / 1 review</a></div>
+        </body></html>"""
+        expected = parse(html, 'html.parser')
+        self.assertEqual(expected['tags'], ['Cards', 'Close-up'])
+        self.assertEqual(expected['price'], 12.5)
+        self.assertEqual(len(expected['reviews']), 2)
+        for backend in PARSER_BACKENDS:
+            with self.subTest(backend=backend):
+                self.assertEqual(parse(html, backend), expected)
+
+    def test_restricted_parse_identical(self):
+        """Ограниченный разбор дает тот же результат и строит меньшее дерево"""
+        for fixture in FIXTURES:
+            html = fixture.read_text(encoding='utf-8')
+            self.assertTrue(can_restrict(html))
+            for backend in ('html.parser', 'lxml'):
+                with self.subTest(fixture=fixture.name, backend=backend):
+                    self.assertEqual(parse(html, backend, restricted=True), parse(html, backend))
+                    full = len(build_soup(html, backend).find_all(True))
+                    restricted = len(build_soup(html, backend, restricted=True).find_all(True))
+                    self.assertLess(restricted, full / 2)
+
+    def test_restricted_parse_falls_back(self):
+        """С навигацией после блока покупки строится полное дерево"""
+        menu_after = ('<html><head></head><body><table class="product_price_details"></table>'
+                      '<div class="product_addtocart"></div><div id="browse_menu"></div></body></html>')
+        self.assertFalse(can_restrict(menu_after))
+        self.assertIsNotNone(build_soup(menu_after, 'html.parser', restricted=True).find('div', id='browse_menu'))
+
+        # Навигация открывается до блока покупки и охватывает его и float:left-блок с тегами
+        menu_around = ('<html><head><title>Trick</title></head><body>'
+                       '<div class="product-main"><h1>Trick</h1></div>'
+                       '<table class="product_price_details"><tr><td>Price:</td><td>$5</td></tr></table>'
+                       '<div id="browse_menu"><div class="product_addtocart"></div>'
+                       '<div style="float:left"><div style="background:#aaa;border:1px solid #999">'
+                       '<a href="/tricks/tagged/menu">Menu</a></div></div></div></body></html>')
+        expected = parse(menu_around, 'html.parser')
+        self.assertEqual(expected['tags'], [])
+        for backend in PARSER_BACKENDS:
+            with self.subTest(backend=backend):
+                self.assertEqual(parse(menu_around, backend, restricted=True), expected)
+
+    def test_price_fallback_uses_raw_html(self):
+        """Запасной поиск цены работает по исходному HTML и не зависит от дерева"""
+        html = ('<html><head><title>Download</title></head><body><div id="browse_menu"></div>'
+                '<p>Only $5.00, was <b>$7.5</b></p><script>var fee = "$0.99";</script></body></html>')
+        self.assertTrue(can_restrict(html))
+        for backend in PARSER_BACKENDS:
+            for restricted in (False, True):
+                with self.subTest(backend=backend, restricted=restricted):
+                    self.assertEqual(parse(html, backend, restricted)['price'], 7.5)
+
+    def test_page_without_head(self):
+        """Страница без <head> не разбирается ни одним парсером"""
+        for backend in PARSER_BACKENDS:
+            with self.subTest(backend=backend):
+                self.assertIsNone(parse('<html><body><p>Product not found</p></body></html>', backend))
+                self.assertIsNone(parse('', backend))
+
+    def test_head_detection_agrees(self):
+        """Неявный <head> (lxml) и строка <head> в скрипте одинаково оцениваются всеми парсерами"""
+        implied_head = '<html><title>Not found</title><body><span class="price">$3</span></body></html>'
+        head_in_script = ('<html><body><script>document.write("<head>")</script>'
+                          '<div class="product-main"><h1>Trick</h1></div>'
+                          '<table class="product_price_details"><tr><td>Price:</td><td>$5</td></tr></table>'
+                          '</body></html>')
+        for html in (implied_head, head_in_script):
+            results = []
+            for backend in PARSER_BACKENDS:
+                for restricted in (False, True):
+                    with self.subTest(html=html[:40], backend=backend, restricted=restricted):
+                        results.append(parse(html, backend, restricted))
+            self.assertTrue(all(result == results[0] for result in results), results)
+        self.assertIsNone(parse(implied_head, DEFAULT_PARSER_BACKEND))
+
+    def test_get_text_matches_beautifulsoup(self):
+        """Текст элемента без комментариев, скриптов и стилей, как в BeautifulSoup"""
+        html = ('<html><body><div id="x"> a <!-- c --><b>b</b><script>var s;</script>'
+                ' d <style>.x{}</style><i> e </i></div></body></html>')
+        element = lxml_extraction.build_tree(html).get_element_by_id('x')
+        soup_element = BeautifulSoup(html, 'html.parser').find('div', id='x')
+        self.assertEqual(lxml_extraction.get_text(element), soup_element.get_text())
+        self.assertEqual(lxml_extraction.get_text(element, strip=True), soup_element.get_text(strip=True))
+        self.assertEqual(lxml_extraction.get_text(element, separator=' ', strip=True),
+                         soup_element.get_text(separator=' ', strip=True))
+
+    def test_review_limit(self):
+        """Ограничение числа отзывов и режим только общей оценки"""
+        html = (FIXTURES_DIR / "page_10016.html").read_text(encoding='utf-8')
+        full = parse(html, 'html.parser')['reviews']
+        self.assertEqual(full[0]['type'], 'summary')
+        self.assertGreater(len(full), 3)
+        self.assertEqual(full[1]['helpful_count'], 4)
+        self.assertEqual(full[1]['helpful_total'], 5)
+        for backend in PARSER_BACKENDS:
+            with self.subTest(backend=backend):
+                self.assertEqual(parse(html, backend, max_reviews=2)['reviews'], full[:3])
+                self.assertEqual(parse(html, backend, max_reviews=0)['reviews'], full[:1])
+                self.assertEqual(parse(html, backend, max_reviews=100)['reviews'], full)
+
+    def test_helpful_votes_from_own_text(self):
+        """Голоса берутся из текста отзыва, а не из текста внутри review_body"""
+        html = """<html><head><title>T</title></head><body><div id="sorted-reviews">
+            <div class="product_review"><div class="review_body">
+                1 of 9 magicians found this helpful, says my friend</div>
+            3 of 4 magicians found this helpful.<div class="review_votes">vote</div></div>
+            <div class="product_review"><div class="review_body">No votes</div></div>
+        </div></body></html>"""
+        for backend in PARSER_BACKENDS:
+            with self.subTest(backend=backend):
+                reviews = parse(html, backend)['reviews']
+                self.assertEqual([(review['helpful_count'], review['helpful_total']) for review in reviews],
+                                 [(3, 4), (None, None)])
+
+    def test_unknown_backend(self):
+        """Неизвестный парсер - ошибка конфигурации"""
+        with self.assertRaises(ValueError):
+            parse_product_page(1, "https://www.penguinmagic.com/p/1", "<html></html>", 'html5lib')
+
+    def test_default_is_known(self):
+        """Парсер по умолчанию входит в список"""
+        self.assertIn(DEFAULT_PARSER_BACKEND, PARSER_BACKENDS)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
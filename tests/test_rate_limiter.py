@@ -0,0 +1,111 @@
+"""
+Тесты адаптивного ограничителя частоты запросов
+"""
+import unittest
+from unittest import mock
+from pathlib import Path
+import sys
+import math
+import random
+import logging
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraping.rate_limiter import AdaptiveRateLimiter
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    """Тесты AIMD-регулирования и корзины токенов"""
+
+    def test_additive_increase_on_fast_success(self):
+        """Быстрые успешные ответы увеличивают частоту аддитивно"""
+        limiter = AdaptiveRateLimiter(initial_rate=1.0, increase_step=0.1, max_rate=1.3)
+        for _ in range(2):
+            limiter.record(200, 0.1)
+        self.assertAlmostEqual(limiter.rate, 1.2)
+
+        for _ in range(5):
+            limiter.record(200, 0.1)
+        self.assertAlmostEqual(limiter.rate, 1.3, msg="Частота не должна превышать max_rate")
+
+    def test_multiplicative_decrease_on_overload(self):
+        """429, 5xx и таймауты снижают частоту мультипликативно"""
+        for kwargs in ({'status': 429}, {'status': 503}, {'status': None, 'timed_out': True}):
+            limiter = AdaptiveRateLimiter(initial_rate=2.0, decrease_factor=0.5, cooldown=0)
+            limiter.record(**kwargs)
+            self.assertAlmostEqual(limiter.rate, 1.0, msg=f"Нет снижения для {kwargs}")
+
+    def test_deleted_page_is_not_overload(self):
+        """500 (удаленный продукт) не считается перегрузкой"""
+        limiter = AdaptiveRateLimiter(initial_rate=1.0, increase_step=0.1, cooldown=0)
+        limiter.record(500, 0.1)
+        self.assertAlmostEqual(limiter.rate, 1.0)
+
+    def test_client_errors_do_not_increase_rate(self):
+        """Частота растет только на 2xx: 403 снижает ее, прочие 4xx не меняют"""
+        limiter = AdaptiveRateLimiter(initial_rate=1.0, increase_step=0.1, decrease_factor=0.5, cooldown=0)
+        limiter.record(403, 0.1)
+        self.assertAlmostEqual(limiter.rate, 0.5)
+
+        limiter = AdaptiveRateLimiter(initial_rate=1.0, increase_step=0.1, cooldown=0)
+        for status in (404, 410, 400):
+            limiter.record(status, 0.1)
+        self.assertAlmostEqual(limiter.rate, 1.0)
+
+    def test_decrease_respects_cooldown_and_min_rate(self):
+        """Несколько ошибок подряд дают одно снижение за cooldown, не ниже min_rate"""
+        limiter = AdaptiveRateLimiter(initial_rate=1.0, min_rate=0.4, decrease_factor=0.5, cooldown=60)
+        for _ in range(3):
+            limiter.record(429)
+        self.assertAlmostEqual(limiter.rate, 0.5)
+
+        limiter = AdaptiveRateLimiter(initial_rate=1.0, min_rate=0.4, decrease_factor=0.5, cooldown=0)
+        for _ in range(3):
+            limiter.record(429)
+        self.assertAlmostEqual(limiter.rate, 0.4)
+
+    def test_rising_latency_triggers_backoff(self):
+        """Рост задержки относительно базовой снижает частоту"""
+        limiter = AdaptiveRateLimiter(initial_rate=2.0, increase_step=0.0, latency_factor=2.0, cooldown=0)
+        for _ in range(5):
+            limiter.record(200, 0.1)
+        self.assertAlmostEqual(limiter.rate, 2.0)
+        for _ in range(10):
+            limiter.record(200, 1.0)
+        self.assertLess(limiter.rate, 2.0)
+
+    def test_jittered_latency_keeps_rate(self):
+        """Обычный разброс задержек не снижает частоту до минимума"""
+        rnd = random.Random(0)
+        clock = [1000.0]
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        with mock.patch('scraping.rate_limiter.time.monotonic', lambda: clock[0]):
+            limiter = AdaptiveRateLimiter(initial_rate=5.0, max_rate=5.0)
+            rates = []
+            for _ in range(3000):
+                clock[0] += 1 / limiter.rate
+                # Логнормальная задержка: медиана 400 мс, sigma 0.5
+                limiter.record(200, 0.4 * math.exp(rnd.gauss(0, 0.5)))
+                rates.append(limiter.rate)
+        self.assertGreater(min(rates), 1.0)
+        self.assertGreater(sum(rates[-1000:]) / 1000, 4.0)
+
+    def test_baseline_follows_latency(self):
+        """Базовая задержка медленно подтягивается к устойчивой текущей"""
+        limiter = AdaptiveRateLimiter(initial_rate=2.0, increase_step=0.0, baseline_decay=0.05)
+        limiter.record(200, 0.1)
+        for _ in range(200):
+            limiter.record(200, 0.15)
+        self.assertAlmostEqual(limiter._latency_base, 0.15, delta=0.01)
+        self.assertAlmostEqual(limiter.rate, 2.0)
+
+    def test_reserve_spaces_requests(self):
+        """Токены выдаются с интервалом 1/rate"""
+        limiter = AdaptiveRateLimiter(initial_rate=10.0, burst=1)
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertAlmostEqual(limiter.reserve(), 0.1, delta=0.01)
+        self.assertAlmostEqual(limiter.reserve(), 0.2, delta=0.01)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
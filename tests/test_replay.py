@@ -0,0 +1,98 @@
+"""
+Тесты повторного разбора архива страниц
+"""
+import unittest
+from pathlib import Path
+import sys
+import tempfile
+import logging
+
+import pandas as pd
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import SCRAPER_CONFIG
+from optimized_scraper import PenguinMagicScraper
+from replay import count_archived_pages, replay
+from scraping import HtmlArchive
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures").glob("page_*.html"))
+BASE_URL = "https://www.penguinmagic.com/p/"
+
+class RecordingDatabase:
+    """Менеджер базы данных, запоминающий записанные URL"""
+
+    def __init__(self, fail=False):
+        self.urls = []
+        self.fail = fail
+
+    def save_products(self, products):
+        if self.fail:
+            raise RuntimeError("база данных недоступна")
+        self.urls.extend(product['url'] for product in products)
+        return len(products)
+
+class TestReplay(unittest.TestCase):
+    """Страницы из архива сохраняются в Excel и базу данных без обращения к сайту"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        logging.disable(logging.CRITICAL)
+        self.archive = HtmlArchive(str(Path(self.tmp.name) / "archive"))
+        # Живые страницы получают ID 1..N, затем удаленная страница и страница вне диапазона
+        self.page_ids = list(range(1, len(FIXTURES) + 1))
+        for page_id, fixture in zip(self.page_ids, FIXTURES):
+            self.archive.append(page_id, f"{BASE_URL}{page_id}", 200, {}, fixture.read_bytes(), 'utf-8')
+        self.archive.append(100, f"{BASE_URL}100", 500, {}, b"Internal Server Error", 'utf-8')
+        self.archive.append(200, f"{BASE_URL}200", 200, {}, FIXTURES[0].read_bytes(), 'utf-8')
+
+    def tearDown(self):
+        self.archive.close()
+        logging.disable(logging.NOTSET)
+        self.tmp.cleanup()
+
+    def make_scraper(self, db):
+        config = dict(
+            SCRAPER_CONFIG,
+            excel_output=str(Path(self.tmp.name) / "products.xlsx"),
+            archive_dir=None,
+            dead_ids_file=None,
+            checkpoint_file=None,
+            db_flush_interval=0.01,
+            retry_delay=0.01
+        )
+        return PenguinMagicScraper(config, db_manager=db)
+
+    def test_count_respects_filters(self):
+        """Число страниц для прогресса учитывает диапазон и статус"""
+        self.assertEqual(count_archived_pages(self.archive), len(FIXTURES) + 1)
+        self.assertEqual(count_archived_pages(self.archive, 1, 150), len(FIXTURES))
+
+    def test_replay_into_sinks(self):
+        """Продукты из архива попадают в Excel и базу данных по одному разу"""
+        db = RecordingDatabase()
+        scraper = self.make_scraper(db)
+        stats = replay(scraper, self.archive, workers=1, start_page=1, end_page=150)
+
+        expected = [f"{BASE_URL}{page_id}" for page_id in self.page_ids]
+        self.assertEqual(stats['pages'], len(FIXTURES))
+        self.assertEqual(stats['products'], len(FIXTURES))
+        self.assertEqual(sorted(db.urls), sorted(expected))
+        excel = pd.read_excel(Path(self.tmp.name) / "products.xlsx")
+        self.assertEqual(sorted(excel['url']), sorted(expected))
+
+    def test_writer_closed_on_error(self):
+        """При ошибке повторного разбора поток записи в базу останавливается"""
+        scraper = self.make_scraper(RecordingDatabase(fail=True))
+
+        def save_to_excel(filename):
+            raise OSError("диск заполнен")
+
+        scraper.save_to_excel = save_to_excel
+        with self.assertRaises(OSError):
+            replay(scraper, self.archive, workers=1, start_page=1, end_page=150)
+        self.assertIsNone(scraper.db_writer._thread)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,86 @@
+"""
+Тесты политики повторных попыток
+"""
+import unittest
+from pathlib import Path
+import sys
+import asyncio
+from email.utils import formatdate
+import time
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(str(Path(__file__).parent.parent))
+
+import requests
+from scraping.retry_policy import (
+    RetryPolicy, CONNECT_ERROR, READ_TIMEOUT, RATE_LIMITED,
+    SERVER_ERROR, DELETED, NOT_FOUND, CLIENT_ERROR
+)
+
+class TestRetryPolicy(unittest.TestCase):
+    """Тесты классификации ошибок, задержек и бюджета повторов"""
+
+    def test_classify_status(self):
+        """Классификация HTTP-статусов"""
+        self.assertIsNone(RetryPolicy.classify_status(200))
+        self.assertEqual(RetryPolicy.classify_status(429), RATE_LIMITED)
+        self.assertEqual(RetryPolicy.classify_status(500), DELETED)
+        self.assertEqual(RetryPolicy.classify_status(503), SERVER_ERROR)
+        self.assertEqual(RetryPolicy.classify_status(404), NOT_FOUND)
+        self.assertEqual(RetryPolicy.classify_status(403), CLIENT_ERROR)
+
+    def test_classify_exception(self):
+        """Классификация сетевых ошибок requests и asyncio"""
+        self.assertEqual(RetryPolicy.classify_exception(requests.ConnectionError()), CONNECT_ERROR)
+        self.assertEqual(RetryPolicy.classify_exception(requests.ConnectTimeout()), CONNECT_ERROR)
+        self.assertEqual(RetryPolicy.classify_exception(requests.ReadTimeout()), READ_TIMEOUT)
+        self.assertEqual(RetryPolicy.classify_exception(asyncio.TimeoutError()), READ_TIMEOUT)
+
+    def test_non_retryable_errors(self):
+        """Удаленные страницы и 4xx не повторяются"""
+        policy = RetryPolicy(max_retries=3)
+        self.assertFalse(policy.should_retry(DELETED, 0))
+        self.assertFalse(policy.should_retry(NOT_FOUND, 0))
+        self.assertFalse(policy.should_retry(CLIENT_ERROR, 0))
+        self.assertTrue(policy.should_retry(SERVER_ERROR, 0))
+        self.assertFalse(policy.should_retry(SERVER_ERROR, 3))
+
+    def test_backoff_full_jitter(self):
+        """Задержка лежит в [0, min(max_delay, base * 2^attempt)]"""
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        for attempt in range(6):
+            for _ in range(50):
+                delay = policy.backoff(attempt)
+                self.assertGreaterEqual(delay, 0)
+                self.assertLessEqual(delay, min(5.0, 2 ** attempt))
+
+    def test_retry_after(self):
+        """Retry-After в секундах и в виде HTTP-даты"""
+        policy = RetryPolicy(base_delay=0.01, max_delay=30.0)
+        self.assertEqual(policy.parse_retry_after('7'), 7.0)
+        self.assertIsNone(policy.parse_retry_after(None))
+        self.assertIsNone(policy.parse_retry_after('soon'))
+        from_date = policy.parse_retry_after(formatdate(time.time() + 20, usegmt=True))
+        self.assertAlmostEqual(from_date, 20, delta=2)
+
+        self.assertGreaterEqual(policy.backoff(0, retry_after=7.0), 7.0)
+        self.assertGreaterEqual(policy.backoff(0, retry_after=30.0), 30.0)
+
+    def test_retry_after_above_max_delay(self):
+        """Повтор раньше Retry-After не выполняется: при превышении max_delay запрос не повторяется"""
+        policy = RetryPolicy(max_retries=3, max_delay=30.0)
+        self.assertTrue(policy.should_retry(RATE_LIMITED, 0, retry_after=30.0))
+        self.assertFalse(policy.should_retry(RATE_LIMITED, 0, retry_after=3600.0))
+        # Отказ не расходует бюджет повторов
+        self.assertEqual(policy.retries, 1)
+
+    def test_retry_budget(self):
+        """Бюджет ограничивает общее число повторов"""
+        policy = RetryPolicy(max_retries=10, budget_ratio=0.1, budget_min=2)
+        for _ in range(10):
+            policy.record_request()
+        allowed = sum(policy.should_retry(SERVER_ERROR, 0) for _ in range(20))
+        self.assertEqual(allowed, 3)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)